@@ -0,0 +1,50 @@
+"""Compares two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare BASELINE.json CURRENT.json [--threshold 0.10]
+
+Exits with status 1 when any benchmark lost more than the threshold in
+throughput or gained more than the threshold in p95 latency.
+"""
+import argparse
+import json
+import sys
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+def compare(baseline, current, threshold):
+    """Returns a list of (key, metric, old, new, change, regressed)."""
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        old, new = baseline[key], current[key]
+        if "error" in old or "error" in new:
+            continue
+        for metric, higher_is_better in (("pages_per_s", True), ("p95", False)):
+            if not old.get(metric) or new.get(metric) is None:
+                continue
+            change = (new[metric] - old[metric]) / old[metric]
+            regressed = -change > threshold if higher_is_better else change > threshold
+            rows.append((key, metric, old[metric], new[metric], change, regressed))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed relative slowdown before failing (default: 0.10).")
+    args = parser.parse_args(argv)
+
+    rows = compare(load(args.baseline), load(args.current), args.threshold)
+    regressions = 0
+    for key, metric, old, new, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{key:32} {metric:12} {old:>12} {new:>12} {change:+8.1%} {flag}")
+        regressions += regressed
+    print(f"{regressions} regression(s) over {args.threshold:.0%} threshold")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
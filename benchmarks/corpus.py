@@ -0,0 +1,105 @@
+"""Builds a reproducible benchmark corpus with PyMuPDF.
+
+Usage:
+    python -m benchmarks.corpus [--out DIR] [--sizes 10,100,1000,5000]
+"""
+import argparse
+import os
+import random
+import fitz # PyMuPDF
+
+KINDS = ("text", "table", "image", "small")
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+SEED = 2026
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua converter page document table "
+         "image report section chapter figure summary result").split()
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+def _text_page(doc, rng):
+    page = doc.new_page()
+    text = "\n\n".join(" ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(5)) for _ in range(6))
+    page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=10)
+
+def _table_page(doc, rng):
+    page = doc.new_page()
+    rows, cols = 30, 6
+    x0, y0, cw, rh = 40, 50, (page.rect.width - 80) / cols, 22
+    for r in range(rows + 1):
+        page.draw_line((x0, y0 + r * rh), (x0 + cols * cw, y0 + r * rh))
+    for c in range(cols + 1):
+        page.draw_line((x0 + c * cw, y0), (x0 + c * cw, y0 + rows * rh))
+    for r in range(rows):
+        for c in range(cols):
+            cell = rng.choice(WORDS) if c == 0 else f"{rng.uniform(0, 10000):.2f}"
+            page.insert_text((x0 + c * cw + 4, y0 + r * rh + 15), cell, fontsize=9)
+
+def _image_page(doc, rng, images):
+    page = doc.new_page()
+    page.insert_text((50, 40), _sentence(rng, 8), fontsize=12)
+    for i in range(4):
+        x, y = 50 + (i % 2) * 260, 60 + (i // 2) * 360
+        page.insert_image(fitz.Rect(x, y, x + 240, y + 340), pixmap=rng.choice(images))
+
+def _small_page(doc, rng):
+    page = doc.new_page(width=200, height=120)
+    page.insert_text((10, 30), _sentence(rng, 4), fontsize=8)
+
+def _make_images(rng):
+    images = []
+    for _ in range(3):
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 256, 256), False)
+        pix.set_rect(pix.irect, tuple(rng.randint(0, 255) for _ in range(3)))
+        for _ in range(40):
+            x, y = rng.randint(0, 224), rng.randint(0, 224)
+            pix.set_rect(fitz.IRect(x, y, x + 32, y + 32), tuple(rng.randint(0, 255) for _ in range(3)))
+        images.append(pix)
+    return images
+
+def build_document(kind, pages, path):
+    # Seeded per document so every run produces identical files
+    rng = random.Random(f"{SEED}-{kind}-{pages}")
+    doc = fitz.open()
+    images = _make_images(rng) if kind == "image" else None
+    for _ in range(pages):
+        if kind == "text":
+            _text_page(doc, rng)
+        elif kind == "table":
+            _table_page(doc, rng)
+        elif kind == "image":
+            _image_page(doc, rng, images)
+        else:
+            _small_page(doc, rng)
+    doc.save(path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+
+def build_corpus(out_dir, sizes=DEFAULT_SIZES, kinds=KINDS):
+    """Creates any missing corpus documents and returns {name: path}."""
+    os.makedirs(out_dir, exist_ok=True)
+    corpus = {}
+    for kind in kinds:
+        for pages in sizes:
+            name = f"{kind}-{pages}"
+            path = os.path.join(out_dir, f"{name}.pdf")
+            if not os.path.exists(path):
+                build_document(kind, pages, path)
+            corpus[name] = path
+    return corpus
+
+def parse_sizes(value):
+    return tuple(int(v) for v in value.split(",") if v.strip())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the benchmark PDF corpus.")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES)
+    parser.add_argument("--kinds", default=",".join(KINDS))
+    args = parser.parse_args(argv)
+    for name, path in build_corpus(args.out, args.sizes, args.kinds.split(",")).items():
+        print(f"{name}: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Times the conversion pipeline on the benchmark corpus.
+
+Usage:
+    python -m benchmarks.run [--sizes 10,100,1000] [--ops txt,html,docx,text,bitmap] [--out results.json]
+
+Each operation runs in a fresh child process so its peak RSS is not
+inflated by earlier runs. Results are written as JSON and can be diffed
+with python -m benchmarks.compare.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import fitz # PyMuPDF
+from . import corpus
+from modules.metrics import percentile
+
+OPS = ("txt", "html", "docx", "text", "bitmap")
+# The viewer renders to wx bitmaps, so its operations need wxPython
+VIEWER_OPS = ("text", "bitmap")
+BITMAP_WIDTH = 800
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+def _measure(op, pdf_path, repeat, workers):
+    """Runs one operation in the child process; returns (latencies, pages per latency, peak RSS)."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from modules.converter import ConverterLogic
+    from modules.text_cache import TextCache, reset_text_cache
+
+    def fresh_text_cache():
+        # Repeats must time extraction, not hits on text kept from the run before
+        reset_text_cache(TextCache(disk=False))
+
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if op in ("txt", "html", "docx"):
+            output_path = os.path.join(tmp, f"out.{op}")
+            for _ in range(repeat):
+                fresh_text_cache()
+                logic = ConverterLogic(workers=workers)
+                # The exporters themselves; convert() would run large documents
+                # as checkpointed jobs under the real app data folder
+                export = getattr(logic, f"convert_to_{op}")
+                t0 = time.perf_counter()
+                export(pdf_path, output_path)
+                latencies.append(time.perf_counter() - t0)
+            pages = fitz.open(pdf_path).page_count
+        elif op == "text":
+            from modules.pdf_viewer import PDFViewer
+            for _ in range(repeat):
+                fresh_text_cache()
+                t0 = time.perf_counter()
+                viewer = PDFViewer(pdf_path, threaded=False)
+                viewer.get_text()
+                viewer.close()
+                latencies.append(time.perf_counter() - t0)
+            pages = fitz.open(pdf_path).page_count
+        else:
+            # Per-page latency of rendering a page at preview width
+            import wx
+            from modules.pdf_viewer import PDFViewer
+            app = wx.App(False)
+            viewer = PDFViewer(pdf_path, threaded=False)
+            for _ in range(repeat):
+                viewer.render_cache.clear()
+                for page_num in range(viewer.page_count):
+                    t0 = time.perf_counter()
+                    viewer.get_page_bitmap(page_num, BITMAP_WIDTH)
+                    latencies.append(time.perf_counter() - t0)
+            viewer.close()
+            app.Destroy()
+            pages = 1
+    return latencies, pages, peak_rss_mb()
+
+def run_benchmark(op, name, pdf_path, repeat, workers):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        latencies, pages, rss = pool.submit(_measure, op, pdf_path, repeat, workers).result()
+    p50 = percentile(latencies, 50)
+    total_pages = pages * len(latencies)
+    return {
+        "document": name,
+        "op": op,
+        "runs": len(latencies),
+        "p50": round(p50, 5),
+        "p95": round(percentile(latencies, 95), 5),
+        "mean": round(statistics.mean(latencies), 5),
+        "pages_per_s": round(total_pages / sum(latencies), 2) if sum(latencies) else None,
+        "peak_rss_mb": rss,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PDF Converter on a synthetic corpus.")
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--sizes", type=corpus.parse_sizes, default=(10, 100, 1000))
+    parser.add_argument("--kinds", default=",".join(corpus.KINDS))
+    parser.add_argument("--ops", default=",".join(OPS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="ConverterLogic page workers.")
+    parser.add_argument("--docx-max-pages", type=int, default=100,
+                        help="Skip DOCX on larger documents, it is much slower than the rest.")
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    ops = args.ops.split(",")
+    skipped = [op for op in ops if op in VIEWER_OPS]
+    if skipped and importlib.util.find_spec("wx") is None:
+        print(f"Skipping {', '.join(skipped)}: wxPython is not installed.", flush=True)
+        ops = [op for op in ops if op not in VIEWER_OPS]
+
+    docs = corpus.build_corpus(args.corpus, args.sizes, args.kinds.split(","))
+    results = {}
+    for name, path in docs.items():
+        pages = int(name.rsplit("-", 1)[1])
+        for op in ops:
+            if op == "docx" and pages > args.docx_max_pages:
+                continue
+            try:
+                result = run_benchmark(op, name, path, args.repeat, args.workers)
+            except Exception as e:
+                result = {"document": name, "op": op, "error": str(e)}
+            results[f"{name}/{op}"] = result
+            print(json.dumps(result), flush=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": fitz.VersionBind,
+            "repeat": args.repeat,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Measures cold start time.
+
+Usage:
+    python -m benchmarks.startup [--repeat 10] [--scenarios window,import] [--out startup_results.json]
+
+Every run starts a fresh interpreter and times it from launch until the
+main window is shown ("window", needs wxPython and a display) or until the
+headless conversion modules are imported ("import"). Each run also records
+which heavy backends were already loaded at that point; none should be.
+Results use the same format as benchmarks.run, so two files can be diffed
+with python -m benchmarks.compare.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from .run import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_REPORT = """
+import json, os, sys
+from modules.backends import WARM_UP_MODULES
+def report():
+    print(json.dumps({"loaded": [m for m in WARM_UP_MODULES if m in sys.modules]}), flush=True)
+"""
+
+SCENARIOS = {
+    # Same imports as main.py, done once the first event is processed
+    "window": _REPORT + """
+import wx
+from modules.ui import MainFrame
+app = wx.App()
+frame = MainFrame()
+def shown():
+    report()
+    os._exit(0)
+wx.CallAfter(shown)
+app.MainLoop()
+""",
+    "import": _REPORT + """
+import modules.converter, modules.cache, modules.cli
+report()
+""",
+}
+
+def time_start(code):
+    """Runs code in a new interpreter; returns (seconds until it reported, report)."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    line = ""
+    for line in proc.stdout:
+        if line.startswith("{"):
+            break
+    elapsed = time.perf_counter() - t0
+    proc.stdout.close()
+    err = proc.stderr.read()
+    proc.wait()
+    if not line.startswith("{"):
+        raise RuntimeError(err.strip().splitlines()[-1] if err.strip() else "no report from child")
+    return elapsed, json.loads(line)
+
+def run_scenario(name, repeat):
+    latencies = []
+    loaded = []
+    for _ in range(repeat):
+        elapsed, report = time_start(SCENARIOS[name])
+        latencies.append(elapsed)
+        loaded = report["loaded"]
+    return {
+        "document": "startup",
+        "op": name,
+        "runs": repeat,
+        "p50": round(percentile(latencies, 50), 5),
+        "p95": round(percentile(latencies, 95), 5),
+        "mean": round(statistics.mean(latencies), 5),
+        "backends_loaded": loaded,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PDF Converter cold start.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--out", default="startup_results.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.scenarios.split(","):
+        try:
+            result = run_scenario(name, args.repeat)
+        except Exception as e:
+            result = {"document": "startup", "op": name, "error": str(e)}
+        results[f"startup/{name}"] = result
+        print(json.dumps(result), flush=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
+import multiprocessing
 import wx
 from modules.ui import MainFrame
 
 if __name__ == '__main__':
+    # Needed for the conversion worker pool in frozen builds
+    multiprocessing.freeze_support()
     app = wx.App()
     frame = MainFrame()
     app.MainLoop()
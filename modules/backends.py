@@ -0,0 +1,52 @@
+"""Lazy loading of the heavy PDF backends.
+
+PyMuPDF, pdfminer and pdf2docx take a noticeable part of a second to
+import, so they are loaded the first time a conversion or the viewer
+needs them instead of when the window is created.
+"""
+import importlib
+import threading
+
+# Imported in this order by warm_up; pdf2docx pulls in PyMuPDF itself
+WARM_UP_MODULES = (
+    "fitz",
+    "pdfminer.high_level",
+    "pdf2docx",
+)
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+fitz = LazyModule("fitz") # PyMuPDF
+
+def warm_up():
+    """Imports every backend so the first conversion doesn't pay for it.
+
+    Failures are ignored here; they surface when the backend is really used.
+    """
+    for name in WARM_UP_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+def start_warm_up():
+    """Runs warm_up on a daemon thread."""
+    thread = threading.Thread(target=warm_up, name="backend-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from . import config
+
+# Bump when converter output changes so stale entries are not reused
+CACHE_VERSION = 1
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_COUNT = 8
+
+def fast_fingerprint(pdf_path):
+    """Hashes size, mtime and a few sampled blocks; cheap even for huge files."""
+    st = os.stat(pdf_path)
+    h = hashlib.sha256(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    with open(pdf_path, 'rb') as f:
+        if st.st_size <= SAMPLE_SIZE * SAMPLE_COUNT:
+            h.update(f.read())
+        else:
+            step = (st.st_size - SAMPLE_SIZE) // (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(i * step)
+                h.update(f.read(SAMPLE_SIZE))
+    return h.hexdigest()
+
+def full_fingerprint(pdf_path):
+    """Hashes the whole file content."""
+    h = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class ConversionCache:
+    """On-disk cache of conversion outputs with a size cap and LRU eviction.
+
+    Each entry lives in its own folder with a meta.json, so several
+    processes can share the cache without a common index file.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, full_hash=False, hardlink=False):
+        self.cache_dir = cache_dir or os.path.join(config.get_app_data_dir(), "cache")
+        self.max_bytes = max_bytes if max_bytes is not None else config.get_cache_size_mb() * 1024 * 1024
+        self.full_hash = full_hash
+        self.hardlink = hardlink
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, pdf_path, fmt, options, output_name):
+        fingerprint = full_fingerprint(pdf_path) if self.full_hash else fast_fingerprint(pdf_path)
+        payload = json.dumps({
+            "version": CACHE_VERSION,
+            "pdf": fingerprint,
+            "format": fmt,
+            "options": options,
+            # Split HTML links parts by file name, so the name is part of the output
+            "name": output_name,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def fetch(self, key, output_dir):
+        """Restores a cached entry into output_dir. Returns the paths or None on a miss."""
+        entry = self._entry_dir(key)
+        meta = self._read_complete(entry)
+        if meta is None:
+            self.misses += 1
+            return None
+
+        outputs = []
+        for name in meta["files"]:
+            target = os.path.join(output_dir, name)
+            self._place(os.path.join(entry, name), target)
+            outputs.append(target)
+
+        meta["last_used"] = time.time()
+        self._write_meta(entry, meta)
+        self.hits += 1
+        return outputs
+
+    def store(self, key, outputs):
+        """Copies freshly converted outputs into the cache and evicts old entries.
+
+        An entry another process stored for the same key in the meantime is
+        kept; only an incomplete one is replaced.
+        """
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            size = 0
+            for path in outputs:
+                shutil.copyfile(path, os.path.join(tmp, os.path.basename(path)))
+                size += os.path.getsize(path)
+            self._write_meta(tmp, {
+                "files": [os.path.basename(p) for p in outputs],
+                "size": size,
+                "last_used": time.time(),
+            })
+            entry = self._entry_dir(key)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                if self._read_complete(entry) is None:
+                    shutil.rmtree(entry, ignore_errors=True)
+                    os.replace(tmp, entry)
+                else:
+                    shutil.rmtree(tmp, ignore_errors=True)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits its size cap."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            meta = self._read_meta(entry)
+            if meta is None:
+                continue
+            entries.append((meta["last_used"], meta["size"], entry))
+            total += meta["size"]
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir):
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def stats(self):
+        entries = 0
+        size = 0
+        for name in os.listdir(self.cache_dir):
+            meta = self._read_meta(os.path.join(self.cache_dir, name))
+            if meta is not None:
+                entries += 1
+                size += meta["size"]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _place(self, source, target):
+        if os.path.exists(target):
+            os.remove(target)
+        if self.hardlink:
+            try:
+                os.link(source, target)
+                return
+            except OSError:
+                pass # Different volume or unsupported, copy instead
+        shutil.copyfile(source, target)
+
+    def _read_meta(self, entry):
+        try:
+            with open(os.path.join(entry, "meta.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_complete(self, entry):
+        # A partly deleted entry is no use; it counts as missing
+        meta = self._read_meta(entry)
+        if meta is None or not all(os.path.exists(os.path.join(entry, name)) for name in meta["files"]):
+            return None
+        return meta
+
+    def _write_meta(self, entry, meta):
+        path = os.path.join(entry, "meta.json")
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
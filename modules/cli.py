@@ -0,0 +1,327 @@
+"""Headless batch conversion.
+
+Usage:
+    python -m modules.cli convert INPUT [INPUT ...] --format txt,html,json,docx
+    python -m modules.cli probe INPUT [INPUT ...]
+    python -m modules.cli raster INPUT [INPUT ...] --sizes full=150dpi,thumb=160
+    python -m modules.cli serve [--port 8765]
+    python -m modules.cli watch FOLDER [--format txt,docx]
+
+INPUT may be a PDF file, a directory or a glob pattern. A JSON summary is
+printed to stdout. Exit codes: 0 all conversions succeeded, 1 some failed,
+2 all failed or nothing to convert.
+"""
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import config
+from .cache import ConversionCache
+from .converter import ConverterLogic, FORMATS, split_single_pass, output_path_for
+from . import raster
+from .metrics import write_trace
+from .probe import probe_files, SAMPLE_PAGES, COST_MODEL
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_FAILED = 2
+
+def collect_inputs(patterns, recursive=False):
+    """Expands files, directories and glob patterns into a sorted list of PDFs."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            walker = os.walk(pattern) if recursive else [(pattern, [], os.listdir(pattern))]
+            for root, _, files in walker:
+                for name in files:
+                    if name.lower().endswith(".pdf"):
+                        found.add(os.path.abspath(os.path.join(root, name)))
+        elif os.path.isfile(pattern):
+            found.add(os.path.abspath(pattern))
+        else:
+            for path in glob.glob(pattern, recursive=recursive):
+                if os.path.isfile(path) and path.lower().endswith(".pdf"):
+                    found.add(os.path.abspath(path))
+    return sorted(found)
+
+def parse_formats(value):
+    formats = [f.strip().lower() for f in value.split(",") if f.strip()]
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise argparse.ArgumentTypeError(f"unsupported format: {fmt}")
+    if not formats:
+        raise argparse.ArgumentTypeError("no format given")
+    return formats
+
+def parse_sizes(value):
+    try:
+        raster.parse_sizes(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+def make_cache(args):
+    if args.no_cache or not config.get_cache_enabled():
+        return None
+    return ConversionCache(full_hash=args.full_hash)
+
+def convert_file(pdf_path, formats, output_dir, options, page_workers=1, cache_args=None, trace_dir=None):
+    """Converts one document to every requested format. Runs in a worker process."""
+    logic = ConverterLogic(workers=page_workers, cache=make_cache(cache_args) if cache_args else None)
+    results = []
+    # Text formats requested together are extracted in one pass and reported as one result
+    single_pass, separate = split_single_pass(formats, options)
+    groups = ([single_pass] if single_pass else []) + [[fmt] for fmt in separate]
+    for group in groups:
+        output_paths = {fmt: output_path_for(pdf_path, fmt, output_dir) for fmt in group}
+        result = {"input": pdf_path, "format": ",".join(group), "output": list(output_paths.values())}
+        t0 = time.perf_counter()
+        metrics = logic.new_metrics(f"{os.path.basename(pdf_path)}-{'-'.join(group)}")
+        try:
+            logic.convert_formats(pdf_path, output_paths, **options)
+            result["status"] = "ok"
+            result["cached"] = logic.last_from_cache
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - t0, 3)
+        snapshot = metrics.snapshot()
+        for key in ("pages", "pages_per_s", "bytes_written", "peak_memory_mb", "stages"):
+            result[key] = snapshot[key]
+        if trace_dir:
+            result["trace"] = write_trace(metrics, trace_dir)
+        results.append(result)
+    return results
+
+def run_convert(args):
+    inputs = collect_inputs(args.inputs, args.recursive)
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        "pages_per_file": args.pages_per_file,
+        "docx_workers": args.docx_workers,
+        "page_ranges": args.pages,
+        "txt_backend": args.txt_backend,
+        "raster_sizes": args.sizes,
+        "raster_format": args.image_format,
+    }
+    jobs = args.jobs or os.cpu_count() or 1
+    # With several documents in flight, parallelism comes from the document
+    # pool; a single document may use the page-parallel engine instead.
+    page_workers = 1 if jobs > 1 and len(inputs) > 1 else None
+    # Plain values rather than a cache object so they can be sent to workers
+    cache_args = argparse.Namespace(no_cache=args.no_cache, full_hash=args.full_hash)
+
+    t0 = time.perf_counter()
+    results = []
+    if jobs == 1 or len(inputs) <= 1:
+        for pdf_path in inputs:
+            results.extend(convert_file(pdf_path, args.format, args.output_dir, options,
+                                        page_workers, cache_args, args.trace))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(convert_file, pdf_path, args.format, args.output_dir,
+                                   options, page_workers, cache_args, args.trace): pdf_path
+                       for pdf_path in inputs}
+            for future in as_completed(futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # The worker itself died, e.g. it ran out of memory
+                    results.append({"input": futures[future], "format": ",".join(args.format),
+                                    "status": "failed", "error": str(e)})
+    results.sort(key=lambda r: (r["input"], r["format"]))
+
+    failed = sum(1 for r in results if r["status"] != "ok")
+    hits = sum(1 for r in results if r.get("cached"))
+    summary = {
+        "files": len(inputs),
+        "conversions": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "cache": {"hits": hits, "misses": len(results) - failed - hits},
+        "results": results,
+    }
+    return summary, exit_code(len(results), failed)
+
+def run_probe(args):
+    inputs = collect_inputs(args.inputs, args.recursive)
+    t0 = time.perf_counter()
+    results = probe_files(inputs, args.jobs or None, args.sample)
+    seconds = time.perf_counter() - t0
+
+    ok = [r for r in results if r["status"] == "ok"]
+    kinds = {}
+    for r in ok:
+        kinds[r["kind"]] = kinds.get(r["kind"], 0) + 1
+    summary = {
+        "files": len(inputs),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "pages": sum(r["pages"] for r in ok),
+        "encrypted": sum(1 for r in ok if r["encrypted"]),
+        "kinds": kinds,
+        "estimated_seconds": {fmt: round(sum(r["estimated_seconds"][fmt] for r in ok
+                                             if "estimated_seconds" in r), 1)
+                              for fmt in COST_MODEL},
+        "seconds": round(seconds, 3),
+        "files_per_s": round(len(inputs) / seconds, 1) if seconds else 0.0,
+        "results": results,
+    }
+    return summary, exit_code(len(results), len(results) - len(ok))
+
+def run_raster(args):
+    inputs = collect_inputs(args.inputs, args.recursive)
+    output_paths = {pdf_path: output_path_for(pdf_path, "pages", args.output_dir) for pdf_path in inputs}
+    strip_pages = config.get_strip_pages() if args.strip is None else args.strip
+    t0 = time.perf_counter()
+    results = raster.rasterize_files(inputs, output_paths, raster.parse_sizes(args.sizes),
+                                     args.image_format, args.jobs or os.cpu_count() or 1,
+                                     config.get_jpeg_quality(), strip_pages)
+    seconds = time.perf_counter() - t0
+    failed = sum(1 for r in results if r["status"] != "ok")
+    pages = sum(r["pages"] for r in results if r["status"] == "ok")
+    summary = {
+        "files": len(inputs),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "pages": pages,
+        "seconds": round(seconds, 3),
+        "pages_per_s": round(pages / seconds, 1) if seconds else 0.0,
+        "results": results,
+    }
+    return summary, exit_code(len(results), failed)
+
+def run_serve(args):
+    # Imported here so the other commands don't load asyncio
+    from .service import ConversionService
+    service = ConversionService(args.port, args.workers, args.max_queue)
+    print(f"Serving on http://127.0.0.1:{service.port}/ (Ctrl+C to stop)", file=sys.stderr)
+    return service.run(), EXIT_OK
+
+def run_watch(args):
+    from .watch import HotFolder
+    def report(result):
+        print(json.dumps(result), file=sys.stderr, flush=True)
+    options = {"txt_backend": args.txt_backend}
+    folder = HotFolder(args.folder, args.format or parse_formats(config.get_watch_formats()),
+                       args.output_dir, args.done_dir, args.failed_dir, args.jobs or None,
+                       args.settle, args.poll, options, report)
+    # Stopped by a service manager like by Ctrl+C: finish cleanly and print the summary
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Watching {folder.folder} (Ctrl+C to stop)", file=sys.stderr)
+    summary = folder.run()
+    return summary, exit_code(summary["files"], summary["failed"]) if summary["files"] else EXIT_OK
+
+def run_cache(args):
+    cache = ConversionCache()
+    if args.clear:
+        cache.clear()
+    return cache.stats(), EXIT_OK
+
+def exit_code(total, failed):
+    if total == 0 or failed == total:
+        return EXIT_FAILED
+    if failed:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m modules.cli",
+                                     description="PDF Converter command line interface.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("convert", help="Convert PDF files to one or more formats.")
+    p.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns.")
+    p.add_argument("-f", "--format", type=parse_formats, default=["txt"],
+                   help=f"Comma separated output formats: {', '.join(FORMATS)} (default: txt). "
+                        "Several text formats are extracted in a single pass.")
+    p.add_argument("-o", "--output-dir", help="Output folder (default: next to each input).")
+    p.add_argument("-j", "--jobs", type=int, default=0,
+                   help="Documents converted in parallel (default: one per CPU).")
+    p.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively.")
+    p.add_argument("--pages-per-file", type=int, default=0,
+                   help="Split HTML output every N pages (default: single file).")
+    p.add_argument("--docx-workers", type=int, default=1,
+                   help="pdf2docx worker processes per document (default: 1).")
+    p.add_argument("--pages", help='DOCX page ranges, e.g. "1-50,120-140".')
+    p.add_argument("--txt-backend", choices=("pdfminer", "pymupdf"),
+                   help="TXT extraction: pdfminer keeps the layout, pymupdf is much faster "
+                        "(default: the txt_backend setting, pdfminer).")
+    p.add_argument("--sizes", type=parse_sizes,
+                   help='Page image sizes, e.g. "full=150dpi,thumb=160" (default: the Raster settings).')
+    p.add_argument("--image-format", choices=raster.FORMATS, help="Page image format (default: png).")
+    p.add_argument("--no-cache", action="store_true", help="Always convert, ignoring the conversion cache.")
+    p.add_argument("--full-hash", action="store_true",
+                   help="Key the cache on a hash of the whole file instead of sampled blocks.")
+    p.add_argument("--trace", metavar="DIR", help="Write a JSON and CSV metrics trace per conversion to DIR.")
+    p.set_defaults(func=run_convert)
+
+    p = sub.add_parser("probe", help="Report page count, encryption, text or scanned and estimated cost.")
+    p.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns.")
+    p.add_argument("-j", "--jobs", type=int, default=0,
+                   help="Processes probing files in parallel (default: one per CPU).")
+    p.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively.")
+    p.add_argument("--sample", type=int, default=SAMPLE_PAGES,
+                   help=f"Pages sampled per document (default: {SAMPLE_PAGES}).")
+    p.set_defaults(func=run_probe)
+
+    p = sub.add_parser("raster", help="Render the pages of many PDFs to images in several sizes.")
+    p.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns.")
+    p.add_argument("-o", "--output-dir", help="Output folder (default: next to each input).")
+    p.add_argument("-j", "--jobs", type=int, default=0,
+                   help="Rendering processes, shared by all documents (default: one per CPU).")
+    p.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively.")
+    p.add_argument("--sizes", type=parse_sizes, default=config.get_raster_sizes(),
+                   help='Comma separated NAME=VALUE sizes; VALUE is a resolution such as 150dpi '
+                        'or a width in pixels (default: %(default)s).')
+    p.add_argument("--image-format", choices=raster.FORMATS, default=config.get_raster_format(),
+                   help="Image format (default: %(default)s).")
+    p.add_argument("--strip", type=int,
+                   help="Pages in the thumbnail strip per document, 0 for none (default: the strip_pages setting).")
+    p.set_defaults(func=run_raster)
+
+    p = sub.add_parser("serve", help="Serve conversions over HTTP to programs on this machine.")
+    p.add_argument("--port", type=int, help="Port on 127.0.0.1 (default: the Service port setting, 8765).")
+    p.add_argument("--workers", type=int, help="Conversions run at the same time (default: one per CPU).")
+    p.add_argument("--max-queue", type=int,
+                   help="Requests kept waiting before new ones get 503 (default: 16).")
+    p.set_defaults(func=run_serve)
+
+    p = sub.add_parser("watch", help="Convert PDFs as they are dropped into a folder.")
+    p.add_argument("folder", help="Folder to watch.")
+    p.add_argument("-f", "--format", type=parse_formats,
+                   help="Comma separated output formats (default: the Watch formats setting, txt).")
+    p.add_argument("-o", "--output-dir", help="Output folder (default: FOLDER/converted).")
+    p.add_argument("--done-dir", help="Where converted PDFs are moved (default: FOLDER/done).")
+    p.add_argument("--failed-dir", help="Where PDFs that failed are moved (default: FOLDER/failed).")
+    p.add_argument("-j", "--jobs", type=int, default=0,
+                   help="Documents converted in parallel (default: one per CPU).")
+    p.add_argument("--settle", type=int,
+                   help="Seconds a file must stay unchanged before it is converted (default: 2).")
+    p.add_argument("--poll", action="store_true",
+                   help="Check the folder periodically instead of using inotify, e.g. on network shares.")
+    p.add_argument("--txt-backend", choices=("pdfminer", "pymupdf"),
+                   help="TXT extraction (default: the txt_backend setting, pdfminer).")
+    p.set_defaults(func=run_watch)
+
+    p = sub.add_parser("cache", help="Show conversion cache statistics.")
+    p.add_argument("--clear", action="store_true", help="Remove every cached entry.")
+    p.set_defaults(func=run_cache)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    summary, code = args.func(args)
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main())
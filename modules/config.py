@@ -1,51 +1,275 @@
+import atexit
 import os
 import configparser
+import tempfile
+import threading
+import time
 
 APP_NAME = "PDF Converter"
 VENDOR_NAME = "Technology Entertainment Studio"
 
+SAVE_DELAY = 0.5          # Seconds of quiet before pending changes are written
+RELOAD_CHECK_INTERVAL = 1.0 # Seconds between checks for outside edits of config.ini
+
+_app_data_dir = None
+
 def get_app_data_dir():
     """Returns the path to the application data directory."""
-    appdata = os.getenv('APPDATA')
-    if not appdata:
-        appdata = os.path.expanduser("~")
-    
-    path = os.path.join(appdata, VENDOR_NAME, APP_NAME)
-    if not os.path.exists(path):
-        os.makedirs(path)
-    return path
+    global _app_data_dir
+    if _app_data_dir is None:
+        appdata = os.getenv('APPDATA')
+        if not appdata:
+            appdata = os.path.expanduser("~")
+
+        path = os.path.join(appdata, VENDOR_NAME, APP_NAME)
+        os.makedirs(path, exist_ok=True)
+        _app_data_dir = path
+    return _app_data_dir
 
 def get_config_path():
     return os.path.join(get_app_data_dir(), "config.ini")
 
+class Settings:
+    """config.ini held in memory.
+
+    The file is read on first use and again only when its mtime changes.
+    Changes are batched: every set() restarts a short timer and the file is
+    rewritten once things go quiet, or at exit, through a temp file and a
+    rename so a crash never leaves it half written.
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._parser = None
+        self._mtime = None
+        self._checked = 0.0
+        self._dirty = False
+        self._timer = None
+        self._lock = threading.RLock()
+
+    @property
+    def path(self):
+        if self._path is None:
+            self._path = get_config_path()
+        return self._path
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self):
+        parser = configparser.ConfigParser()
+        self._mtime = self._file_mtime()
+        if self._mtime is not None:
+            parser.read(self.path, encoding='utf-8')
+
+        # Set defaults if missing
+        if 'General' not in parser:
+            parser['General'] = {}
+        if 'language' not in parser['General']:
+            parser['General']['language'] = 'en'
+        self._parser = parser
+
+    def parser(self):
+        """Returns the ConfigParser, re-reading config.ini if it changed on disk."""
+        with self._lock:
+            now = time.monotonic()
+            if self._parser is None:
+                self._load()
+                self._checked = now
+            elif not self._dirty and now - self._checked >= RELOAD_CHECK_INTERVAL:
+                # Unsaved changes win over outside edits; they are written shortly
+                self._checked = now
+                if self._file_mtime() != self._mtime:
+                    self._load()
+            return self._parser
+
+    def get(self, section, key, fallback=None):
+        return self.parser().get(section, key, fallback=fallback)
+
+    def get_int(self, section, key, fallback=0):
+        try:
+            return self.parser().getint(section, key, fallback=fallback)
+        except ValueError:
+            return fallback
+
+    def get_bool(self, section, key, fallback=False):
+        try:
+            return self.parser().getboolean(section, key, fallback=fallback)
+        except ValueError:
+            return fallback
+
+    def set(self, section, key, value):
+        with self._lock:
+            parser = self.parser()
+            if section not in parser:
+                parser[section] = {}
+            parser[section][key] = str(value)
+            self._schedule_save()
+
+    def replace(self, parser):
+        """Swaps in a whole ConfigParser and saves it right away."""
+        with self._lock:
+            self._parser = parser
+            self._dirty = True
+            self.flush()
+
+    def _schedule_save(self):
+        self._dirty = True
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(SAVE_DELAY, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Writes pending changes to config.ini now."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            fd, tmp = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as configfile:
+                    self._parser.write(configfile)
+                os.replace(tmp, self.path)
+            except OSError:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            self._dirty = False
+            self._mtime = self._file_mtime()
+
+settings = Settings()
+atexit.register(settings.flush)
+
 def load_config():
-    """Loads the configuration from config.ini."""
-    config = configparser.ConfigParser()
-    config_path = get_config_path()
-    
-    if os.path.exists(config_path):
-        config.read(config_path, encoding='utf-8')
-    
-    # Set defaults if missing
-    if 'General' not in config:
-        config['General'] = {}
-    
-    if 'language' not in config['General']:
-        config['General']['language'] = 'en'
-        
-    return config
+    """Returns the cached configuration."""
+    return settings.parser()
 
 def save_config(config):
     """Saves the configuration to config.ini."""
-    config_path = get_config_path()
-    with open(config_path, 'w', encoding='utf-8') as configfile:
-        config.write(configfile)
+    settings.replace(config)
 
 def get_language():
-    config = load_config()
-    return config['General'].get('language', 'en')
+    return settings.get('General', 'language', 'en')
 
 def set_language(lang_code):
-    config = load_config()
-    config['General']['language'] = lang_code
-    save_config(config)
+    settings.set('General', 'language', lang_code)
+
+def get_worker_count():
+    """Worker processes for page-parallel conversion, 0 means one per CPU."""
+    return settings.get_int('Performance', 'workers', 0)
+
+def get_chunk_size():
+    """Pages handed to a worker process at a time."""
+    return settings.get_int('Performance', 'chunk_size', 50)
+
+def set_performance(workers, chunk_size):
+    settings.set('Performance', 'workers', workers)
+    settings.set('Performance', 'chunk_size', chunk_size)
+
+def get_cache_enabled():
+    return settings.get_bool('Cache', 'enabled', True)
+
+def get_cache_size_mb():
+    return settings.get_int('Cache', 'size_mb', 1024)
+
+def set_cache(enabled, size_mb):
+    settings.set('Cache', 'enabled', enabled)
+    settings.set('Cache', 'size_mb', size_mb)
+
+def get_render_cache_mb():
+    """Memory budget for rendered page images."""
+    return settings.get_int('Performance', 'render_cache_mb', 256)
+
+def get_job_min_pages():
+    """Documents with at least this many pages are converted as resumable jobs."""
+    return settings.get_int('Performance', 'job_min_pages', 500)
+
+def get_job_chunk_pages():
+    """Pages per checkpointed chunk of a resumable job."""
+    return settings.get_int('Performance', 'job_chunk_pages', 100)
+
+def get_docx_shard_min_pages():
+    """Pages from which DOCX with several workers is converted in shards and merged."""
+    return settings.get_int('Performance', 'docx_shard_min_pages', 200)
+
+def get_queue_workers():
+    """Queued conversions run at the same time."""
+    return settings.get_int('Performance', 'queue_workers', 1)
+
+def set_queue_workers(workers):
+    settings.set('Performance', 'queue_workers', workers)
+
+def get_txt_backend():
+    """TXT extraction engine: "pdfminer" (faithful layout) or "pymupdf" (fast)."""
+    backend = settings.get('General', 'txt_backend', 'pdfminer')
+    return backend if backend in ("pdfminer", "pymupdf") else 'pdfminer'
+
+def set_txt_backend(backend):
+    settings.set('General', 'txt_backend', backend)
+
+def get_text_cache_mb():
+    """Memory budget for extracted page text kept during a session."""
+    return settings.get_int('Cache', 'text_memory_mb', 128)
+
+def get_text_cache_disk():
+    """Whether fully extracted documents are also kept on disk, compressed."""
+    return settings.get_bool('Cache', 'text_disk', False)
+
+def set_text_cache_disk(enabled):
+    settings.set('Cache', 'text_disk', enabled)
+
+def get_raster_sizes():
+    """Page image sizes as "name=VALUE" pairs, VALUE a resolution ("150dpi") or a width in pixels."""
+    return settings.get('Raster', 'sizes', 'full=150dpi,preview=800,thumb=160')
+
+def get_raster_format():
+    image_format = settings.get('Raster', 'format', 'png')
+    return image_format if image_format in ("png", "jpeg") else 'png'
+
+def set_raster(sizes, image_format):
+    settings.set('Raster', 'sizes', sizes)
+    settings.set('Raster', 'format', image_format)
+
+def get_jpeg_quality():
+    return settings.get_int('Raster', 'jpeg_quality', 85)
+
+def get_strip_pages():
+    """Pages shown in the thumbnail strip written with page images, 0 for none."""
+    return settings.get_int('Raster', 'strip_pages', 10)
+
+def get_service_port():
+    return settings.get_int('Service', 'port', 8765)
+
+def get_service_workers():
+    """Conversions the local service runs at the same time, 0 means one per CPU."""
+    return settings.get_int('Service', 'workers', 0) or os.cpu_count() or 1
+
+def get_service_max_queue():
+    """Requests the service keeps waiting for a worker before turning new ones away."""
+    return settings.get_int('Service', 'max_queue', 16)
+
+def get_service_max_upload_mb():
+    return settings.get_int('Service', 'max_upload_mb', 512)
+
+def get_watch_formats():
+    """Formats the watch folder converts every PDF to, comma separated."""
+    return settings.get('Watch', 'formats', 'txt')
+
+def get_watch_workers():
+    """Conversions the watch folder runs at the same time, 0 means one per CPU."""
+    return settings.get_int('Watch', 'workers', 0) or os.cpu_count() or 1
+
+def get_watch_settle_seconds():
+    """Seconds a file must stay unchanged before it is converted."""
+    return settings.get_int('Watch', 'settle_seconds', 2)
+
+def get_watch_poll_interval():
+    return settings.get_int('Watch', 'poll_interval', 1)
@@ -1,32 +1,589 @@
 import os
-from pdfminer.high_level import extract_text
-from pdf2docx import Converter
-import fitz # PyMuPDF
+import html
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from . import config
+from .documents import documents
+from . import engine
+from .cache import fast_fingerprint
+from .metrics import ConversionMetrics, profiling, tracing_enabled, write_trace
+from .text_cache import get_text_cache
+from .images import MANIFEST_NAME, scan_images, write_image, extract_images
+from . import raster
+
+HTML_HEADER = "<html><body>"
+HTML_FOOTER = "</body></html>"
+HTML_BUFFER_SIZE = 1024 * 1024
+XHTML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml"><body>'
+
+# Formats the single-pass exporter can write:
+# format -> (get_text variant, header, footer, page separator)
+MULTI_FORMATS = {
+    "txt": ("text", "", "\f", "\f"),
+    "html": ("html", HTML_HEADER, HTML_FOOTER, ""),
+    "xhtml": ("xhtml", XHTML_HEADER, HTML_FOOTER, ""),
+    "json": ("json", "[", "]", ","),
+}
+
+# TXT backends: name -> (page extractor, text written after each page).
+# pdfminer's page text already ends with a form feed.
+TXT_BACKENDS = {
+    "pdfminer": ("txt", ""),
+    "pymupdf": ("text", "\f"),
+}
+
+# Every format convert_formats can write
+FORMATS = ("txt", "html", "xhtml", "json", "docx", "images", "pages")
+
+# Options that change the produced files; anything else (e.g. worker counts)
+# only affects speed and is left out of the cache key.
+CACHE_OPTIONS = {
+    "txt": ("txt_backend",),
+    "html": ("pages_per_file",),
+    "docx": ("page_ranges",),
+    "images": (),
+    "pages": ("raster_sizes", "raster_format"),
+}
+
+log = logging.getLogger(__name__)
+
+# Below this many distinct images the process pool costs more than it saves
+MIN_PARALLEL_IMAGES = 64
+# Rendering is slow enough that the pool pays off much earlier than for text
+MIN_PARALLEL_RASTER_PAGES = 8
+
+class ConversionCancelled(Exception):
+    """Raised from inside a conversion once its cancel event is set."""
 
 class ConverterLogic:
-    def __init__(self):
-        pass
+    def __init__(self, workers=None, chunk_size=None, cache=None):
+        # Worker processes used for page-parallel TXT/HTML extraction
+        self.workers = workers or config.get_worker_count() or engine.default_workers()
+        self.chunk_size = chunk_size or config.get_chunk_size()
+        self.cache = cache
+        self.last_from_cache = False
+        self.metrics = ConversionMetrics()
+        # threading.Event checked after every page; set it to stop the conversion
+        self.cancel_event = None
+        # SearchIndex fed with the page text of TXT conversions, if set
+        self.search_index = None
+        # Page text shared with the preview, so text isn't extracted twice
+        self.text_cache = get_text_cache()
+
+    def new_metrics(self, name="", on_update=None):
+        """Starts a fresh metrics record for the next conversion and returns it."""
+        self.metrics = ConversionMetrics(name, on_update)
+        return self.metrics
+
+    def _page_done(self, current, total, progress_callback):
+        self.metrics.page_done(current, total)
+        if progress_callback:
+            progress_callback(current, total)
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+
+    def _finish(self, outputs):
+        for path in outputs:
+            self.metrics.add_bytes(os.path.getsize(path))
+        if tracing_enabled():
+            write_trace(self.metrics)
+
+    def _indexer(self, pdf_path, total):
+        if self.search_index is None:
+            return None
+        from .search_index import DocumentIndexer
+        return DocumentIndexer(self.search_index, pdf_path, total)
+
+    def get_page_count(self, pdf_path):
+        with self.metrics.stage("open"):
+            # Reuses the viewer's parsed document when the file is open there
+            with documents.shared(pdf_path) as doc:
+                return doc.page_count
+
+    def iter_pages(self, pdf_path, mode, total, start=0, **kwargs):
+        pages = engine.iter_pages(pdf_path, mode, total, self.workers, self.chunk_size, start, **kwargs)
+        return self.metrics.timed("extract", pages)
+
+    def convert(self, fmt, pdf_path, output_path, progress_callback=None, **options):
+        """Converts pdf_path to the given format ("txt", "html", "docx", "images" or "pages").
+
+        Returns the list of files written. When a cache is attached, unchanged
+        documents are served from it instead of being converted again.
+        """
+        if fmt not in CACHE_OPTIONS:
+            raise ValueError(f"Unsupported format: {fmt}")
+
+        self.last_from_cache = False
+        if fmt == "txt":
+            options['txt_backend'] = options.get('txt_backend') or config.get_txt_backend()
+        key = None
+        if self.cache:
+            key_options = {k: options.get(k) or None for k in CACHE_OPTIONS[fmt]}
+            key = self.cache.make_key(pdf_path, fmt, key_options, os.path.basename(output_path))
+            # Images and page images go into a folder of their own, which may not exist yet
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            outputs = self.cache_fetch(key, os.path.dirname(output_path) or ".")
+            if outputs:
+                self.last_from_cache = True
+                return outputs
+
+        with profiling(f"{os.path.basename(pdf_path)}-{fmt}"):
+            job = self.make_job(fmt, pdf_path, output_path, options)
+            if job:
+                outputs = job.run(progress_callback)
+            elif fmt == "txt":
+                self.convert_to_txt(pdf_path, output_path, progress_callback, options['txt_backend'])
+                outputs = [output_path]
+            elif fmt == "images":
+                outputs = self.convert_to_images(pdf_path, output_path, progress_callback)
+            elif fmt == "pages":
+                outputs = self.convert_to_page_images(pdf_path, output_path, progress_callback,
+                                                      options.get('raster_sizes'), options.get('raster_format'))
+            elif fmt == "html":
+                outputs = self.convert_to_html(pdf_path, output_path, progress_callback,
+                                               pages_per_file=options.get('pages_per_file', 0))
+            else:
+                self.convert_to_docx(pdf_path, output_path, progress_callback,
+                                     workers=options.get('docx_workers', 1),
+                                     page_ranges=options.get('page_ranges') or None)
+                outputs = [output_path]
+
+        if key:
+            with self.metrics.stage("cache"):
+                self.cache_store(key, outputs)
+        self._finish(outputs)
+        return outputs
+
+    def cache_fetch(self, key, output_dir):
+        """Like ConversionCache.fetch, but a cache that can't be read is a miss."""
+        try:
+            return self.cache.fetch(key, output_dir)
+        except OSError as e:
+            log.warning("Conversion cache lookup failed, converting instead: %s", e)
+            return None
+
+    def cache_store(self, key, outputs):
+        # The outputs are already written; a full or read-only cache only loses the entry
+        try:
+            self.cache.store(key, outputs)
+        except OSError as e:
+            log.warning("Could not store the conversion in the cache: %s", e)
+
+    def make_job(self, fmt, pdf_path, output_path, options):
+        """Returns a checkpointed ConversionJob for large documents, else None.
+
+        Split HTML keeps its own exporter; everything else at or above the
+        configured page count runs as a resumable job. So does DOCX with
+        several workers from a lower page count, which converts page ranges
+        in parallel processes and merges the partial documents.
+        """
+        if fmt in ("images", "pages") or (fmt == "html" and options.get('pages_per_file')):
+            return None
+        page_count = self.get_page_count(pdf_path)
+        sharded = (fmt == "docx" and options.get('docx_workers', 1) > 1
+                   and page_count >= config.get_docx_shard_min_pages())
+        if page_count < config.get_job_min_pages() and not sharded:
+            return None
+        # jobs builds on this module, so it can only be imported here
+        from .jobs import ConversionJob
+        pages = None
+        if fmt == "docx" and options.get('page_ranges'):
+            pages = parse_page_ranges(options['page_ranges'], page_count)
+        return ConversionJob(self, fmt, pdf_path, output_path, page_count, pages,
+                             workers=options.get('docx_workers', 1) if fmt == "docx" else 1,
+                             txt_backend=options.get('txt_backend'))
+
+    def convert_formats(self, pdf_path, output_paths, progress_callback=None, **options):
+        """Converts to every format in output_paths (format -> path).
+
+        Text formats selected together are written in a single pass by
+        convert_multi; the others go through convert(). Returns the files written.
+        """
+        single_pass, separate = split_single_pass(list(output_paths), options)
+        written = []
+        from_cache = True
+        if single_pass:
+            written += self.convert_multi(pdf_path, {fmt: output_paths[fmt] for fmt in single_pass},
+                                          progress_callback)
+            from_cache = self.last_from_cache
+        for fmt in separate:
+            written += self.convert(fmt, pdf_path, output_paths[fmt], progress_callback, **options)
+            from_cache = from_cache and self.last_from_cache
+        self.last_from_cache = from_cache
+        return written
+
+    def convert_multi(self, pdf_path, outputs, progress_callback=None):
+        """Writes several text formats from a single pass over the document.
+
+        outputs maps a format from MULTI_FORMATS to its output path. Every page
+        is extracted once and fed to all outputs, so two formats take about as
+        long as one. TXT is produced by PyMuPDF here, not pdfminer.
+        Returns the files written.
+        """
+        todo = dict(outputs)
+        written = []
+        keys = {}
+        if self.cache:
+            for fmt, path in outputs.items():
+                # Multi-pass output differs from the single-format exporters
+                keys[fmt] = self.cache.make_key(pdf_path, f"multi-{fmt}", {}, os.path.basename(path))
+                cached = self.cache_fetch(keys[fmt], os.path.dirname(path) or ".")
+                if cached:
+                    written.extend(cached)
+                    del todo[fmt]
+        self.last_from_cache = not todo
+        if not todo:
+            return written
 
-    def convert_to_txt(self, pdf_path, output_path):
-        text = extract_text(pdf_path)
+        with profiling(f"{os.path.basename(pdf_path)}-multi"):
+            total = self.get_page_count(pdf_path)
+            variants = tuple(MULTI_FORMATS[fmt][0] for fmt in todo)
+            sinks = {}
+            try:
+                for fmt, path in todo.items():
+                    sinks[fmt] = open(path, 'w', encoding='utf-8', buffering=HTML_BUFFER_SIZE)
+                    sinks[fmt].write(MULTI_FORMATS[fmt][1])
+
+                indexer = self._indexer(pdf_path, total) if "text" in variants else None
+                fingerprint = fast_fingerprint(pdf_path) if "text" in variants else None
+                pages = self.iter_pages(pdf_path, "variants", total, variants=variants)
+                for i, page in enumerate(pages):
+                    with self.metrics.stage("write"):
+                        for fmt, f in sinks.items():
+                            variant, _, _, separator = MULTI_FORMATS[fmt]
+                            if i:
+                                f.write(separator)
+                            f.write(page[variant])
+                    if indexer:
+                        indexer.add(i, page["text"])
+                    if fingerprint:
+                        # Same text the PyMuPDF backend extracts, flags only add images
+                        self.text_cache.put(fingerprint, "pymupdf", i, page["text"], total)
+                    self._page_done(i + 1, total, progress_callback)
+                if indexer:
+                    indexer.flush()
+
+                for fmt, f in sinks.items():
+                    f.write(MULTI_FORMATS[fmt][2])
+            finally:
+                for f in sinks.values():
+                    f.close()
+
+        for fmt, path in todo.items():
+            if self.cache:
+                with self.metrics.stage("cache"):
+                    self.cache_store(keys[fmt], [path])
+            written.append(path)
+        self._finish(list(todo.values()))
+        return written
+
+    def iter_text_pages(self, pdf_path, backend, total, start=0):
+        """Yields the text of every page from start on with the given TXT backend.
+
+        Pages found in the text cache are used as they are; runs of missing
+        pages are extracted and added to the cache.
+        """
+        cache = self.text_cache
+        fingerprint = fast_fingerprint(pdf_path) if cache else None
+        mode = TXT_BACKENDS[backend][0]
+        page = start
+        while page < total:
+            text = cache.get(fingerprint, backend, page, total) if cache else None
+            if text is not None:
+                yield text
+                page += 1
+                continue
+            end = page + 1
+            while cache and end < total and cache.get(fingerprint, backend, end, total) is None:
+                end += 1
+            for i, text in enumerate(self.iter_pages(pdf_path, mode, end, start=page), start=page):
+                if cache:
+                    cache.put(fingerprint, backend, i, text, total)
+                yield text
+            page = end
+
+    def convert_to_txt(self, pdf_path, output_path, progress_callback=None, backend=None):
+        # Stream page by page so memory stays bounded and text shows up on
+        # disk while the conversion is still running.
+        backend = backend or config.get_txt_backend()
+        terminator = TXT_BACKENDS[backend][1]
+        total = self.get_page_count(pdf_path)
+        indexer = self._indexer(pdf_path, total)
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(text)
-
-    def convert_to_html(self, pdf_path, output_path):
-        # Using PyMuPDF to export to HTML
-        doc = fitz.open(pdf_path)
-        
-        # Simple HTML structure
-        html_content = "<html><body>"
-        for page in doc:
-            html_content += page.get_text("html")
-        html_content += "</body></html>"
-        
+            for i, text in enumerate(self.iter_text_pages(pdf_path, backend, total)):
+                with self.metrics.stage("write"):
+                    f.write(text)
+                    f.write(terminator)
+                    f.flush()
+                if indexer:
+                    indexer.add(i, text)
+                self._page_done(i + 1, total, progress_callback)
+        if indexer:
+            indexer.flush()
+
+    def convert_to_html(self, pdf_path, output_path, progress_callback=None, pages_per_file=0):
+        # Pages are written straight to a buffered file as they are extracted.
+        # With pages_per_file set, the document is split into several parts and
+        # output_path becomes an index page linking to them. Returns the files written.
+        total = self.get_page_count(pdf_path)
+        split = bool(pages_per_file) and pages_per_file < total
+        base, ext = os.path.splitext(output_path)
+        parts = []
+        f = None
+        try:
+            for i, fragment in enumerate(self.iter_pages(pdf_path, "html", total)):
+                with self.metrics.stage("write"):
+                    if f is None:
+                        if split:
+                            part_path = f"{base}_part{len(parts) + 1:03d}{ext}"
+                            last = min(i + pages_per_file, total)
+                            parts.append((os.path.basename(part_path), i + 1, last))
+                        else:
+                            part_path, last = output_path, total
+                        f = open(part_path, 'w', encoding='utf-8', buffering=HTML_BUFFER_SIZE)
+                        f.write(HTML_HEADER)
+                    f.write(fragment)
+                    if i + 1 == last:
+                        f.write(HTML_FOOTER)
+                        f.close()
+                        f = None
+                self._page_done(i + 1, total, progress_callback)
+        finally:
+            if f is not None:
+                f.close()
+
+        if not split:
+            return [output_path]
+
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        doc.close()
+            f.write(HTML_HEADER)
+            f.write("<ul>\n")
+            for name, first, last in parts:
+                f.write(f'<li><a href="{html.escape(name)}">Pages {first} - {last}</a></li>\n')
+            f.write("</ul>\n")
+            f.write(HTML_FOOTER)
+        return [output_path] + [os.path.join(os.path.dirname(output_path), name) for name, _, _ in parts]
+
+    def convert_to_docx(self, pdf_path, output_path, progress_callback=None, workers=1, page_ranges=None):
+        if workers > 1:
+            # pdf2docx's own multi_processing keeps pages-N.json files in the
+            # working directory, which every conversion in the process shares.
+            # Convert one page range per worker and merge them instead.
+            from .jobs import ConversionJob
+            total = self.get_page_count(pdf_path)
+            pages = parse_page_ranges(page_ranges, total) if page_ranges else None
+            count = len(pages) if pages is not None else total
+            ConversionJob(self, "docx", pdf_path, output_path, total, pages,
+                          chunk_pages=max(1, -(-count // workers)), workers=workers).run(progress_callback)
+            return
+
+        # pdf2docx is the slowest backend to import, so only load it for DOCX
+        from pdf2docx.converter import ConversionException
+
+        with self.metrics.stage("open"):
+            cv = documents.open_converter(pdf_path)
+        try:
+            pages = parse_page_ranges(page_ranges, len(cv.fitz_doc)) if page_ranges else None
+            settings = cv.default_settings
+
+            # Run pdf2docx's steps ourselves so progress can be reported per page
+            with self.metrics.stage("analyze"):
+                cv.load_pages(pages=pages).parse_document(**settings)
+            todo = [page for page in cv.pages if not page.skip_parsing]
+            for i, page in enumerate(todo):
+                try:
+                    with self.metrics.stage("layout"):
+                        page.parse(**settings)
+                except Exception as e:
+                    if not settings['ignore_page_error']:
+                        raise ConversionException(f'Error when parsing page {page.id + 1}: {e}')
+                self._page_done(i + 1, len(todo), progress_callback)
+            with self.metrics.stage("write"):
+                cv.make_docx(output_path, **settings)
+        finally:
+            documents.close(cv)
+
+    def convert_to_images(self, pdf_path, output_path, progress_callback=None):
+        """Writes every distinct embedded image next to output_path, which becomes the manifest.
+
+        The manifest lists each image with the pages it is used on, and each
+        page with its images. Returns the files written, manifest first.
+        """
+        output_dir = os.path.dirname(output_path) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        total = self.get_page_count(pdf_path)
+        with self.metrics.stage("scan"):
+            with documents.opened(pdf_path) as doc:
+                found = scan_images(doc)
+        # Each image is written once, with the page it first appears on
+        by_page = {}
+        for xref, pages in found.items():
+            by_page.setdefault(pages[0], []).append(xref)
+
+        entries = {}
+        if self.workers <= 1 or len(found) < MIN_PARALLEL_IMAGES:
+            with documents.opened(pdf_path) as doc:
+                for page_num in range(total):
+                    with self.metrics.stage("extract"):
+                        for xref in by_page.get(page_num, ()):
+                            entry = write_image(doc, xref, page_num, output_dir)
+                            if entry:
+                                entries[xref] = entry
+                    self._page_done(page_num + 1, total, progress_callback)
+        else:
+            tasks = []
+            for start, end in self._page_chunks(total):
+                items = [(xref, p) for p in range(start, end) for xref in by_page.get(p, ())]
+                tasks.append((end - start, extract_images if items else None, (pdf_path, items, output_dir)))
+            for chunk_entries in self._run_page_tasks(tasks, total, "extract", progress_callback):
+                entries.update(chunk_entries)
+
+        images = []
+        page_images = {}
+        for xref, pages in sorted(found.items(), key=lambda item: (item[1][0], item[0])):
+            entry = entries.get(xref)
+            if entry is None:
+                continue
+            entry["pages"] = [p + 1 for p in pages]
+            images.append(entry)
+            for page_num in pages:
+                page_images.setdefault(page_num, []).append(entry["file"])
+        manifest = {
+            "source": os.path.basename(pdf_path),
+            "page_count": total,
+            "images": images,
+            "pages": [{"page": p + 1, "images": page_images[p]} for p in sorted(page_images)],
+        }
+        with self.metrics.stage("write"):
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=1)
+        return [output_path] + [os.path.join(output_dir, entry["file"]) for entry in images]
+
+    def convert_to_page_images(self, pdf_path, output_path, progress_callback=None,
+                               sizes=None, image_format=None):
+        """Renders every page in each size next to output_path, which becomes the manifest.
+
+        sizes is a string as for raster.parse_sizes, image_format "png" or
+        "jpeg"; both default to the settings. A thumbnail strip of the first
+        pages, in the last size, is written too. Returns the files written,
+        manifest first.
+        """
+        parsed = raster.parse_sizes(sizes or config.get_raster_sizes())
+        image_format = image_format or config.get_raster_format()
+        quality = config.get_jpeg_quality()
+        output_dir = os.path.dirname(output_path) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        total = self.get_page_count(pdf_path)
+
+        if self.workers <= 1 or total < MIN_PARALLEL_RASTER_PAGES:
+            pages = []
+            with documents.opened(pdf_path) as doc:
+                for page_num in range(total):
+                    with self.metrics.stage("render"):
+                        pages.append(raster.render_variants(doc.load_page(page_num), parsed,
+                                                            image_format, output_dir, quality))
+                    self._page_done(page_num + 1, total, progress_callback)
+        else:
+            # Smaller chunks than for text, so every worker gets a share of short documents
+            step = max(1, min(self.chunk_size, total // (self.workers * 4)))
+            tasks = []
+            for start in range(0, total, step):
+                chunk_pages = list(range(start, min(start + step, total)))
+                tasks.append((len(chunk_pages), raster.rasterize_pages,
+                              (pdf_path, chunk_pages, parsed, image_format, output_dir, quality)))
+            results = self._run_page_tasks(tasks, total, "render", progress_callback)
+            pages = sorted((entry for chunk_entries in results for entry in chunk_entries),
+                           key=lambda entry: entry["page"])
+
+        with self.metrics.stage("write"):
+            return raster.finish_document(pdf_path, output_path, total, pages, parsed, image_format,
+                                          quality, config.get_strip_pages())
+
+    def _page_chunks(self, total):
+        return [(start, min(start + self.chunk_size, total)) for start in range(0, total, self.chunk_size)]
+
+    def _run_page_tasks(self, tasks, total, stage, progress_callback):
+        """Runs (pages, func, args) tasks in a process pool; returns their results.
+
+        At most two tasks per worker are in flight. Progress moves on by a
+        task's pages when it finishes, which is also when a cancel is
+        noticed. A task without func has nothing to do and only counts its pages.
+        """
+        tasks = iter(tasks)
+        results = []
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
+            def submit():
+                nonlocal done
+                for pages, func, args in tasks:
+                    if func:
+                        pending[pool.submit(func, *args)] = pages
+                        return
+                    done += pages
+            try:
+                for _ in range(self.workers * 2):
+                    submit()
+                while pending:
+                    with self.metrics.stage(stage):
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done += pending.pop(future)
+                        results.append(future.result())
+                        submit()
+                    self._page_done(min(done, total), total, progress_callback)
+            finally:
+                for future in pending:
+                    future.cancel()
+        self._page_done(total, total, progress_callback)
+        return results
+
+def output_path_for(pdf_path, fmt, output_dir=None):
+    """Returns the output file for converting pdf_path to fmt.
+
+    Images and page images go into a folder of their own, named after the
+    document, with the manifest as the output file.
+    """
+    name_no_ext = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_dir = output_dir or os.path.dirname(pdf_path)
+    if fmt == "images":
+        return os.path.join(output_dir, f"{name_no_ext}_images", MANIFEST_NAME)
+    if fmt == "pages":
+        return os.path.join(output_dir, f"{name_no_ext}_pages", MANIFEST_NAME)
+    return os.path.join(output_dir, f"{name_no_ext}.{fmt}")
+
+def split_single_pass(formats, options):
+    """Splits formats into those written together by convert_multi and the rest."""
+    # The single pass writes PyMuPDF text, so pdfminer TXT is produced on its own
+    pdfminer_txt = (options.get('txt_backend') or config.get_txt_backend()) == "pdfminer"
+    single_pass = [fmt for fmt in formats if fmt in MULTI_FORMATS
+                   and not (fmt == "html" and options.get('pages_per_file'))
+                   and not (fmt == "txt" and pdfminer_txt)]
+    if len(single_pass) < 2:
+        # A lone TXT/HTML keeps its dedicated exporter; JSON/XHTML only exist here
+        single_pass = [fmt for fmt in single_pass if fmt not in CACHE_OPTIONS]
+    separate = [fmt for fmt in formats if fmt not in single_pass]
+    return single_pass, separate
 
-    def convert_to_docx(self, pdf_path, output_path):
-        cv = Converter(pdf_path)
-        cv.convert(output_path, start=0, end=None)
-        cv.close()
+def parse_page_ranges(text, page_count):
+    """Parses a range string such as "1-50,120-140" into sorted 0-based page indexes."""
+    pages = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if sep else first
+        except ValueError:
+            raise ValueError(f"Invalid page range: {part}")
+        if first < 1 or last < first or last > page_count:
+            raise ValueError(f"Page range out of bounds: {part}")
+        pages.update(range(first - 1, last))
+    if not pages:
+        raise ValueError(f"Invalid page range: {text}")
+    return sorted(pages)
@@ -0,0 +1,182 @@
+"""Shared, memory-mapped access to PDF files.
+
+Every PDF is mapped into memory once per process and PyMuPDF documents are
+opened from that buffer instead of from the path, so the viewer, the
+preview thread, the renderers and a conversion don't each read the file
+again. Worker processes map the same file, which makes them share the
+pages the OS already cached rather than fetching them again, which is
+what makes a difference on network shares.
+
+While a file is open somewhere (e.g. in the viewer), quick lookups such as
+the page count go through one parsed document kept for the mapping
+instead of parsing the file again.
+
+A mapping is unmapped as soon as the last document, converter or lookup
+using it is closed, since a mapped file can't be moved or overwritten on
+Windows.
+"""
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from .backends import fitz
+
+class _Mapping:
+    def __init__(self, path, stamp):
+        self.stamp = stamp
+        with open(path, 'rb') as f:
+            # The map keeps its own handle, the file can be closed right away
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mmap)
+        self.refs = 0
+        self.shared = None
+        self.shared_lock = threading.Lock()
+
+    def close(self):
+        try:
+            self.view.release()
+            self.mmap.close()
+        except BufferError:
+            pass # Something still reads from the buffer; it is freed along with it
+
+class DocumentManager:
+    def __init__(self):
+        self._mappings = {} # path -> current _Mapping
+        self._owners = {}   # id(document) -> _Mapping it was opened from
+        self._lock = threading.Lock()
+
+    def _key(self, pdf_path):
+        return os.path.normcase(os.path.abspath(pdf_path))
+
+    def _stamp(self, key):
+        st = os.stat(key)
+        return st.st_size, st.st_mtime_ns
+
+    def _acquire(self, pdf_path):
+        key = self._key(pdf_path)
+        stamp = self._stamp(key)
+        with self._lock:
+            mapping = self._mappings.get(key)
+            if mapping is None or mapping.stamp != stamp:
+                # A changed file gets a new map; holders of the old one keep it
+                mapping = _Mapping(key, stamp)
+                self._mappings[key] = mapping
+            mapping.refs += 1
+            return mapping
+
+    def _release(self, pdf_path, mapping):
+        with self._lock:
+            mapping.refs -= 1
+            if mapping.refs > 0:
+                return
+            key = self._key(pdf_path)
+            if self._mappings.get(key) is mapping:
+                del self._mappings[key]
+            shared, mapping.shared = mapping.shared, None
+        if shared is not None:
+            shared.close()
+        mapping.close()
+
+    def open(self, pdf_path):
+        """Opens a PyMuPDF document from the shared mapping; close it with close()."""
+        try:
+            mapping = self._acquire(pdf_path)
+        except (OSError, ValueError):
+            # Empty or unmappable file; opening by path reports the real problem
+            return fitz.open(pdf_path)
+        try:
+            doc = fitz.open(stream=mapping.view, filetype="pdf")
+        except TypeError:
+            # PyMuPDF too old to read from a memoryview
+            self._release(pdf_path, mapping)
+            return fitz.open(pdf_path)
+        except Exception:
+            self._release(pdf_path, mapping)
+            raise
+        with self._lock:
+            self._owners[id(doc)] = (pdf_path, mapping)
+        return doc
+
+    def close(self, doc):
+        """Closes a document from open() or a converter from open_converter()."""
+        with self._lock:
+            owner = self._owners.pop(id(doc), None)
+        doc.close()
+        if owner:
+            self._release(*owner)
+
+    @contextmanager
+    def opened(self, pdf_path):
+        doc = self.open(pdf_path)
+        try:
+            yield doc
+        finally:
+            self.close(doc)
+
+    @contextmanager
+    def shared(self, pdf_path):
+        """Yields a parsed document for short lookups, reused while the file is open elsewhere.
+
+        Callers must not keep the document or its pages after the block.
+        """
+        key = self._key(pdf_path)
+        try:
+            stamp = self._stamp(key)
+        except OSError:
+            stamp = None # Opening by path below reports the problem
+        with self._lock:
+            mapping = self._mappings.get(key)
+            if mapping is not None and mapping.stamp == stamp:
+                mapping.refs += 1
+            else:
+                mapping = None
+        if mapping is None:
+            # Nobody has this version of the file open, so there is nothing to share
+            with self.opened(pdf_path) as doc:
+                yield doc
+            return
+        try:
+            with mapping.shared_lock:
+                if mapping.shared is None:
+                    mapping.shared = fitz.open(stream=mapping.view, filetype="pdf")
+                yield mapping.shared
+        finally:
+            self._release(pdf_path, mapping)
+
+    def open_stream(self, pdf_path):
+        """Returns a read-only file object over the mapped file, e.g. for pdfminer.
+
+        Each call gets its own file position; close it when done.
+        """
+        with open(pdf_path, 'rb') as f:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be mapped
+                return open(pdf_path, 'rb')
+
+    def open_converter(self, pdf_path):
+        """Returns a pdf2docx Converter reading from the mapping; close it with close().
+
+        The path is still passed, since pdf2docx's own worker processes open
+        the file by name.
+        """
+        from pdf2docx import Converter
+        try:
+            mapping = self._acquire(pdf_path)
+        except (OSError, ValueError):
+            return Converter(pdf_path)
+        try:
+            cv = Converter(pdf_path, stream=mapping.view)
+        except TypeError:
+            # PyMuPDF or pdf2docx without memory stream support
+            self._release(pdf_path, mapping)
+            return Converter(pdf_path)
+        except Exception:
+            self._release(pdf_path, mapping)
+            raise
+        with self._lock:
+            self._owners[id(cv)] = (pdf_path, mapping)
+        return cv
+
+documents = DocumentManager()
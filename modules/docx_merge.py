@@ -0,0 +1,75 @@
+"""Joins DOCX files written for consecutive page ranges into one document.
+
+Sharded DOCX conversions produce one partial document per range. Merging
+appends the body of each to the first, behind a section break, so every
+page keeps its own size and margins. Relationships are recreated in the
+merged document: images are added to its package (identical images are
+stored once) and hyperlinks get new ids. Styles the first part lacks are
+copied over. Only one partial document is loaded at a time.
+"""
+import copy
+import io
+
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+DOCPR_TAG = "{http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing}docPr"
+
+def _copy_styles(target, source):
+    styles = target.styles.element
+    known = {style.style_id for style in target.styles}
+    for style in source.styles:
+        if style.style_id not in known:
+            styles.append(copy.deepcopy(style.element))
+            known.add(style.style_id)
+
+def _remap_relationships(element, target_part, source_part, rid_map):
+    """Points r:id/r:embed/r:link attributes in element at relationships of target_part."""
+    for node in element.iter():
+        for attr, rid in node.attrib.items():
+            if not attr.startswith("{%s}" % R_NS):
+                continue
+            if rid not in rid_map:
+                rel = source_part.rels.get(rid)
+                if rel is None:
+                    continue
+                if rel.is_external:
+                    rid_map[rid] = target_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+                elif rel.reltype.endswith("/image"):
+                    rid_map[rid], _ = target_part.get_or_add_image(io.BytesIO(rel.target_part.blob))
+                else:
+                    # pdf2docx writes nothing else; keep the part rather than a dangling id
+                    rid_map[rid] = target_part.relate_to(rel.target_part, rel.reltype)
+            node.set(attr, rid_map[rid])
+
+def append_document(target, source):
+    """Appends the body of source to target, starting on a new page."""
+    from docx.enum.section import WD_SECTION
+
+    # Close the target's last section; its page setup moves into a section break
+    target.add_section(WD_SECTION.NEW_PAGE)
+    body = target.element.body
+    source_body = source.element.body
+    rid_map = {}
+    next_id = target.part.next_id
+    for child in source_body.iterchildren():
+        if child is source_body.sectPr:
+            continue
+        child = copy.deepcopy(child)
+        _remap_relationships(child, target.part, source.part, rid_map)
+        # Drawing ids must stay unique across the merged document
+        for doc_pr in child.iter(DOCPR_TAG):
+            doc_pr.set("id", str(next_id))
+            next_id += 1
+        body.sectPr.addprevious(child)
+    # The source's last section becomes the last section of the merged document
+    if source_body.sectPr is not None:
+        body.replace(body.sectPr, copy.deepcopy(source_body.sectPr))
+    _copy_styles(target, source)
+
+def merge_docx(paths, output_path):
+    """Writes the documents in paths, in order, to output_path as one document."""
+    from docx import Document
+
+    merged = Document(paths[0])
+    for path in paths[1:]:
+        append_document(merged, Document(path))
+    merged.save(output_path)
@@ -0,0 +1,113 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .backends import fitz
+from .documents import documents
+
+# Below this many pages the process pool costs more than it saves
+MIN_PARALLEL_PAGES = 200
+DEFAULT_CHUNK_SIZE = 50
+
+def iter_txt_pages(pdf_path, start=0, end=None):
+    """Yields the pdfminer text of each page in [start, end), one page at a time."""
+    # Imported here so pdfminer is only loaded once TXT is really needed
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdfpage import PDFPage
+
+    rsrcmgr = PDFResourceManager(caching=True)
+    buf = io.StringIO()
+    device = TextConverter(rsrcmgr, buf, codec='utf-8', laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    try:
+        with documents.open_stream(pdf_path) as fp:
+            # caching=False keeps pdfminer from holding every parsed object
+            for i, page in enumerate(PDFPage.get_pages(fp, caching=False)):
+                if i < start:
+                    continue
+                if end is not None and i >= end:
+                    break
+                interpreter.process_page(page)
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+    finally:
+        device.close()
+
+def iter_text_pages(pdf_path, start=0, end=None):
+    """Yields the PyMuPDF plain text of each page in [start, end)."""
+    with documents.opened(pdf_path) as doc:
+        if end is None:
+            end = doc.page_count
+        for i in range(start, end):
+            yield doc[i].get_text()
+
+def iter_html_pages(pdf_path, start=0, end=None):
+    """Yields the PyMuPDF HTML fragment of each page in [start, end)."""
+    with documents.opened(pdf_path) as doc:
+        if end is None:
+            end = doc.page_count
+        for i in range(start, end):
+            yield doc[i].get_text("html")
+
+def iter_variant_pages(pdf_path, start=0, end=None, variants=("text",)):
+    """Yields a {variant: text} dict per page in [start, end).
+
+    The page is parsed into a single TextPage that every get_text variant
+    reuses, so asking for several variants costs little more than one.
+    """
+    with documents.opened(pdf_path) as doc:
+        if end is None:
+            end = doc.page_count
+        for i in range(start, end):
+            page = doc[i]
+            # Image-preserving flags cover text, html, xhtml and json alike
+            textpage = page.get_textpage(flags=fitz.TEXTFLAGS_HTML)
+            yield {v: page.get_text(v, textpage=textpage) for v in variants}
+
+PAGE_EXTRACTORS = {
+    "txt": iter_txt_pages,
+    "text": iter_text_pages,
+    "html": iter_html_pages,
+    "variants": iter_variant_pages,
+}
+
+def _extract_chunk(pdf_path, mode, start, end, kwargs):
+    # Runs in a worker process, which opens its own document handle
+    return list(PAGE_EXTRACTORS[mode](pdf_path, start, end, **kwargs))
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def iter_pages(pdf_path, mode, page_count, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, start=0, **kwargs):
+    """Yields extracted pages start..page_count-1 in document order.
+
+    Large documents are split into chunks of chunk_size pages and extracted
+    by a pool of worker processes; small ones are handled in this process.
+    Extra keyword arguments are passed on to the page extractor.
+    """
+    if workers <= 1 or page_count - start < MIN_PARALLEL_PAGES:
+        yield from PAGE_EXTRACTORS[mode](pdf_path, start, page_count, **kwargs)
+        return
+
+    chunks = iter([(s, min(s + chunk_size, page_count)) for s in range(start, page_count, chunk_size)])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Only keep a couple of chunks per worker in flight so memory stays
+        # bounded while results are written out in order.
+        pending = deque()
+        try:
+            for first, end in chunks:
+                pending.append(pool.submit(_extract_chunk, pdf_path, mode, first, end, kwargs))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                pages = pending.popleft().result()
+                nxt = next(chunks, None)
+                if nxt:
+                    pending.append(pool.submit(_extract_chunk, pdf_path, mode, *nxt, kwargs))
+                yield from pages
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,75 @@
+"""Export of the images embedded in a PDF.
+
+Images are found through each page's resource list, which needs no
+rendering or decoding. An image is identified by its xref, so a logo drawn
+on every page is written once and the manifest lists all the pages it
+appears on. JPEG and JPEG 2000 streams are written as they are stored in
+the PDF; other encodings come out as PNG. Images with a soft mask are
+combined with it so transparency is kept.
+"""
+import os
+from .backends import fitz
+from .documents import documents
+
+MANIFEST_NAME = "manifest.json"
+
+def scan_images(doc, start=0, end=None):
+    """Returns {xref: [page numbers]} for the images used on pages [start, end)."""
+    found = {}
+    if end is None:
+        end = doc.page_count
+    for page_num in range(start, end):
+        for image in doc.get_page_images(page_num):
+            pages = found.setdefault(image[0], [])
+            if not pages or pages[-1] != page_num:
+                pages.append(page_num)
+    return found
+
+def image_name(xref, first_page, ext):
+    return f"page{first_page + 1:04d}-img{xref}.{ext}"
+
+def _masked_png(doc, xref, smask):
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n > 3:
+        # PNG can't hold CMYK
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+    return pix.tobytes("png")
+
+def write_image(doc, xref, first_page, output_dir):
+    """Writes one image to output_dir and returns its manifest entry, or None."""
+    info = doc.extract_image(xref)
+    if not info or not info.get("image"):
+        return None # Not decodable, e.g. a broken stream
+    data, ext = info["image"], info["ext"]
+    if info.get("smask"):
+        try:
+            data, ext = _masked_png(doc, xref, info["smask"]), "png"
+        except (RuntimeError, ValueError):
+            pass # Keep the image without its mask
+    name = image_name(xref, first_page, ext)
+    with open(os.path.join(output_dir, name), 'wb') as f:
+        f.write(data)
+    return {
+        "file": name,
+        "xref": xref,
+        "width": info["width"],
+        "height": info["height"],
+        "format": ext,
+        "bytes": len(data),
+    }
+
+def extract_images(pdf_path, items, output_dir):
+    """Writes the images given as (xref, first page) pairs; returns {xref: entry}.
+
+    Opens its own document, so it also runs in worker processes.
+    """
+    entries = {}
+    with documents.opened(pdf_path) as doc:
+        for xref, first_page in items:
+            entry = write_image(doc, xref, first_page, output_dir)
+            if entry:
+                entries[xref] = entry
+    return entries
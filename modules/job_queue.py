@@ -0,0 +1,287 @@
+"""Queue of conversions run in the background.
+
+Every queued conversion runs in its own worker process, at most `workers`
+at a time. Progress comes back through a multiprocessing queue and is
+handled by one scheduler thread, which also starts the next conversion
+when a slot frees up. The queue is saved to queue.json in the app data
+directory, so pending conversions survive a restart. Ones that were
+running are queued again and large documents resume from their checkpoint.
+"""
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from . import config
+from . import engine
+from .cache import ConversionCache
+from .converter import ConverterLogic, ConversionCancelled, output_path_for
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+POLL_INTERVAL = 0.25 # Seconds between checks on the worker processes
+REAP_TIMEOUT = 1.0   # Seconds to wait for the last event of a worker that exited cleanly
+STOP_TIMEOUT = 10    # Seconds to wait for running conversions to stop on exit
+
+def get_queue_path():
+    return os.path.join(config.get_app_data_dir(), "queue.json")
+
+def _output_paths(pdf_path, formats, output_dir):
+    return {fmt: output_path_for(pdf_path, fmt, output_dir) for fmt in formats}
+
+def _page_workers(queue_workers):
+    # Conversions running side by side split the page workers between them
+    # instead of each starting a pool as large as the whole machine
+    total = config.get_worker_count() or engine.default_workers()
+    return max(1, total // max(1, queue_workers))
+
+def _run_item(item, cache_enabled, events, cancel_event, workers=1):
+    """Converts one queue item with workers page processes. Runs in its own process."""
+    item_id = item["id"]
+    logic = ConverterLogic(workers=workers, cache=ConversionCache() if cache_enabled else None)
+    logic.cancel_event = cancel_event
+    logic.new_metrics(os.path.basename(item["pdf_path"]),
+                      on_update=lambda snapshot: events.put((item_id, RUNNING, snapshot)))
+    try:
+        outputs = logic.convert_formats(item["pdf_path"],
+                                        _output_paths(item["pdf_path"], item["formats"], item["output_dir"]),
+                                        **item["options"])
+        result = logic.metrics.snapshot()
+        result.update(outputs=outputs, cached=logic.last_from_cache)
+        events.put((item_id, DONE, result))
+    except ConversionCancelled:
+        events.put((item_id, CANCELLED, {}))
+    except Exception as e:
+        events.put((item_id, FAILED, {"error": str(e)}))
+
+class ConversionQueue:
+    """Conversions waiting, running and finished, in the order they were added.
+
+    Items are plain dicts so they can be saved as JSON and sent to worker
+    processes. on_change(item), if set, is called from the scheduler thread
+    whenever an item is added, changes status or reports progress.
+    """
+
+    def __init__(self, workers=None, path=None, on_change=None):
+        self.workers = workers or config.get_queue_workers()
+        self.path = path or get_queue_path()
+        self.on_change = on_change
+        self.items = []
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._running = {} # item id -> (process, cancel event)
+        self._stopping = False
+        self._thread = None
+        self._ctx = multiprocessing.get_context()
+        self._events = self._ctx.Queue()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            items = []
+        for item in items:
+            if item["status"] == RUNNING:
+                # Interrupted by the last exit; checkpointed jobs pick up where they were
+                item["status"] = QUEUED
+        self.items = items
+        self._ids = itertools.count(max((item["id"] for item in items), default=0) + 1)
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.items, indent=1)
+        with open(self.path + ".tmp", 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(self.path + ".tmp", self.path)
+
+    def start(self):
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name="conversion-queue", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """Stops running conversions and saves them as queued for the next start."""
+        with self._lock:
+            self._stopping = True
+            running = list(self._running.items())
+            for _, (_, cancel_event) in running:
+                cancel_event.set()
+        deadline = time.monotonic() + timeout
+        for _, (process, _) in running:
+            process.join(max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            for item_id, _ in running:
+                self._update(item_id, status=QUEUED)
+            self._running.clear()
+        self.save()
+
+    def add(self, pdf_path, formats, output_dir, options=None):
+        with self._lock:
+            item = {
+                "id": next(self._ids),
+                "pdf_path": os.path.abspath(pdf_path),
+                "formats": list(formats),
+                "output_dir": output_dir or os.path.dirname(os.path.abspath(pdf_path)),
+                "options": dict(options or {}),
+                "status": QUEUED,
+                "added": time.time(),
+                "pages": 0,
+                "total_pages": 0,
+                "pages_per_s": 0.0,
+                "seconds": 0.0,
+                "outputs": [],
+                "error": "",
+            }
+            self.items.append(item)
+        self.save()
+        self._notify(item)
+        return item
+
+    def get(self, item_id):
+        with self._lock:
+            for item in self.items:
+                if item["id"] == item_id:
+                    return item
+        return None
+
+    def cancel(self, item_id):
+        with self._lock:
+            item = self.get(item_id)
+            if item is None:
+                return
+            if item_id in self._running:
+                # The worker notices within a page and reports back as cancelled
+                self._running[item_id][1].set()
+            elif item["status"] == QUEUED:
+                self._update(item_id, status=CANCELLED)
+        self.save()
+
+    def retry(self, item_id):
+        with self._lock:
+            item = self.get(item_id)
+            if item is None or item["status"] not in FINISHED:
+                return
+            self._update(item_id, status=QUEUED, error="", pages=0, pages_per_s=0.0)
+        self.save()
+
+    def remove(self, item_id):
+        with self._lock:
+            if item_id in self._running:
+                return False
+            self.items = [item for item in self.items if item["id"] != item_id]
+        self.save()
+        return True
+
+    def clear_finished(self):
+        with self._lock:
+            self.items = [item for item in self.items if item["status"] not in FINISHED]
+        self.save()
+
+    def set_workers(self, workers):
+        with self._lock:
+            self.workers = max(1, workers)
+
+    def counts(self):
+        with self._lock:
+            counts = dict.fromkeys((QUEUED, RUNNING, DONE, FAILED, CANCELLED), 0)
+            for item in self.items:
+                counts[item["status"]] += 1
+            return counts
+
+    def _notify(self, item):
+        if self.on_change:
+            self.on_change(dict(item))
+
+    def _update(self, item_id, **changes):
+        item = self.get(item_id)
+        if item is not None:
+            item.update(changes)
+            self._notify(item)
+        return item
+
+    def _loop(self):
+        while not self._stopping:
+            self._drain(POLL_INTERVAL)
+            self._reap()
+            self._dispatch()
+        self._thread = None
+
+    def _drain(self, timeout):
+        """Handles every waiting event, after waiting up to timeout for the first one."""
+        try:
+            self._handle(*self._events.get(timeout=timeout))
+            while True:
+                self._handle(*self._events.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _handle(self, item_id, status, data):
+        with self._lock:
+            if self._stopping:
+                return
+            if status == RUNNING:
+                self._update(item_id, pages=data["pages"], total_pages=data["total_pages"],
+                             pages_per_s=data["pages_per_s"], seconds=data["elapsed"])
+                return
+            changes = {"status": status}
+            if status == DONE:
+                changes.update(outputs=data["outputs"], pages=data["pages"], total_pages=data["total_pages"],
+                               pages_per_s=data["pages_per_s"], seconds=data["elapsed"])
+            elif status == FAILED:
+                changes["error"] = data["error"]
+            self._update(item_id, **changes)
+        self.save()
+
+    def _reap(self):
+        with self._lock:
+            dead = [(item_id, process) for item_id, (process, _) in self._running.items()
+                    if not process.is_alive()]
+            unreported = [process for item_id, process in dead
+                          if (self.get(item_id) or {}).get("status") == RUNNING]
+        if not dead:
+            return
+        if unreported:
+            # A worker puts its result on the queue right before it exits, so the
+            # result may still be waiting; a clean exit is worth a short wait for it
+            self._drain(REAP_TIMEOUT if any(process.exitcode == 0 for process in unreported) else 0)
+        with self._lock:
+            for item_id, process in dead:
+                process.join()
+                if self._running.pop(item_id, None) is None:
+                    continue # Already taken care of by stop()
+                item = self.get(item_id)
+                if item is not None and item["status"] == RUNNING:
+                    # Died without reporting back, e.g. out of memory
+                    self._update(item_id, status=FAILED,
+                                 error=f"Worker exited with code {process.exitcode}")
+                    self.save()
+
+    def _dispatch(self):
+        with self._lock:
+            if self._stopping:
+                return
+            for item in self.items:
+                if len(self._running) >= self.workers:
+                    break
+                if item["status"] != QUEUED:
+                    continue
+                cancel_event = self._ctx.Event()
+                process = self._ctx.Process(target=_run_item, daemon=False,
+                                            args=(dict(item), config.get_cache_enabled(),
+                                                  self._events, cancel_event, _page_workers(self.workers)))
+                process.start()
+                self._running[item["id"]] = (process, cancel_event)
+                self._update(item["id"], status=RUNNING, pages=0, error="")
+                self.save()
@@ -0,0 +1,300 @@
+"""Resumable conversion jobs for large documents.
+
+A job converts a document chunk by chunk. Each finished chunk is kept as a
+partial output in the job's folder under the app data directory, next to a
+manifest.json checkpoint. Running the same conversion again after a crash
+or a cancel picks up at the first unfinished chunk. The real output file
+is only assembled once every chunk is done.
+
+DOCX chunks are converted to partial DOCX files, in parallel worker
+processes when there are several workers, and merged in page order at the
+end. Memory then stays bounded by one chunk's layout instead of growing
+with the whole document.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from . import config
+from .cache import fast_fingerprint
+from .documents import documents
+from .docx_merge import merge_docx
+from .converter import HTML_HEADER, HTML_FOOTER, HTML_BUFFER_SIZE, TXT_BACKENDS
+
+MANIFEST_VERSION = 2
+JOB_MAX_AGE = 7 * 24 * 3600 # Unfinished jobs untouched for this long are removed
+
+# Text formats: job kind -> (page extractor, text after each page, header, footer)
+TEXT_JOBS = {
+    "txt-pdfminer": TXT_BACKENDS["pdfminer"] + ("", ""),
+    "txt-pymupdf": TXT_BACKENDS["pymupdf"] + ("", ""),
+    "html": ("html", "", HTML_HEADER, HTML_FOOTER),
+}
+
+def get_jobs_dir():
+    path = os.path.join(config.get_app_data_dir(), "jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def remove_stale_jobs(jobs_dir=None, max_age=JOB_MAX_AGE):
+    """Deletes job folders nobody has resumed for max_age seconds."""
+    jobs_dir = jobs_dir or get_jobs_dir()
+    cutoff = time.time() - max_age
+    for name in os.listdir(jobs_dir):
+        path = os.path.join(jobs_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+def _convert_docx_chunk(pdf_path, pages, docx_path, page_done=None):
+    """Converts the given pages with pdf2docx to a partial DOCX file.
+
+    Runs in this process, or in a worker process when DOCX chunks are
+    converted in parallel. page_done, if given, is called after each page.
+    """
+    from pdf2docx.converter import ConversionException
+
+    cv = documents.open_converter(pdf_path)
+    try:
+        settings = cv.default_settings
+        cv.load_pages(pages=pages).parse_document(**settings)
+        for page in cv.pages:
+            if page.skip_parsing:
+                continue
+            try:
+                page.parse(**settings)
+            except Exception as e:
+                if not settings['ignore_page_error']:
+                    raise ConversionException(f'Error when parsing page {page.id + 1}: {e}')
+            if page_done:
+                page_done()
+        with open(docx_path + ".tmp", 'wb') as f:
+            cv.make_docx(f, **settings)
+        os.replace(docx_path + ".tmp", docx_path)
+    finally:
+        documents.close(cv)
+
+class ConversionJob:
+    """One checkpointed conversion of pdf_path to output_path.
+
+    logic is the ConverterLogic running the job; its metrics, progress
+    reporting and cancel event are used as for any other conversion.
+    pages lists the 0-based pages to convert (DOCX page ranges), None for all.
+    """
+
+    def __init__(self, logic, fmt, pdf_path, output_path, page_count, pages=None,
+                 chunk_pages=None, workers=1, jobs_dir=None, txt_backend=None):
+        self.logic = logic
+        self.fmt = fmt
+        self.text_job = f"txt-{txt_backend or config.get_txt_backend()}" if fmt == "txt" else fmt
+        self.pdf_path = os.path.abspath(pdf_path)
+        self.output_path = os.path.abspath(output_path)
+        self.pages = pages if pages is not None else list(range(page_count))
+        self.page_count = page_count
+        self.chunk_pages = chunk_pages or config.get_job_chunk_pages()
+        self.workers = workers
+        self.jobs_dir = jobs_dir or get_jobs_dir()
+
+        key = json.dumps({
+            "pdf": self.pdf_path,
+            "format": self.text_job,
+            "output": self.output_path,
+            "pages": self.pages,
+            "chunk_pages": self.chunk_pages,
+        }, sort_keys=True)
+        self.job_id = hashlib.sha256(key.encode()).hexdigest()[:32]
+        self.job_dir = os.path.join(self.jobs_dir, self.job_id)
+        self.manifest = None
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.job_dir, "manifest.json")
+
+    def chunk_path(self, index):
+        ext = ".docx" if self.fmt == "docx" else ".part"
+        return os.path.join(self.job_dir, f"chunk{index:05d}{ext}")
+
+    def _new_manifest(self, fingerprint):
+        chunks = [[s, min(s + self.chunk_pages, len(self.pages))]
+                  for s in range(0, len(self.pages), self.chunk_pages)]
+        return {
+            "version": MANIFEST_VERSION,
+            "pdf": self.pdf_path,
+            "fingerprint": fingerprint,
+            "format": self.fmt,
+            "output": self.output_path,
+            "pages": self.pages,
+            "chunks": chunks,
+            "done": [False] * len(chunks),
+        }
+
+    def load(self):
+        """Reads the checkpoint, starting over if the PDF changed since."""
+        fingerprint = fast_fingerprint(self.pdf_path)
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if (manifest is None or manifest.get("version") != MANIFEST_VERSION
+                or manifest.get("fingerprint") != fingerprint):
+            shutil.rmtree(self.job_dir, ignore_errors=True)
+            manifest = self._new_manifest(fingerprint)
+        # Chunk files are renamed into place when complete, so one that exists
+        # is finished even if the run stopped before the manifest was updated
+        manifest["done"] = [done or os.path.exists(self.chunk_path(i))
+                            for i, done in enumerate(manifest["done"])]
+        os.makedirs(self.job_dir, exist_ok=True)
+        self.manifest = manifest
+        self.save()
+        return manifest
+
+    def save(self):
+        self.manifest["updated"] = time.time()
+        with open(self.manifest_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    def _mark_done(self, index):
+        self.manifest["done"][index] = True
+        self.save()
+
+    def pages_done(self):
+        return sum(end - start for (start, end), done
+                   in zip(self.manifest["chunks"], self.manifest["done"]) if done)
+
+    def run(self, progress_callback=None):
+        """Converts the remaining chunks, assembles the output and returns [output_path].
+
+        Raises ConversionCancelled when the logic's cancel event is set; the
+        chunks finished so far are kept for the next run.
+        """
+        remove_stale_jobs(self.jobs_dir)
+        self.load()
+        if self.fmt == "docx":
+            self._run_docx(progress_callback)
+        else:
+            self._run_text(progress_callback)
+        with self.logic.metrics.stage("assemble"):
+            self._assemble()
+        self.discard()
+        return [self.output_path]
+
+    def _page_done(self, current, total, progress_callback):
+        self.logic._page_done(current, total, progress_callback)
+
+    def _run_text(self, progress_callback):
+        chunks, done = self.manifest["chunks"], self.manifest["done"]
+        todo = [i for i, finished in enumerate(done) if not finished]
+        if not todo:
+            return
+        # Text chunks are produced in order, so only a tail is ever missing
+        first = todo[0]
+        total = len(self.pages)
+        current = chunks[first][0]
+        self._page_done(current, total, progress_callback)
+
+        index, f = first, None
+        mode, terminator, _, _ = TEXT_JOBS[self.text_job]
+        if self.fmt == "txt":
+            # Same pages as a plain TXT conversion: from the text cache, and into the search index
+            backend = self.text_job.split("-", 1)[1]
+            pages = self.logic.iter_text_pages(self.pdf_path, backend, self.page_count, start=current)
+            indexer = self.logic._indexer(self.pdf_path, self.page_count)
+        else:
+            # HTML markup is neither cached nor indexed
+            pages = self.logic.iter_pages(self.pdf_path, mode, self.page_count, start=current)
+            indexer = None
+        try:
+            for text in pages:
+                if indexer:
+                    indexer.add(current, text)
+                with self.logic.metrics.stage("write"):
+                    if f is None:
+                        f = open(self.chunk_path(index) + ".tmp", 'w', encoding='utf-8',
+                                 buffering=HTML_BUFFER_SIZE)
+                    f.write(text)
+                    f.write(terminator)
+                    current += 1
+                    if current == chunks[index][1]:
+                        f.close()
+                        f = None
+                        os.replace(self.chunk_path(index) + ".tmp", self.chunk_path(index))
+                        self._mark_done(index)
+                        index += 1
+                        if indexer:
+                            indexer.flush()
+                self._page_done(current, total, progress_callback)
+        finally:
+            if f is not None:
+                f.close()
+
+    def _run_docx(self, progress_callback):
+        chunks, done = self.manifest["chunks"], self.manifest["done"]
+        todo = [i for i, finished in enumerate(done) if not finished]
+        total = len(self.pages)
+        current = self.pages_done()
+        self._page_done(current, total, progress_callback)
+
+        if self.workers <= 1 or len(todo) <= 1:
+            for index in todo:
+                start, end = chunks[index]
+                def page_done():
+                    nonlocal current
+                    current += 1
+                    self._page_done(current, total, progress_callback)
+                with self.logic.metrics.stage("layout"):
+                    _convert_docx_chunk(self.pdf_path, self.pages[start:end], self.chunk_path(index), page_done)
+                self._mark_done(index)
+            return
+
+        # Parallel chunks report progress and check for cancel as each one finishes
+        todo = iter(todo)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
+            try:
+                for index in todo:
+                    start, end = chunks[index]
+                    pending[pool.submit(_convert_docx_chunk, self.pdf_path, self.pages[start:end],
+                                        self.chunk_path(index))] = index
+                    if len(pending) >= self.workers:
+                        break
+                while pending:
+                    with self.logic.metrics.stage("layout"):
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index = pending.pop(future)
+                        future.result()
+                        self._mark_done(index)
+                        current += chunks[index][1] - chunks[index][0]
+                        self._page_done(current, total, progress_callback)
+                        nxt = next(todo, None)
+                        if nxt is not None:
+                            start, end = chunks[nxt]
+                            pending[pool.submit(_convert_docx_chunk, self.pdf_path, self.pages[start:end],
+                                                self.chunk_path(nxt))] = nxt
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _assemble(self):
+        tmp = self.output_path + ".part"
+        count = len(self.manifest["chunks"])
+        if self.fmt == "docx":
+            merge_docx([self.chunk_path(i) for i in range(count)], tmp)
+        else:
+            _, _, header, footer = TEXT_JOBS[self.text_job]
+            with open(tmp, 'w', encoding='utf-8', buffering=HTML_BUFFER_SIZE) as out:
+                out.write(header)
+                for index in range(count):
+                    with open(self.chunk_path(index), 'r', encoding='utf-8') as f:
+                        shutil.copyfileobj(f, out, HTML_BUFFER_SIZE)
+                out.write(footer)
+        os.replace(tmp, self.output_path)
+
+    def discard(self):
+        shutil.rmtree(self.job_dir, ignore_errors=True)
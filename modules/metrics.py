@@ -0,0 +1,193 @@
+import cProfile
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from . import config
+
+PROFILE_ENV = "PDF_CONVERTER_PROFILE"
+TRACE_ENV = "PDF_CONVERTER_TRACE"
+UPDATE_INTERVAL = 0.25 # Seconds between live updates to listeners
+MAX_EVENTS = 100000    # Trace events kept per run, oldest dropped first
+
+def peak_memory_mb():
+    """Peak memory of this process in MB, or None when it can't be measured."""
+    if tracemalloc.is_tracing():
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except (ImportError, AttributeError):
+        return None
+
+def percentile(values, pct):
+    """Linearly interpolated percentile of a non-empty sequence."""
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+class ConversionMetrics:
+    """Collects per-stage timings, page and byte counts for one run.
+
+    on_update, if set, is called with a snapshot dict at most every
+    UPDATE_INTERVAL seconds as pages complete, from the converting thread.
+    """
+
+    def __init__(self, name="", on_update=None):
+        self.name = name
+        self.on_update = on_update
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.events = deque(maxlen=MAX_EVENTS) # (kind, name, start offset, duration)
+        self.pages = 0
+        self.total_pages = 0
+        self.bytes_written = 0
+        self._last_update = 0.0
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_stage(name, t0, time.perf_counter() - t0)
+
+    def timed(self, name, iterable):
+        """Wraps an iterator, charging the time spent producing items to a stage."""
+        it = iter(iterable)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+            yield item
+
+    def _add_stage(self, name, t0, duration):
+        self.stages[name] = self.stages.get(name, 0.0) + duration
+        self.events.append(("stage", name, round(t0 - self.started, 6), round(duration, 6)))
+
+    def set_total(self, total_pages):
+        self.total_pages = total_pages
+
+    def add_bytes(self, count):
+        self.bytes_written += count
+
+    def page_done(self, current=None, total=None):
+        self.pages = current if current is not None else self.pages + 1
+        if total is not None:
+            self.total_pages = total
+        now = time.perf_counter()
+        self.events.append(("page", str(self.pages), round(now - self.started, 6), 0.0))
+        if self.on_update and (now - self._last_update >= UPDATE_INTERVAL or self.pages == self.total_pages):
+            self._last_update = now
+            self.on_update(self.snapshot())
+
+    def progress_callback(self, callback=None):
+        """Returns a (current, total) progress callback that also records pages."""
+        def report(current, total):
+            self.page_done(current, total)
+            if callback:
+                callback(current, total)
+        return report
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.pages / elapsed if elapsed > 0 else 0.0
+        remaining = self.total_pages - self.pages
+        return {
+            "name": self.name,
+            "elapsed": round(elapsed, 3),
+            "pages": self.pages,
+            "total_pages": self.total_pages,
+            "pages_per_s": round(rate, 2),
+            "eta": round(remaining / rate, 1) if rate > 0 and remaining > 0 else 0.0,
+            "bytes_written": self.bytes_written,
+            "peak_memory_mb": peak_memory_mb(),
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+        }
+
+    def export_json(self, path):
+        data = self.snapshot()
+        data["events"] = [dict(zip(("kind", "name", "start", "duration"), e)) for e in self.events]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+    def export_csv(self, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(("kind", "name", "start", "duration"))
+            writer.writerows(self.events)
+            for name, seconds in self.stages.items():
+                writer.writerow(("total", name, "", round(seconds, 6)))
+
+def get_diagnostics_dir():
+    path = os.path.join(config.get_app_data_dir(), "diagnostics")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _flag(env_name, key):
+    value = os.getenv(env_name)
+    if value is not None:
+        return value.lower() not in ("", "0", "false", "no")
+    return config.settings.get_bool('Diagnostics', key, False)
+
+def profiling_enabled():
+    """cProfile/tracemalloc capture, switched on by PDF_CONVERTER_PROFILE=1 or config.ini."""
+    return _flag(PROFILE_ENV, 'profile')
+
+def tracing_enabled():
+    """Trace file export, switched on by PDF_CONVERTER_TRACE=1 or config.ini."""
+    return _flag(TRACE_ENV, 'trace')
+
+def write_trace(metrics, out_dir=None):
+    """Writes the metrics as JSON and CSV trace files; returns the JSON path."""
+    out_dir = out_dir or get_diagnostics_dir()
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{_safe_name(metrics.name)}-{time.strftime('%Y%m%d-%H%M%S')}")
+    metrics.export_json(base + ".json")
+    metrics.export_csv(base + ".csv")
+    return base + ".json"
+
+@contextmanager
+def profiling(name):
+    """Captures a cProfile and tracemalloc report for the block when profiling is enabled."""
+    if not profiling_enabled():
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        base = os.path.join(get_diagnostics_dir(), f"{_safe_name(name)}-{time.strftime('%Y%m%d-%H%M%S')}")
+        profiler.dump_stats(base + ".prof")
+        snapshot = tracemalloc.take_snapshot()
+        with open(base + ".memory.txt", 'w', encoding='utf-8') as f:
+            for stat in snapshot.statistics('lineno')[:50]:
+                f.write(f"{stat}\n")
+        if started_tracing:
+            tracemalloc.stop()
+
+def _safe_name(name):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name) or "conversion"
@@ -1,41 +1,136 @@
-import fitz  # PyMuPDF
-import wx
+from . import config
+from .documents import documents
+from .cache import fast_fingerprint
+from .metrics import ConversionMetrics
+from .render import RenderCache, RenderScheduler, page_zoom, render_page, to_bitmap, VISIBLE, TEXT, PREFETCH
+from .text_cache import get_text_cache
 
 class PDFViewer:
-    def __init__(self, pdf_path):
-        self.doc = fitz.open(pdf_path)
-        self.page_count = len(self.doc)
+    """Page images and page text of one open document.
+
+    With threaded=True, as in the main window, the document is opened and
+    used only by a RenderScheduler thread; every method queues its work
+    there, so PyMuPDF is never used from two threads at once. With
+    threaded=False the caller's thread opens and uses the document itself.
+    """
+
+    def __init__(self, pdf_path, threaded=True):
+        self.pdf_path = pdf_path
+        self.scheduler = RenderScheduler(pdf_path) if threaded else None
+        # Opened from the shared mapping, which the converter and renderers reuse
+        self.doc = None if threaded else documents.open(pdf_path)
+        self.render_cache = RenderCache(config.get_render_cache_mb())
+        self.render_width = None
+        self.page_widths = {} # Only used on the thread that owns the document
+        self.metrics = ConversionMetrics("viewer")
+        # search_index.DocumentIndexer that receives extracted page text, if set
+        self.indexer = None
+        self.text_cache = get_text_cache()
+        self._fingerprint = None
+        try:
+            self.page_count = self.call(lambda doc: doc.page_count)
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = fast_fingerprint(self.pdf_path)
+        return self._fingerprint
+
+    def call(self, func, priority=VISIBLE):
+        """Runs func(doc) where the document lives and returns its result."""
+        if self.scheduler is None:
+            return func(self.doc)
+        return self.scheduler.call(func, priority).result()
+
+    def set_render_width(self, width):
+        # A new width makes every cached rendering the wrong size
+        if width != self.render_width:
+            self.render_cache.clear()
+            self.render_width = width
+
+    def _render(self, doc, page_num, width):
+        zoom = page_zoom(doc, page_num, width, self.page_widths)
+        entry = self.render_cache.get(page_num, zoom)
+        if entry is None:
+            with self.metrics.stage("render"):
+                entry = render_page(doc, page_num, zoom)
+            self.render_cache.put(page_num, zoom, entry)
+        return entry
 
     def get_page_bitmap(self, page_num, width=None):
+        """Renders a page and waits for it; the render jumps ahead of queued work."""
         if page_num < 0 or page_num >= self.page_count:
             return None
-        
-        page = self.doc.load_page(page_num)
-        
-        # Calculate zoom to fit width if provided
-        zoom = 1.0
-        if width:
-            rect = page.rect
-            zoom = width / rect.width
-        
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        
-        # Convert to wx.Bitmap
-        image = wx.Image(pix.width, pix.height, pix.samples)
-        if pix.alpha:
-             image.SetAlpha(pix.alphas)
-             
-        bitmap = wx.Bitmap(image)
-        return bitmap
+
+        self.set_render_width(width)
+        entry = self.call(lambda doc: self._render(doc, page_num, width))
+        self.prefetch_around(page_num, width)
+        with self.metrics.stage("bitmap"):
+            return to_bitmap(entry)
+
+    def request_page_bitmap(self, page_num, width, callback):
+        """Renders a page off the UI thread.
+
+        callback(page_num, bitmap) runs on the UI thread. Earlier requests that
+        have not started yet are dropped, so jumping ahead doesn't wait for
+        pages the user has already left.
+        """
+        if page_num < 0 or page_num >= self.page_count:
+            return
+        if self.scheduler is None:
+            callback(page_num, self.get_page_bitmap(page_num, width))
+            return
+        self.set_render_width(width)
+        self.scheduler.cancel_pending()
+        self.scheduler.submit(lambda doc: self._render(doc, page_num, width),
+                              lambda entry: callback(page_num, to_bitmap(entry)), VISIBLE)
+        self.prefetch_around(page_num, width)
+
+    def prefetch_around(self, page_num, width):
+        # Next and previous pages render after everything the user is waiting for
+        if self.scheduler:
+            for neighbour in (page_num + 1, page_num - 1):
+                if 0 <= neighbour < self.page_count:
+                    self.scheduler.submit(lambda doc, n=neighbour: self._render(doc, n, width),
+                                          priority=PREFETCH)
+
+    def _page_text(self, doc, page_num):
+        text = self.text_cache.get(self.fingerprint, "pymupdf", page_num, self.page_count)
+        if text is None:
+            with self.metrics.stage("text"):
+                text = doc.load_page(page_num).get_text()
+            self.text_cache.put(self.fingerprint, "pymupdf", page_num, text, self.page_count)
+        if self.indexer:
+            self.indexer.add(page_num, text)
+        return text + "\n\n"
+
+    def page_texts(self, pages, priority=TEXT):
+        """Returns the text of the given pages, extracted in one request."""
+        return self.call(lambda doc: [self._page_text(doc, page_num) for page_num in pages], priority)
+
+    def get_page_text(self, page_num):
+        return self.page_texts([page_num])[0]
+
+    def iter_page_texts(self, start=0, end=None):
+        # Page by page, so callers can show text before the whole document is read
+        if end is None or end > self.page_count:
+            end = self.page_count
+        for page_num in range(start, end):
+            yield self.get_page_text(page_num)
 
     def get_text(self):
         # Extract text from all pages for accessibility preview
-        full_text = ""
-        for page in self.doc:
-            full_text += page.get_text() + "\n\n"
-        return full_text
+        return "".join(self.iter_page_texts())
 
     def close(self):
+        if self.indexer:
+            self.indexer.flush()
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
         if self.doc:
-            self.doc.close()
+            documents.close(self.doc)
+            self.doc = None
@@ -0,0 +1,220 @@
+import threading
+from concurrent.futures import CancelledError
+import wx
+from .render import INDEX
+
+PREVIEW_FIRST_PAGES = 3    # First batch, kept small so text shows up at once
+PREVIEW_BATCH = 10         # Pages per background update
+PREVIEW_WINDOW = 200       # Most pages kept in the text control at once
+INDEX_BATCH = 20           # Pages indexed per request while the preview is idle
+CARET_POLL_MS = 300
+LOADING_TEXT = "Loading document... Please wait."
+
+class PreviewLoader:
+    """Fills the preview text control without freezing the UI.
+
+    A background thread decides which pages to load and asks the viewer
+    for their text, which is extracted on the viewer's render thread: the
+    first few pages are shown as soon as they are ready and the rest are
+    added in batches with wx.CallAfter. Only a window of pages around the
+    caret is kept in the control; pages far from the caret are dropped and
+    re-extracted when the caret comes back. Once the window is loaded, the
+    thread goes on through the pages the viewer's search indexer still
+    lacks, at the lowest priority, so all text extraction for the open
+    document happens on one thread.
+    """
+
+    def __init__(self, text_ctrl):
+        self.ctrl = text_ctrl
+        self.viewer = None     # Its indexer receives every page the preview extracts
+        self.page_count = 0
+        self.jump = None       # (page, text to select) waiting for its page to load
+
+        self.first = 0        # First page held in the control
+        self.lengths = []     # Text length of each page held in the control
+        self.target = 0       # Page the caret is on
+        self.session = 0      # Bumped by every load and stop; older threads and batches are ignored
+        self.wake = threading.Event()
+        self.applied = threading.Event()
+
+        # One caret poll for the lifetime of the control; load() only restarts it
+        self.timer = wx.Timer(self.ctrl)
+        self.ctrl.Bind(wx.EVT_TIMER, self.on_timer, self.timer)
+
+    @property
+    def last(self):
+        return self.first + len(self.lengths)
+
+    def load(self, viewer):
+        """Starts showing viewer's document in place of whatever was shown before."""
+        self.stop()
+        self.viewer = viewer
+        self.page_count = viewer.page_count
+        self.jump = None
+        self.first = 0
+        self.lengths = []
+        self.target = 0
+        self.wake = threading.Event()
+        self.applied = threading.Event()
+        self.timer.Start(CARET_POLL_MS)
+        threading.Thread(target=self.run, args=(self.session, viewer, self.wake, self.applied),
+                         daemon=True).start()
+
+    def stop(self):
+        self.session += 1
+        self.timer.Stop()
+        self.wake.set()
+        self.applied.set()
+
+    def page_at(self, pos):
+        """Returns the page number for a position in the text control."""
+        offset = 0
+        for i, length in enumerate(self.lengths):
+            offset += length
+            if pos < offset:
+                return self.first + i
+        return max(self.last - 1, 0)
+
+    def page_offset(self, page_num):
+        """Returns the text position where page_num starts, or None if not loaded."""
+        if page_num < self.first or page_num >= self.last:
+            return None
+        return sum(self.lengths[:page_num - self.first])
+
+    def jump_to(self, page_num, text=""):
+        """Moves the caret to page_num, selecting the first match of text on it.
+
+        A page outside the loaded window restarts the window there; the caret
+        moves once the page has arrived.
+        """
+        self.jump = (page_num, text)
+        if self.page_offset(page_num) is None:
+            self.ctrl.SetValue(LOADING_TEXT)
+            self.lengths = []
+            self.first = max(0, page_num - PREVIEW_FIRST_PAGES // 2)
+            self.target = page_num
+            self.wake.set()
+        else:
+            self._apply_jump()
+
+    def _apply_jump(self):
+        page_num, text = self.jump
+        offset = self.page_offset(page_num)
+        if offset is None:
+            return
+        self.jump = None
+        self.target = page_num
+        length = self.lengths[page_num - self.first]
+        start, end = offset, offset
+        page_text = self.ctrl.GetRange(offset, offset + length).lower()
+        # Try the whole phrase, then its first word, else just go to the page
+        for candidate in (text, text.split()[0] if text.split() else ""):
+            found = page_text.find(candidate.lower()) if candidate else -1
+            if found >= 0:
+                start, end = offset + found, offset + found + len(candidate)
+                break
+        self.ctrl.SetSelection(start, end)
+        self.ctrl.ShowPosition(start)
+
+    def on_timer(self, event):
+        if not self.viewer:
+            return
+        page = self.page_at(self.ctrl.GetInsertionPoint())
+        if page != self.target:
+            self.target = page
+            self.wake.set()
+
+    def run(self, session, viewer, wake, applied):
+        try:
+            while session == self.session:
+                want_start = max(0, self.target - PREVIEW_WINDOW // 2)
+                want_end = min(self.page_count, max(self.target + PREVIEW_WINDOW // 2, PREVIEW_WINDOW))
+                first, last = self.first, self.last
+
+                if last < want_end:
+                    end = min(last + (PREVIEW_BATCH if last else PREVIEW_FIRST_PAGES), want_end)
+                    texts = viewer.page_texts(range(last, end))
+                    applied.clear()
+                    wx.CallAfter(self.append_pages, session, applied, last, texts)
+                elif first > want_start:
+                    start = max(first - PREVIEW_BATCH, want_start)
+                    texts = viewer.page_texts(range(start, first))
+                    applied.clear()
+                    wx.CallAfter(self.prepend_pages, session, applied, start, texts)
+                elif viewer.indexer and not viewer.indexer.complete:
+                    viewer.page_texts(viewer.indexer.missing()[:INDEX_BATCH], INDEX)
+                    if viewer.indexer.complete:
+                        viewer.indexer.flush()
+                    continue
+                else:
+                    wake.wait()
+                    wake.clear()
+                    continue
+                # Let the UI apply the batch before deciding on the next one
+                applied.wait()
+        except CancelledError:
+            pass # The viewer was closed
+
+    def append_pages(self, session, applied, start, texts):
+        try:
+            if session != self.session or start != self.last:
+                return
+            if not self.lengths:
+                # First batch replaces the "loading" message
+                self.ctrl.SetValue("".join(texts))
+                self.ctrl.SetInsertionPoint(0)
+                self.lengths = [len(t) for t in texts]
+                if self.jump:
+                    self._apply_jump()
+                return
+            pos = self.ctrl.GetInsertionPoint()
+            self.ctrl.Freeze()
+            try:
+                self.ctrl.AppendText("".join(texts))
+                self.lengths.extend(len(t) for t in texts)
+
+                # Drop pages from the top once the window is full and the
+                # caret is well past them.
+                excess = min(len(self.lengths) - PREVIEW_WINDOW,
+                             self.page_at(pos) - self.first - PREVIEW_BATCH)
+                if excess > 0:
+                    removed = sum(self.lengths[:excess])
+                    self.ctrl.Remove(0, removed)
+                    del self.lengths[:excess]
+                    self.first += excess
+                    pos -= removed
+                self.ctrl.SetInsertionPoint(pos)
+            finally:
+                self.ctrl.Thaw()
+            if self.jump:
+                self._apply_jump()
+        finally:
+            applied.set()
+
+    def prepend_pages(self, session, applied, start, texts):
+        try:
+            if session != self.session or start + len(texts) != self.first:
+                return
+            pos = self.ctrl.GetInsertionPoint()
+            self.ctrl.Freeze()
+            try:
+                text = "".join(texts)
+                self.ctrl.SetInsertionPoint(0)
+                self.ctrl.WriteText(text)
+                self.lengths[:0] = [len(t) for t in texts]
+                self.first = start
+                pos += len(text)
+
+                excess = len(self.lengths) - PREVIEW_WINDOW
+                if excess > 0:
+                    removed = sum(self.lengths[-excess:])
+                    total = sum(self.lengths)
+                    self.ctrl.Remove(total - removed, total)
+                    del self.lengths[-excess:]
+                self.ctrl.SetInsertionPoint(pos)
+            finally:
+                self.ctrl.Thaw()
+            if self.jump:
+                self._apply_jump()
+        finally:
+            applied.set()
@@ -0,0 +1,198 @@
+"""Page images without the user interface.
+
+Pages are rendered to PNG or JPEG files in one or more sizes, each given
+as a resolution ("150dpi") or a pixel width ("800"). A page is rendered
+once, at the largest size asked for, and the smaller sizes are scaled
+down from that pixmap, so full, preview and thumbnail images cost little
+more than the full one alone. Workers render a page at a time and write
+it out straight away; renders are capped at MAX_PIXELS, so memory stays
+bounded whatever the page size or resolution.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .backends import fitz
+from .documents import documents
+
+FORMATS = ("png", "jpeg")
+EXTENSIONS = {"png": "png", "jpeg": "jpg"}
+MAX_PIXELS = 40 * 1000 * 1000 # Largest render, about 120 MB of RGB samples
+STRIP_GAP = 4 # Pixels between the thumbnails of a strip
+CHUNK_PAGES = 4 # Pages per task when rasterizing many documents
+
+def parse_sizes(text):
+    """Parses "full=150dpi,thumb=160" into [(name, dpi, width)] with one of dpi/width set."""
+    sizes = []
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        name, sep, value = part.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Invalid size: {part}")
+        try:
+            if value.lower().endswith("dpi"):
+                size = (name, int(value[:-3]), None)
+            else:
+                size = (name, None, int(value.lower().removesuffix("px")))
+        except ValueError:
+            raise ValueError(f"Invalid size: {part}")
+        if (size[1] or size[2] or 0) <= 0:
+            raise ValueError(f"Invalid size: {part}")
+        sizes.append(size)
+    if not sizes:
+        raise ValueError("No image size given")
+    return sizes
+
+def size_zoom(size, page_width):
+    _, dpi, width = size
+    return dpi / 72 if dpi else width / page_width
+
+def image_name(page_num, size_name, image_format):
+    return f"page{page_num + 1:04d}-{size_name}.{EXTENSIONS[image_format]}"
+
+def save_pixmap(pix, path, image_format, jpeg_quality):
+    if image_format == "jpeg":
+        pix.save(path, output="jpeg", jpg_quality=jpeg_quality)
+    else:
+        pix.save(path, output="png")
+
+def render_variants(page, sizes, image_format, output_dir, jpeg_quality=85):
+    """Renders one page in every size and returns its manifest entry."""
+    rect = page.rect
+    zooms = [size_zoom(size, rect.width) for size in sizes]
+    # One render at the largest size, within the pixel cap
+    zoom = min(max(zooms), (MAX_PIXELS / max(rect.width * rect.height, 1)) ** 0.5)
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    files = {}
+    for size, target_zoom in zip(sizes, zooms):
+        if target_zoom >= zoom:
+            scaled = pix
+        else:
+            width = max(1, round(rect.width * target_zoom))
+            scaled = fitz.Pixmap(pix, width, max(1, round(pix.height * width / pix.width)), None)
+        name = image_name(page.number, size[0], image_format)
+        save_pixmap(scaled, os.path.join(output_dir, name), image_format, jpeg_quality)
+        files[size[0]] = name
+    return {"page": page.number + 1, "width": pix.width, "height": pix.height, "files": files}
+
+def rasterize_pages(pdf_path, pages, sizes, image_format, output_dir, jpeg_quality=85):
+    """Renders the given pages of pdf_path; returns one manifest entry per page.
+
+    Opens its own document, so it also runs in worker processes.
+    """
+    with documents.opened(pdf_path) as doc:
+        return [render_variants(doc.load_page(page_num), sizes, image_format, output_dir, jpeg_quality)
+                for page_num in pages]
+
+def make_strip(paths, output_path, image_format, jpeg_quality=85):
+    """Puts the images in paths side by side, top aligned, into one image."""
+    thumbs = [fitz.Pixmap(path) for path in paths]
+    width = sum(t.width for t in thumbs) + STRIP_GAP * (len(thumbs) - 1)
+    height = max(t.height for t in thumbs)
+    strip = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    strip.clear_with(255)
+    x = 0
+    for thumb in thumbs:
+        thumb.set_origin(x, 0)
+        strip.copy(thumb, thumb.irect)
+        x += thumb.width + STRIP_GAP
+    save_pixmap(strip, output_path, image_format, jpeg_quality)
+
+def finish_document(pdf_path, output_path, page_count, pages, sizes, image_format,
+                    jpeg_quality=85, strip_pages=0):
+    """Writes the thumbnail strip and the manifest for the rendered pages.
+
+    pages are the entries from render_variants, in page order. The strip
+    shows the first strip_pages pages in the last size. Returns the files
+    written, manifest first.
+    """
+    output_dir = os.path.dirname(output_path) or "."
+    files = [name for entry in pages for name in entry["files"].values()]
+    manifest = {
+        "source": os.path.basename(pdf_path),
+        "page_count": page_count,
+        "format": image_format,
+        "sizes": {name: (f"{dpi}dpi" if dpi else width) for name, dpi, width in sizes},
+        "pages": pages,
+    }
+    strip_pages = min(strip_pages, len(pages))
+    if strip_pages:
+        manifest["strip"] = f"strip.{EXTENSIONS[image_format]}"
+        make_strip([os.path.join(output_dir, entry["files"][sizes[-1][0]]) for entry in pages[:strip_pages]],
+                   os.path.join(output_dir, manifest["strip"]), image_format, jpeg_quality)
+        files.append(manifest["strip"])
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return [output_path] + [os.path.join(output_dir, name) for name in files]
+
+def rasterize_files(pdf_paths, output_paths, sizes, image_format, workers,
+                    jpeg_quality=85, strip_pages=0, chunk_pages=CHUNK_PAGES):
+    """Renders many documents with one process pool shared by all their pages.
+
+    output_paths maps each PDF to its manifest path. Chunks of chunk_pages
+    pages from every document are queued together, so a long document
+    doesn't leave the other workers idle. Returns one result dict per
+    document, in the order of pdf_paths.
+    """
+    results = {}
+    docs = {}
+    for pdf_path in pdf_paths:
+        t0 = time.perf_counter()
+        try:
+            with documents.shared(pdf_path) as doc:
+                page_count = doc.page_count
+            os.makedirs(os.path.dirname(output_paths[pdf_path]) or ".", exist_ok=True)
+        except Exception as e:
+            results[pdf_path] = {"input": pdf_path, "status": "failed", "error": str(e)}
+            continue
+        docs[pdf_path] = {"pages": [], "page_count": page_count, "t0": t0,
+                          "chunks": -(-page_count // chunk_pages), "error": None}
+
+    def finish(pdf_path):
+        doc = docs[pdf_path]
+        result = {"input": pdf_path, "output": output_paths[pdf_path], "pages": doc["page_count"]}
+        try:
+            if doc["error"]:
+                raise doc["error"]
+            doc["pages"].sort(key=lambda entry: entry["page"])
+            files = finish_document(pdf_path, output_paths[pdf_path], doc["page_count"], doc["pages"],
+                                    sizes, image_format, jpeg_quality, strip_pages)
+            result.update(status="ok", files=len(files))
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+        result["seconds"] = round(time.perf_counter() - doc["t0"], 3)
+        results[pdf_path] = result
+        doc["pages"] = None # Done with the entries; keep memory flat over large libraries
+
+    tasks = ((pdf_path, list(range(start, min(start + chunk_pages, doc["page_count"]))))
+             for pdf_path, doc in docs.items()
+             for start in range(0, doc["page_count"], chunk_pages))
+    for pdf_path, doc in docs.items():
+        if not doc["chunks"]:
+            finish(pdf_path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        def submit():
+            task = next(tasks, None)
+            if task:
+                pdf_path, pages = task
+                output_dir = os.path.dirname(output_paths[pdf_path]) or "."
+                pending[pool.submit(rasterize_pages, pdf_path, pages, sizes, image_format,
+                                    output_dir, jpeg_quality)] = pdf_path
+        for _ in range(workers * 2):
+            submit()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pdf_path = pending.pop(future)
+                doc = docs[pdf_path]
+                try:
+                    doc["pages"].extend(future.result())
+                except Exception as e:
+                    doc["error"] = doc["error"] or e
+                doc["chunks"] -= 1
+                if doc["chunks"] == 0:
+                    finish(pdf_path)
+                submit()
+    return [results[pdf_path] for pdf_path in pdf_paths]
@@ -0,0 +1,174 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from collections import OrderedDict
+import wx
+from .backends import fitz
+from .documents import documents
+
+# Request priorities, lower runs first
+VISIBLE = 0   # The page on screen
+TEXT = 1      # Preview text around the caret
+PREFETCH = 2  # Pages next to the one on screen
+INDEX = 3     # Text for the search index, when nothing else is waiting
+_STOP = -1
+
+def page_zoom(doc, page_num, width=None, page_widths=None):
+    # Calculate zoom to fit width if provided
+    if not width:
+        return 1.0
+    # Page sizes are remembered so cache hits don't have to load the page
+    page_width = page_widths.get(page_num) if page_widths is not None else None
+    if page_width is None:
+        page_width = doc.load_page(page_num).rect.width
+        if page_widths is not None:
+            page_widths[page_num] = page_width
+    return width / page_width
+
+def render_page(doc, page_num, zoom):
+    """Rasterizes a page to (width, height, RGB samples)."""
+    page = doc.load_page(page_num)
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat)
+    return pix.width, pix.height, pix.samples
+
+def to_bitmap(entry):
+    # Must run on the UI thread
+    w, h, samples = entry
+    image = wx.Image(w, h, samples)
+    return wx.Bitmap(image)
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered pages keyed by (page, zoom) with a memory budget."""
+
+    def __init__(self, budget_mb):
+        self.budget = budget_mb * 1024 * 1024
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page_num, zoom):
+        with self.lock:
+            entry = self.entries.get((page_num, zoom))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((page_num, zoom))
+            self.hits += 1
+            return entry
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def put(self, page_num, zoom, entry):
+        size = len(entry[2])
+        if size > self.budget:
+            return
+        with self.lock:
+            if (page_num, zoom) in self.entries:
+                return
+            self.entries[(page_num, zoom)] = entry
+            self.size += size
+            while self.size > self.budget:
+                _, old = self.entries.popitem(last=False)
+                self.size -= len(old[2])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+class RenderScheduler:
+    """Runs all page work for one open document on a single thread.
+
+    PyMuPDF objects can't be used from several threads at once, so the
+    thread opens its own fitz.Document and everything else queues work for
+    it: renders, prefetching and page text. Requests are served by
+    priority, so the visible page goes first and indexing last.
+    cancel_pending() drops renders still queued when the user jumps
+    elsewhere. Finished renders are handed to the UI thread with
+    wx.CallAfter, where only the wx.Bitmap is built.
+    """
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+        self.requests = queue.PriorityQueue()
+        self.seq = itertools.count()
+        self.generation = 0
+        self.stopped = False
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="pdf-render", daemon=True)
+        self.thread.start()
+
+    def call(self, func, priority=VISIBLE):
+        """Queues func(doc); returns a Future for its result. Never dropped by cancel_pending()."""
+        return self._put(priority, None, func, None)
+
+    def submit(self, func, callback=None, priority=VISIBLE):
+        """Queues func(doc), dropped by cancel_pending() until it starts.
+
+        callback(result) is called on the UI thread unless the request was
+        cancelled in the meantime.
+        """
+        return self._put(priority, self.generation, func, callback)
+
+    def _put(self, priority, generation, func, callback):
+        future = Future()
+        with self._lock:
+            if self.stopped:
+                future.cancel()
+            else:
+                self.requests.put((priority, next(self.seq), generation, func, future, callback))
+        return future
+
+    def cancel_pending(self):
+        # Queued requests from older generations are skipped by the worker
+        self.generation += 1
+
+    def stop(self):
+        self.cancel_pending()
+        self.requests.put((_STOP, next(self.seq), None, None, None, None))
+
+    def run(self):
+        try:
+            doc = documents.open(self.pdf_path)
+        except Exception as e:
+            doc, error = None, e
+        try:
+            while True:
+                _, _, generation, func, future, callback = self.requests.get()
+                if func is None:
+                    break
+                if generation is not None and generation != self.generation:
+                    future.cancel()
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if doc is None:
+                        raise error
+                    result = func(doc)
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                future.set_result(result)
+                if callback:
+                    wx.CallAfter(self.deliver, generation, result, callback)
+        finally:
+            with self._lock:
+                self.stopped = True
+                # Release everyone still waiting on a result
+                while not self.requests.empty():
+                    future = self.requests.get_nowait()[4]
+                    if future is not None:
+                        future.cancel()
+            if doc is not None:
+                documents.close(doc)
+
+    def deliver(self, generation, result, callback):
+        if generation == self.generation:
+            callback(result)
@@ -0,0 +1,181 @@
+"""Full-text search over the pages of opened and converted PDFs.
+
+Page text goes into an SQLite FTS5 table in the app data directory. It
+comes from the preview, which indexes the open document in the
+background, and from conversions. Documents are keyed by their cache
+fingerprint, so a file that moves is not indexed again and one that
+changes gets a fresh entry, which replaces that of its previous version.
+Every page is stored under the rowid doc_id * MAX_PAGES + page, which
+makes "which pages are already indexed" a cheap range lookup.
+"""
+import os
+import sqlite3
+import threading
+import time
+from . import config
+from .cache import fast_fingerprint
+
+MAX_PAGES = 1000000 # Pages per document addressable through the rowid scheme
+BATCH_PAGES = 100   # Pages written per transaction while indexing
+SNIPPET_TOKENS = 12
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT UNIQUE NOT NULL,
+    path TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text, doc_id UNINDEXED, page UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+def get_index_path():
+    return os.path.join(config.get_app_data_dir(), "search.db")
+
+def make_query(text):
+    """Turns what the user typed into an FTS5 query matching every word.
+
+    Words are quoted so punctuation can't be read as query syntax, and the
+    last one matches as a prefix so results show up while typing.
+    """
+    words = [w.replace('"', '""') for w in text.split()]
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+class SearchIndex:
+    def __init__(self, path=None):
+        self.path = path or get_index_path()
+        self._lock = threading.Lock()
+        # Used from the indexing, conversion and UI threads; the lock serializes access
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def document_id(self, fingerprint, path, page_count):
+        """Returns the id for a document, registering it on first sight.
+
+        Other documents last seen at the same path are earlier versions of
+        this file and are removed, so editing a PDF doesn't grow the index.
+        """
+        path = os.path.abspath(path)
+        with self._lock, self._db:
+            stale = self._db.execute("SELECT id FROM documents WHERE path = ? AND fingerprint != ?",
+                                     (path, fingerprint)).fetchall()
+            for doc_id, in stale:
+                self._delete(doc_id)
+            row = self._db.execute("SELECT id FROM documents WHERE fingerprint = ?",
+                                   (fingerprint,)).fetchone()
+            if row:
+                self._db.execute("UPDATE documents SET path = ?, updated = ? WHERE id = ?",
+                                 (path, time.time(), row[0]))
+                return row[0]
+            cur = self._db.execute(
+                "INSERT INTO documents (fingerprint, path, page_count, updated) VALUES (?, ?, ?, ?)",
+                (fingerprint, path, page_count, time.time()))
+            return cur.lastrowid
+
+    def indexed_pages(self, doc_id):
+        """Returns the set of page numbers already indexed for a document."""
+        first = doc_id * MAX_PAGES
+        with self._lock:
+            rows = self._db.execute("SELECT rowid FROM pages WHERE rowid >= ? AND rowid < ?",
+                                    (first, first + MAX_PAGES)).fetchall()
+        return {rowid - first for rowid, in rows}
+
+    def add_pages(self, doc_id, pages):
+        """Stores (page number, text) pairs, replacing earlier text of those pages."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO pages (rowid, text, doc_id, page) VALUES (?, ?, ?, ?)",
+                [(doc_id * MAX_PAGES + page, text, doc_id, page) for page, text in pages])
+
+    def search(self, text, fingerprint=None, limit=100):
+        """Returns hits as dicts with path, page (0-based) and snippet, best first.
+
+        With fingerprint set, only that document is searched.
+        """
+        query = make_query(text)
+        if query is None:
+            return []
+        sql = ("SELECT documents.path, pages.page, "
+               "snippet(pages, 0, '[', ']', '...', ?) "
+               "FROM pages JOIN documents ON documents.id = pages.doc_id "
+               "WHERE pages MATCH ?")
+        params = [SNIPPET_TOKENS, query]
+        if fingerprint:
+            sql += " AND documents.fingerprint = ?"
+            params.append(fingerprint)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        try:
+            with self._lock:
+                rows = self._db.execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            return [] # Nothing searchable left after quoting, e.g. only punctuation
+        return [{"path": path, "page": page, "snippet": " ".join(snippet.split())}
+                for path, page, snippet in rows]
+
+    def remove(self, fingerprint):
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id FROM documents WHERE fingerprint = ?",
+                                   (fingerprint,)).fetchone()
+            if row:
+                self._delete(row[0])
+
+    def _delete(self, doc_id):
+        # Callers hold the lock and a transaction
+        first = doc_id * MAX_PAGES
+        self._db.execute("DELETE FROM pages WHERE rowid >= ? AND rowid < ?", (first, first + MAX_PAGES))
+        self._db.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+class DocumentIndexer:
+    """Collects page text of one document and writes it to the index in batches.
+
+    Pages that are already indexed are skipped, so feeding the same document
+    from the preview, a conversion and the background indexer costs little.
+    """
+
+    def __init__(self, index, pdf_path, page_count, fingerprint=None):
+        self.index = index
+        self.fingerprint = fingerprint or fast_fingerprint(pdf_path)
+        self.doc_id = index.document_id(self.fingerprint, pdf_path, page_count)
+        self.page_count = page_count
+        self.done = index.indexed_pages(self.doc_id)
+        self.pending = []
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self):
+        return len(self.done) >= self.page_count
+
+    def missing(self):
+        return [p for p in range(self.page_count) if p not in self.done]
+
+    def add(self, page_num, text):
+        with self._lock:
+            if page_num in self.done:
+                return
+            self.done.add(page_num)
+            self.pending.append((page_num, text))
+            if len(self.pending) < BATCH_PAGES:
+                return
+            pages, self.pending = self.pending, []
+        self.index.add_pages(self.doc_id, pages)
+
+    def flush(self):
+        with self._lock:
+            pages, self.pending = self.pending, []
+        if pages:
+            self.index.add_pages(self.doc_id, pages)
@@ -0,0 +1,369 @@
+"""Conversion service for other programs on the same machine.
+
+A small asyncio HTTP server, bound to the loopback interface only:
+
+    POST /convert?format=txt[&name=report.pdf][&txt_backend=pymupdf]...
+        The request body is the PDF. The response body is the converted
+        file, or a ZIP archive when the conversion writes several files
+        (split HTML, images, page images).
+    GET /health
+    GET /metrics
+
+Uploads are streamed to a temporary file and results are streamed back
+from disk, so neither is held in memory. Conversions run in a process
+pool with one process per worker. Requests beyond the running ones wait
+in a queue of limited length; once it is full, new requests get a
+503 response with a Retry-After header.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs, quote
+from . import config
+from .cache import ConversionCache
+from .converter import ConverterLogic, FORMATS, output_path_for
+from .metrics import percentile
+
+HOST = "127.0.0.1"
+READ_CHUNK = 64 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+LATENCY_SAMPLES = 1000  # Recent requests kept for the latency percentiles
+THROUGHPUT_WINDOW = 60  # Seconds of recent completions used for throughput
+RETRY_AFTER = 5         # Seconds suggested to clients turned away by a full queue
+
+CONTENT_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+    "xhtml": "application/xhtml+xml",
+    "json": "application/json",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "zip": "application/zip",
+}
+
+# Conversion options accepted as query parameters
+OPTIONS = {
+    "txt_backend": str,
+    "pages_per_file": int,
+    "docx_workers": int,
+    "page_ranges": str,
+    "raster_sizes": str,
+    "raster_format": str,
+}
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def _convert(pdf_path, fmt, output_dir, options, cache_enabled):
+    """Runs one conversion in a worker process.
+
+    Returns (path of the file to send back, pages converted, cached).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    logic = ConverterLogic(workers=1, cache=ConversionCache() if cache_enabled else None)
+    logic.new_metrics(os.path.basename(pdf_path))
+    outputs = logic.convert_formats(pdf_path, {fmt: output_path_for(pdf_path, fmt, output_dir)}, **options)
+    pages = logic.metrics.snapshot()["pages"]
+    if len(outputs) == 1:
+        return outputs[0], pages, logic.last_from_cache
+    archive = os.path.join(os.path.dirname(pdf_path), "result.zip")
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for path in outputs:
+            zf.write(path, os.path.relpath(path, output_dir))
+    return archive, pages, logic.last_from_cache
+
+def safe_name(name):
+    """Reduces a client supplied file name to its base name without control characters or quotes."""
+    name = os.path.basename(name.replace("\\", "/"))
+    name = "".join(c for c in name if c.isprintable() and c not in '"').strip()
+    return "" if name in (".", "..") else name
+
+def content_disposition(filename):
+    # Plain ASCII for old clients, the full name as RFC 5987 filename*
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace("?", "_")
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename)}'
+
+def parse_options(query):
+    """Reads the format and conversion options from the query string."""
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    fmt = params.pop("format", "txt").lower()
+    if fmt not in FORMATS:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unsupported format: {fmt}")
+    name = safe_name(params.pop("name", "")) or "document.pdf"
+    options = {}
+    for key, value in params.items():
+        if key not in OPTIONS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown option: {key}")
+        try:
+            options[key] = OPTIONS[key](value)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid value for {key}: {value}")
+    return fmt, name, options
+
+class ConversionService:
+    def __init__(self, port=None, workers=None, max_queue=None, max_upload_mb=None):
+        self.port = config.get_service_port() if port is None else port
+        self.workers = workers or config.get_service_workers()
+        self.max_queue = config.get_service_max_queue() if max_queue is None else max_queue
+        self.max_upload = (max_upload_mb or config.get_service_max_upload_mb()) * 1024 * 1024
+        self.cache_enabled = config.get_cache_enabled()
+        self.started = time.time()
+        self.pool = None
+        self.server = None
+        self._slots = None
+        self.running = 0
+        self.queued = 0
+        self.counts = dict.fromkeys(("requests", "completed", "failed", "rejected"), 0)
+        self.pages = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)   # Seconds from upload to result
+        self.queue_waits = deque(maxlen=LATENCY_SAMPLES) # Seconds waited for a worker
+        self.finished = deque()                          # (time, pages) of recent conversions
+
+    def make_pool(self):
+        # Forked workers would inherit the sockets of requests open at that
+        # moment and keep those connections from closing; spawned ones don't
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def start(self):
+        self.pool = self.make_pool()
+        self._slots = asyncio.Semaphore(self.workers)
+        self.server = await asyncio.start_server(self.handle, HOST, self.port, limit=MAX_HEADER_BYTES)
+        # Port 0 picks a free port; report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve(self):
+        await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+    def run(self):
+        """Serves until interrupted, then returns the final metrics."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        return self.metrics()
+
+    def health(self):
+        return {
+            "status": "ok",
+            "running": self.running,
+            "queued": self.queued,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    def metrics(self):
+        now = time.time()
+        while self.finished and self.finished[0][0] < now - THROUGHPUT_WINDOW:
+            self.finished.popleft()
+        window = min(THROUGHPUT_WINDOW, max(now - self.started, 1e-3))
+        def percentiles(values):
+            if not values:
+                return {"p50": None, "p95": None, "p99": None}
+            return {f"p{pct}": round(percentile(values, pct), 4) for pct in (50, 95, 99)}
+        return {
+            **self.counts,
+            "running": self.running,
+            "queue_depth": self.queued,
+            "pages": self.pages,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "uptime_s": round(now - self.started, 1),
+            "throughput": {
+                "window_s": round(window, 1),
+                "requests_per_s": round(len(self.finished) / window, 3),
+                "pages_per_s": round(sum(pages for _, pages in self.finished) / window, 2),
+            },
+            "latency_s": percentiles(self.latencies),
+            "queue_wait_s": percentiles(self.queue_waits),
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                method, path, headers = await self.read_head(reader)
+                url = urlsplit(path)
+                if url.path == "/health" and method == "GET":
+                    await self.send_json(writer, HTTPStatus.OK, self.health())
+                elif url.path == "/metrics" and method == "GET":
+                    await self.send_json(writer, HTTPStatus.OK, self.metrics())
+                elif url.path == "/convert" and method == "POST":
+                    await self.convert(reader, writer, url.query, headers)
+                elif url.path in ("/health", "/metrics", "/convert"):
+                    raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {url.path}")
+                else:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"No such endpoint: {url.path}")
+            except HTTPError as e:
+                await self.send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass # Client went away
+        finally:
+            writer.close()
+
+    async def read_head(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request header too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            key, sep, value = line.partition(":")
+            if sep:
+                headers[key.strip().lower()] = value.strip()
+        return method.upper(), path, headers
+
+    async def read_body(self, reader, headers, f):
+        """Copies the request body to f, plain or chunked; returns its size."""
+        size = 0
+        def take(data):
+            nonlocal size
+            size += len(data)
+            if size > self.max_upload:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                f"Upload larger than {self.max_upload // (1024 * 1024)} MB")
+            f.write(data)
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                line = await reader.readline()
+                try:
+                    length = int(line.split(b";")[0].strip(), 16)
+                except ValueError:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed chunked body")
+                if length == 0:
+                    # Skip trailers up to the final empty line
+                    while (await reader.readline()).strip():
+                        pass
+                    return size
+                while length:
+                    data = await reader.readexactly(min(length, READ_CHUNK))
+                    length -= len(data)
+                    take(data)
+                await reader.readexactly(2)
+        try:
+            remaining = int(headers["content-length"])
+        except (KeyError, ValueError):
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Content-Length or chunked body required")
+        if remaining > self.max_upload:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            f"Upload larger than {self.max_upload // (1024 * 1024)} MB")
+        while remaining:
+            data = await reader.read(min(remaining, READ_CHUNK))
+            if not data:
+                raise asyncio.IncompleteReadError(b"", remaining)
+            remaining -= len(data)
+            take(data)
+        return size
+
+    async def convert(self, reader, writer, query, headers):
+        self.counts["requests"] += 1
+        fmt, name, options = parse_options(query)
+        # Turned away before the upload is read, so a full service costs clients little.
+        # Idle workers take requests straight away, so they don't count against the queue.
+        if self.queued >= self.max_queue + self.workers - self.running:
+            self.counts["rejected"] += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Conversion queue is full",
+                            {"Retry-After": str(RETRY_AFTER)})
+        t0 = time.perf_counter()
+        work_dir = tempfile.mkdtemp(prefix="pdf-service-")
+        self.queued += 1
+        queued = True
+        try:
+            pdf_path = os.path.join(work_dir, name if name.lower().endswith(".pdf") else name + ".pdf")
+            with open(pdf_path, 'wb') as f:
+                self.bytes_in += await self.read_body(reader, headers, f)
+            waited = time.perf_counter()
+            async with self._slots:
+                self.queued -= 1
+                queued = False
+                self.running += 1
+                self.queue_waits.append(time.perf_counter() - waited)
+                pool = self.pool
+                try:
+                    result, pages, cached = await asyncio.get_running_loop().run_in_executor(
+                        pool, _convert, pdf_path, fmt, os.path.join(work_dir, "out"),
+                        options, self.cache_enabled)
+                except BrokenProcessPool:
+                    # A worker died, e.g. out of memory; later requests get a fresh pool
+                    self.counts["failed"] += 1
+                    self.replace_pool(pool)
+                    raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, "Conversion worker crashed")
+                except Exception as e:
+                    self.counts["failed"] += 1
+                    status = HTTPStatus.BAD_REQUEST if isinstance(e, ValueError) else HTTPStatus.INTERNAL_SERVER_ERROR
+                    raise HTTPError(status, str(e))
+                finally:
+                    self.running -= 1
+            self.counts["completed"] += 1
+            self.pages += pages
+            self.finished.append((time.time(), pages))
+            self.latencies.append(time.perf_counter() - t0)
+
+            kind = "zip" if result.endswith(".zip") else fmt
+            filename = os.path.basename(result)
+            if kind == "zip":
+                filename = os.path.splitext(name)[0] + f"_{fmt}.zip"
+            await self.send_file(writer, result, CONTENT_TYPES.get(kind, "application/octet-stream"), {
+                "Content-Disposition": content_disposition(filename),
+                "X-Pages": str(pages),
+                "X-Cached": "1" if cached else "0",
+            })
+        finally:
+            if queued:
+                self.queued -= 1
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def replace_pool(self, broken):
+        # Every request on the broken pool fails with it; only the first replaces it.
+        # Nothing awaits in between, so the event loop makes this atomic.
+        if broken is self.pool:
+            self.pool = self.make_pool()
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    def send_head(self, writer, status, headers):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", "Connection: close"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def send_json(self, writer, status, data, headers=None):
+        body = json.dumps(data, indent=1).encode("utf-8")
+        self.send_head(writer, status, {"Content-Type": "application/json",
+                                              "Content-Length": len(body), **(headers or {})})
+        writer.write(body)
+        await writer.drain()
+
+    async def send_file(self, writer, path, content_type, headers):
+        size = os.path.getsize(path)
+        self.send_head(writer, HTTPStatus.OK, {"Content-Type": content_type,
+                                                      "Content-Length": size, **headers})
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(READ_CHUNK)
+                if not data:
+                    break
+                writer.write(data)
+                # Waits while the client is slower than the disk, so memory stays flat
+                await writer.drain()
+        self.bytes_out += size
@@ -0,0 +1,161 @@
+"""Extracted page text shared by the preview, search and TXT export.
+
+Text is kept per document fingerprint and extraction backend, since
+PyMuPDF and pdfminer lay out the same page differently. Everything
+extracted in a session stays in memory up to a size budget. With the
+disk cache switched on, a document whose pages are all known is also
+written to a gzip file, so it is not extracted again after a restart.
+"""
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from . import config
+
+BACKENDS = ("pymupdf", "pdfminer")
+
+def get_text_cache_dir():
+    path = os.path.join(config.get_app_data_dir(), "text_cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class _Document:
+    def __init__(self, page_count):
+        self.page_count = page_count
+        self.pages = {}
+        self.size = 0
+        self.saved = False
+
+    @property
+    def complete(self):
+        return len(self.pages) >= self.page_count
+
+class TextCache:
+    """Page text by (fingerprint, backend), least recently used documents dropped first."""
+
+    def __init__(self, max_bytes=None, disk=None, cache_dir=None, max_disk_bytes=None):
+        self.max_bytes = max_bytes if max_bytes is not None else config.get_text_cache_mb() * 1024 * 1024
+        self.disk = config.get_text_cache_disk() if disk is None else disk
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = (max_disk_bytes if max_disk_bytes is not None
+                               else config.get_cache_size_mb() * 1024 * 1024)
+        self.docs = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, fingerprint, backend):
+        return os.path.join(self.cache_dir or get_text_cache_dir(), f"{fingerprint}-{backend}.json.gz")
+
+    def _document(self, fingerprint, backend, page_count):
+        key = (fingerprint, backend)
+        doc = self.docs.get(key)
+        if doc is None:
+            doc = self._load(fingerprint, backend) or _Document(page_count)
+            self.docs[key] = doc
+            self.size += doc.size
+            self._evict()
+        self.docs.move_to_end(key)
+        return doc
+
+    def get(self, fingerprint, backend, page_num, page_count):
+        """Returns the cached text of a page, or None."""
+        with self._lock:
+            text = self._document(fingerprint, backend, page_count).pages.get(page_num)
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return text
+
+    def put(self, fingerprint, backend, page_num, text, page_count):
+        with self._lock:
+            doc = self._document(fingerprint, backend, page_count)
+            if page_num in doc.pages:
+                return
+            if doc.size + len(text) > self.max_bytes:
+                # Exports feed every page through here; past the budget memory
+                # would grow with the document, so the rest isn't kept
+                return
+            doc.pages[page_num] = text
+            doc.size += len(text)
+            self.size += len(text)
+            if doc.complete and self.disk and not doc.saved:
+                self._save(fingerprint, backend, doc)
+            self._evict()
+
+    def _evict(self):
+        # Never drop the document in use; put() keeps it within the budget
+        while self.size > self.max_bytes and len(self.docs) > 1:
+            _, doc = self.docs.popitem(last=False)
+            self.size -= doc.size
+
+    def _load(self, fingerprint, backend):
+        if not self.disk:
+            return None
+        try:
+            with gzip.open(self._path(fingerprint, backend), 'rt', encoding='utf-8') as f:
+                pages = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return None
+        doc = _Document(len(pages))
+        doc.pages = dict(enumerate(pages))
+        doc.size = sum(len(text) for text in pages)
+        doc.saved = True
+        return doc
+
+    def _save(self, fingerprint, backend, doc):
+        path = self._path(fingerprint, backend)
+        try:
+            with gzip.open(path + ".tmp", 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump([doc.pages[i] for i in range(doc.page_count)], f)
+            os.replace(path + ".tmp", path)
+            doc.saved = True
+            self._prune_disk()
+        except OSError:
+            pass # A full or read-only disk only costs the next run an extraction
+
+    def _prune_disk(self):
+        cache_dir = self.cache_dir or get_text_cache_dir()
+        entries = []
+        total = 0
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            st = os.stat(path)
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self.docs.clear()
+            self.size = 0
+            if self.disk:
+                cache_dir = self.cache_dir or get_text_cache_dir()
+                for name in os.listdir(cache_dir):
+                    os.remove(os.path.join(cache_dir, name))
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def get_text_cache():
+    """Returns the text cache shared by everything in this process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TextCache()
+        return _shared
+
+def reset_text_cache(cache=None):
+    """Replaces the shared cache with cache, or drops it so the next
+    get_text_cache() builds one from the current settings."""
+    global _shared
+    with _shared_lock:
+        _shared = cache
@@ -2,8 +2,13 @@ import wx
 import os
 import threading
 from .pdf_viewer import PDFViewer
-from .converter import ConverterLogic
-from . import config
+from .preview import PreviewLoader, LOADING_TEXT
+from .converter import ConverterLogic, ConversionCancelled, output_path_for
+from .cache import ConversionCache
+from .text_cache import get_text_cache, reset_text_cache
+from .search_index import SearchIndex, DocumentIndexer
+from .job_queue import ConversionQueue, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+from . import backends, config, raster
 from .i18n import _
 import modules.i18n as i18n
 
@@ -17,6 +22,10 @@ COLOR_ACCENT = "#007ACC" # Blue
 COLOR_PANEL = "#3C3C3C" # Components BG
 COLOR_BUTTON = "#505050" 
 
+# Delay before the conversion backends are preloaded in the background
+WARM_UP_DELAY_MS = 1500
+SEARCH_LIMIT = 1000 # Most search hits listed for one document
+
 class DarkPanel(wx.Panel):
     def __init__(self, parent, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
@@ -24,8 +33,9 @@ class DarkPanel(wx.Panel):
         self.SetForegroundColour(COLOR_FG)
 
 class SettingsDialog(wx.Dialog):
-    def __init__(self, parent):
-        super().__init__(parent, title=_("Settings"), size=(400, 300))
+    def __init__(self, parent, cache=None):
+        super().__init__(parent, title=_("Settings"), size=(400, 460))
+        self.cache = cache
         self.SetBackgroundColour(COLOR_BG)
         self.SetForegroundColour(COLOR_FG)
         
@@ -58,6 +68,73 @@ class SettingsDialog(wx.Dialog):
         general_panel.SetSizer(vbox)
         notebook.AddPage(general_panel, _("General"))
         
+        # Performance Tab
+        perf_panel = wx.Panel(notebook)
+        perf_panel.SetBackgroundColour(COLOR_BG)
+        perf_panel.SetForegroundColour(COLOR_FG)
+        
+        pbox = wx.BoxSizer(wx.VERTICAL)
+        
+        lbl_workers = wx.StaticText(perf_panel, label=_("Worker processes (0 = one per CPU):"))
+        lbl_workers.SetForegroundColour(COLOR_FG)
+        pbox.Add(lbl_workers, 0, wx.ALL, 10)
+        
+        self.spin_workers = wx.SpinCtrl(perf_panel, min=0, max=256, initial=config.get_worker_count())
+        pbox.Add(self.spin_workers, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        
+        lbl_chunk = wx.StaticText(perf_panel, label=_("Pages per worker chunk:"))
+        lbl_chunk.SetForegroundColour(COLOR_FG)
+        pbox.Add(lbl_chunk, 0, wx.ALL, 10)
+        
+        self.spin_chunk = wx.SpinCtrl(perf_panel, min=1, max=10000, initial=config.get_chunk_size())
+        pbox.Add(self.spin_chunk, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        
+        lbl_queue = wx.StaticText(perf_panel, label=_("Queued conversions running at once:"))
+        lbl_queue.SetForegroundColour(COLOR_FG)
+        pbox.Add(lbl_queue, 0, wx.ALL, 10)
+        
+        self.spin_queue = wx.SpinCtrl(perf_panel, min=1, max=64, initial=config.get_queue_workers())
+        pbox.Add(self.spin_queue, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        
+        perf_panel.SetSizer(pbox)
+        notebook.AddPage(perf_panel, _("Performance"))
+        
+        # Cache Tab
+        cache_panel = wx.Panel(notebook)
+        cache_panel.SetBackgroundColour(COLOR_BG)
+        cache_panel.SetForegroundColour(COLOR_FG)
+        
+        cbox = wx.BoxSizer(wx.VERTICAL)
+        
+        self.chk_cache = wx.CheckBox(cache_panel, label=_("Reuse previous results for unchanged files"))
+        self.chk_cache.SetForegroundColour(COLOR_FG)
+        self.chk_cache.SetValue(config.get_cache_enabled())
+        cbox.Add(self.chk_cache, 0, wx.ALL, 10)
+        
+        lbl_cache_size = wx.StaticText(cache_panel, label=_("Cache size limit (MB):"))
+        lbl_cache_size.SetForegroundColour(COLOR_FG)
+        cbox.Add(lbl_cache_size, 0, wx.ALL, 10)
+        
+        self.spin_cache_size = wx.SpinCtrl(cache_panel, min=16, max=1024 * 1024, initial=config.get_cache_size_mb())
+        cbox.Add(self.spin_cache_size, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 10)
+        
+        self.chk_text_disk = wx.CheckBox(cache_panel, label=_("Keep extracted text on disk (compressed)"))
+        self.chk_text_disk.SetForegroundColour(COLOR_FG)
+        self.chk_text_disk.SetValue(config.get_text_cache_disk())
+        cbox.Add(self.chk_text_disk, 0, wx.ALL, 10)
+        
+        self.lbl_cache_stats = wx.StaticText(cache_panel, label="")
+        self.lbl_cache_stats.SetForegroundColour(COLOR_FG)
+        cbox.Add(self.lbl_cache_stats, 0, wx.ALL, 10)
+        
+        btn_clear = wx.Button(cache_panel, label=_("Clear Cache"))
+        btn_clear.Bind(wx.EVT_BUTTON, self.on_clear_cache)
+        cbox.Add(btn_clear, 0, wx.LEFT | wx.RIGHT, 10)
+        
+        cache_panel.SetSizer(cbox)
+        notebook.AddPage(cache_panel, _("Cache"))
+        self.update_cache_stats()
+        
         # Main Layout
         main_sizer = wx.BoxSizer(wx.VERTICAL)
         main_sizer.Add(notebook, 1, wx.EXPAND | wx.ALL, 10)
@@ -81,9 +158,36 @@ class SettingsDialog(wx.Dialog):
             return self.languages[idx]
         return 'en'
 
+    def get_performance(self):
+        return self.spin_workers.GetValue(), self.spin_chunk.GetValue()
+
+    def get_queue_workers(self):
+        return self.spin_queue.GetValue()
+
+    def get_cache_settings(self):
+        return self.chk_cache.GetValue(), self.spin_cache_size.GetValue()
+
+    def get_text_cache_disk(self):
+        return self.chk_text_disk.GetValue()
+
+    def update_cache_stats(self):
+        if not self.cache:
+            self.lbl_cache_stats.SetLabel(_("Cache is disabled."))
+            return
+        stats = self.cache.stats()
+        self.lbl_cache_stats.SetLabel(
+            _("Entries: {} ({:.1f} MB)\nThis session: {} hits, {} misses").format(
+                stats['entries'], stats['bytes'] / (1024 * 1024), stats['hits'], stats['misses']))
+
+    def on_clear_cache(self, event):
+        if self.cache:
+            self.cache.clear()
+        get_text_cache().clear()
+        self.update_cache_stats()
+
 class ConversionProgressDialog(wx.Dialog):
     def __init__(self, parent):
-        super().__init__(parent, title=_("Converting..."), size=(400, 300), style=wx.CAPTION)
+        super().__init__(parent, title=_("Converting..."), size=(400, 340), style=wx.CAPTION)
         self.SetBackgroundColour(COLOR_BG)
         self.SetForegroundColour(COLOR_FG)
         
@@ -99,21 +203,58 @@ class ConversionProgressDialog(wx.Dialog):
         lbl.SetForegroundColour(COLOR_FG)
         vbox.Add(lbl, 0, wx.ALL | wx.ALIGN_CENTER, 15)
         
+        # Page Progress
+        self.gauge = wx.Gauge(panel, range=100)
+        vbox.Add(self.gauge, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 15)
+        
+        self.lbl_stats = wx.StaticText(panel, label="")
+        self.lbl_stats.SetForegroundColour(COLOR_FG)
+        vbox.Add(self.lbl_stats, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 15)
+        
         # Log Box
         self.log_text = wx.TextCtrl(panel, style=wx.TE_MULTILINE | wx.TE_READONLY)
         self.log_text.SetBackgroundColour(COLOR_PANEL)
         self.log_text.SetForegroundColour(COLOR_FG)
         vbox.Add(self.log_text, 1, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.BOTTOM, 15)
         
+        # Set by the Cancel button; the converter checks it after every page
+        self.cancel_event = threading.Event()
+        self.btn_cancel = wx.Button(panel, wx.ID_CANCEL, label=_("Cancel"))
+        self.btn_cancel.Bind(wx.EVT_BUTTON, self.on_cancel)
+        vbox.Add(self.btn_cancel, 0, wx.ALIGN_CENTER | wx.BOTTOM, 15)
+        
         panel.SetSizer(vbox)
         self.CenterOnParent()
 
+    def on_cancel(self, event):
+        self.cancel_event.set()
+        self.btn_cancel.Disable()
+        self.append_log(_("Cancelling, finished parts are kept so the conversion can resume later..."))
+
     def append_log(self, msg):
         wx.CallAfter(self.log_text.AppendText, msg + "\n")
 
+    def update_progress(self, current, total):
+        # Called from the conversion thread, once per page
+        wx.CallAfter(self._set_progress, current, total)
+
+    def _set_progress(self, current, total):
+        if total > 0:
+            self.gauge.SetRange(total)
+            self.gauge.SetValue(min(current, total))
+
+    def update_stats(self, snapshot):
+        # Called from the conversion thread with a metrics snapshot
+        wx.CallAfter(self._set_stats, snapshot)
+
+    def _set_stats(self, snapshot):
+        minutes, seconds = divmod(int(snapshot['eta']), 60)
+        self.lbl_stats.SetLabel(_("{} / {} pages, {:.1f} pages/s, about {}:{:02d} left").format(
+            snapshot['pages'], snapshot['total_pages'], snapshot['pages_per_s'], minutes, seconds))
+
 class ConvertOptionsDialog(wx.Dialog):
     def __init__(self, parent, default_path):
-        super().__init__(parent, title=_("Conversion Options"), size=(450, 300))
+        super().__init__(parent, title=_("Conversion Options"), size=(450, 790))
         self.SetBackgroundColour(COLOR_BG)
         self.SetForegroundColour(COLOR_FG)
         
@@ -124,13 +265,71 @@ class ConvertOptionsDialog(wx.Dialog):
         vbox = wx.BoxSizer(wx.VERTICAL)
         
         # --- Format Section ---
-        lbl_fmt = wx.StaticText(panel, label=_("Select Output Format:"))
+        lbl_fmt = wx.StaticText(panel, label=_("Select Output Formats:"))
         lbl_fmt.SetForegroundColour(COLOR_FG)
         vbox.Add(lbl_fmt, 0, wx.LEFT | wx.RIGHT | wx.TOP, 15)
         
-        self.combo_format = wx.ComboBox(panel, choices=["TXT", "HTML", "DOCX"], style=wx.CB_READONLY)
-        self.combo_format.SetSelection(0)
-        vbox.Add(self.combo_format, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 15)
+        # Text formats checked together are extracted in a single pass
+        self.format_keys = ["txt", "html", "xhtml", "json", "docx", "images", "pages"]
+        self.list_formats = wx.CheckListBox(panel, choices=["TXT", "HTML", "XHTML", "JSON", "DOCX", _("Images"),
+                                                            _("Page Images")])
+        self.list_formats.SetBackgroundColour(COLOR_PANEL)
+        self.list_formats.SetForegroundColour(COLOR_FG)
+        self.list_formats.Check(0)
+        vbox.Add(self.list_formats, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 15)
+        
+        # --- TXT Section ---
+        lbl_backend = wx.StaticText(panel, label=_("TXT extraction:"))
+        lbl_backend.SetForegroundColour(COLOR_FG)
+        vbox.Add(lbl_backend, 0, wx.LEFT | wx.RIGHT | wx.TOP, 15)
+        
+        self.txt_backends = ["pdfminer", "pymupdf"]
+        self.choice_backend = wx.Choice(panel, choices=[_("Layout-faithful (pdfminer)"), _("Fast (PyMuPDF)")])
+        self.choice_backend.SetSelection(self.txt_backends.index(config.get_txt_backend()))
+        vbox.Add(self.choice_backend, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 15)
+        
+        # --- HTML Split Section ---
+        lbl_split = wx.StaticText(panel, label=_("HTML pages per file (0 = single file):"))
+        lbl_split.SetForegroundColour(COLOR_FG)
+        vbox.Add(lbl_split, 0, wx.LEFT | wx.RIGHT | wx.TOP, 15)
+        
+        self.spin_split = wx.SpinCtrl(panel, min=0, max=100000, initial=0)
+        vbox.Add(self.spin_split, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 15)
+        
+        # --- DOCX Section ---
+        lbl_docx_workers = wx.StaticText(panel, label=_("DOCX worker processes (1 = single process):"))
+        lbl_docx_workers.SetForegroundColour(COLOR_FG)
+        vbox.Add(lbl_docx_workers, 0, wx.LEFT | wx.RIGHT | wx.TOP, 15)
+        
+        self.spin_docx_workers = wx.SpinCtrl(panel, min=1, max=256, initial=1)
+        vbox.Add(self.spin_docx_workers, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 15)
+        
+        lbl_pages = wx.StaticText(panel, label=_("DOCX pages (e.g. 1-50,120-140, empty = all):"))
+        lbl_pages.SetForegroundColour(COLOR_FG)
+        vbox.Add(lbl_pages, 0, wx.LEFT | wx.RIGHT | wx.TOP, 15)
+        
+        self.txt_pages = wx.TextCtrl(panel)
+        self.txt_pages.SetBackgroundColour(COLOR_PANEL)
+        self.txt_pages.SetForegroundColour(COLOR_FG)
+        vbox.Add(self.txt_pages, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 15)
+        
+        # --- Page Images Section ---
+        lbl_sizes = wx.StaticText(panel, label=_("Page image sizes (e.g. full=150dpi,thumb=160):"))
+        lbl_sizes.SetForegroundColour(COLOR_FG)
+        vbox.Add(lbl_sizes, 0, wx.LEFT | wx.RIGHT | wx.TOP, 15)
+        
+        hbox_raster = wx.BoxSizer(wx.HORIZONTAL)
+        self.txt_sizes = wx.TextCtrl(panel, value=config.get_raster_sizes())
+        self.txt_sizes.SetBackgroundColour(COLOR_PANEL)
+        self.txt_sizes.SetForegroundColour(COLOR_FG)
+        
+        self.raster_formats = ["png", "jpeg"]
+        self.choice_raster = wx.Choice(panel, choices=["PNG", "JPEG"])
+        self.choice_raster.SetSelection(self.raster_formats.index(config.get_raster_format()))
+        
+        hbox_raster.Add(self.txt_sizes, 1, wx.RIGHT, 5)
+        hbox_raster.Add(self.choice_raster, 0)
+        vbox.Add(hbox_raster, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 15)
         
         # --- Output Path Section ---
         lbl_path = wx.StaticText(panel, label=_("Output Folder:"))
@@ -154,11 +353,14 @@ class ConvertOptionsDialog(wx.Dialog):
         vbox.AddStretchSpacer(1)
         hbox_btns = wx.BoxSizer(wx.HORIZONTAL)
         btn_convert = wx.Button(panel, wx.ID_OK, label=_("Convert"))
+        btn_queue = wx.Button(panel, wx.ID_ADD, label=_("Add to Queue"))
+        btn_queue.Bind(wx.EVT_BUTTON, lambda event: self.EndModal(wx.ID_ADD))
         btn_cancel = wx.Button(panel, wx.ID_CANCEL, label="Cancel")
         
         btn_convert.SetDefault()
         
         hbox_btns.Add(btn_convert, 1, wx.RIGHT, 10)
+        hbox_btns.Add(btn_queue, 1, wx.RIGHT, 10)
         hbox_btns.Add(btn_cancel, 1)
         
         vbox.Add(hbox_btns, 0, wx.EXPAND | wx.ALL, 15)
@@ -174,9 +376,119 @@ class ConvertOptionsDialog(wx.Dialog):
 
     def get_settings(self):
         return {
-            "format": self.combo_format.GetValue().lower(),
-            "path": self.txt_path.GetValue()
+            "formats": [self.format_keys[i] for i in self.list_formats.GetCheckedItems()],
+            "txt_backend": self.txt_backends[self.choice_backend.GetSelection()],
+            "path": self.txt_path.GetValue(),
+            "pages_per_file": self.spin_split.GetValue(),
+            "docx_workers": self.spin_docx_workers.GetValue(),
+            "page_ranges": self.txt_pages.GetValue().strip(),
+            "raster_sizes": self.txt_sizes.GetValue().strip(),
+            "raster_format": self.raster_formats[self.choice_raster.GetSelection()],
+        }
+
+    def validate(self, settings):
+        """Returns an error message for settings that can't be converted, else None."""
+        if not settings['formats']:
+            return _("Please select at least one output format.")
+        if "pages" in settings['formats']:
+            try:
+                raster.parse_sizes(settings['raster_sizes'])
+            except ValueError as e:
+                return _("Invalid page image sizes: {}").format(e)
+        return None
+
+class QueueFrame(wx.Frame):
+    """Lists queued conversions with their status and throughput."""
+
+    def __init__(self, parent, conversion_queue):
+        super().__init__(parent, title=_("Conversion Queue"), size=(750, 420))
+        self.queue = conversion_queue
+        self.status_labels = {
+            QUEUED: _("Queued"),
+            RUNNING: _("Running"),
+            DONE: _("Done"),
+            FAILED: _("Failed"),
+            CANCELLED: _("Cancelled"),
         }
+        self.SetBackgroundColour(COLOR_BG)
+        
+        panel = wx.Panel(self)
+        panel.SetBackgroundColour(COLOR_BG)
+        panel.SetForegroundColour(COLOR_FG)
+        
+        vbox = wx.BoxSizer(wx.VERTICAL)
+        
+        self.list = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        self.list.SetBackgroundColour(COLOR_PANEL)
+        self.list.SetForegroundColour(COLOR_FG)
+        for col, (label, width) in enumerate(((_("File"), 220), (_("Formats"), 110), (_("Status"), 90),
+                                               (_("Pages"), 100), (_("Pages/s"), 80), (_("Error"), 140))):
+            self.list.InsertColumn(col, label, width=width)
+        vbox.Add(self.list, 1, wx.EXPAND | wx.ALL, 10)
+        
+        hbox_btns = wx.BoxSizer(wx.HORIZONTAL)
+        for label, handler in ((_("Cancel"), self.on_cancel_item), (_("Retry"), self.on_retry),
+                               (_("Remove"), self.on_remove), (_("Clear Finished"), self.on_clear_finished)):
+            btn = wx.Button(panel, label=label)
+            btn.Bind(wx.EVT_BUTTON, handler)
+            hbox_btns.Add(btn, 1, wx.RIGHT, 10)
+        vbox.Add(hbox_btns, 0, wx.EXPAND | wx.LEFT | wx.BOTTOM, 10)
+        
+        panel.SetSizer(vbox)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+        self.refresh()
+
+    def refresh(self):
+        self.list.DeleteAllItems()
+        for item in self.queue.items:
+            row = self.list.InsertItem(self.list.GetItemCount(), os.path.basename(item['pdf_path']))
+            self.list.SetItemData(row, item['id'])
+            self._set_row(row, item)
+
+    def _set_row(self, row, item):
+        self.list.SetItem(row, 1, ", ".join(item['formats']).upper())
+        self.list.SetItem(row, 2, self.status_labels[item['status']])
+        self.list.SetItem(row, 3, f"{item['pages']} / {item['total_pages']}" if item['total_pages'] else "")
+        self.list.SetItem(row, 4, f"{item['pages_per_s']:.1f}" if item['pages_per_s'] else "")
+        self.list.SetItem(row, 5, item['error'])
+
+    def update_item(self, item):
+        # Called on the UI thread whenever the queue reports a change
+        row = self.list.FindItem(-1, item['id'])
+        if row == wx.NOT_FOUND:
+            self.refresh()
+        else:
+            self._set_row(row, item)
+
+    def selected_id(self):
+        row = self.list.GetFirstSelected()
+        return self.list.GetItemData(row) if row != wx.NOT_FOUND else None
+
+    def on_cancel_item(self, event):
+        item_id = self.selected_id()
+        if item_id is not None:
+            self.queue.cancel(item_id)
+
+    def on_retry(self, event):
+        item_id = self.selected_id()
+        if item_id is not None:
+            self.queue.retry(item_id)
+
+    def on_remove(self, event):
+        item_id = self.selected_id()
+        if item_id is not None and self.queue.remove(item_id):
+            self.refresh()
+
+    def on_clear_finished(self, event):
+        self.queue.clear_finished()
+        self.refresh()
+
+    def on_close(self, event):
+        # Keep the window around so reopening it is instant
+        if event.CanVeto():
+            self.Hide()
+        else:
+            event.Skip()
 
 class AboutDialog(wx.Dialog):
     def __init__(self, parent):
@@ -222,13 +534,25 @@ class MainFrame(wx.Frame):
         self.SetBackgroundColour(COLOR_BG)
         
         self.viewer = None
-        self.logic = ConverterLogic()
+        self.cache = ConversionCache() if config.get_cache_enabled() else None
+        self.search_index = self.open_search_index()
+        self.logic = ConverterLogic(cache=self.cache)
+        self.logic.search_index = self.search_index
         self.selected_file = None
+        self.indexer = None
+        self.search_query = ""
+        self.search_hits = []
+        self.search_pos = 0
         self.progress_dialog = None
+        self.queue_frame = None
+        self.queue = ConversionQueue(on_change=self.on_queue_change)
+        self.queue.start()
         
         self.init_ui()
         self.Center()
         self.Show()
+        # Backends are imported lazily; preload them once the window is up
+        wx.CallLater(WARM_UP_DELAY_MS, backends.start_warm_up)
 
     def init_ui(self):
         self.main_sizer = wx.BoxSizer(wx.VERTICAL)
@@ -241,6 +565,8 @@ class MainFrame(wx.Frame):
         self.m_open = file_menu.Append(wx.ID_OPEN, _("&Open PDF\tCtrl+O"), _("Open a PDF file for reading"))
         self.m_close = file_menu.Append(wx.ID_CLOSE, _("Close PDF\tCtrl+F4"), _("Close the current PDF"))
         self.m_close.Enable(False) # Initially disabled
+        self.m_add_queue = file_menu.Append(wx.ID_ANY, _("Add Files to &Queue...\tCtrl+Shift+O"),
+                                            _("Queue several PDF files for conversion"))
         file_menu.AppendSeparator()
         self.m_exit = file_menu.Append(wx.ID_EXIT, _("E&xit\tAlt+F4"), _("Exit the application"))
         
@@ -248,6 +574,11 @@ class MainFrame(wx.Frame):
         tools_menu = wx.Menu()
         self.m_convert = tools_menu.Append(wx.ID_ANY, _("&Convert Options...\tAlt+C"), _("Open conversion options"))
         self.m_convert.Enable(False)
+        self.m_find = tools_menu.Append(wx.ID_FIND, _("&Find...\tCtrl+F"), _("Search the text of the document"))
+        self.m_find_next = tools_menu.Append(wx.ID_ANY, _("Find &Next\tF3"), _("Go to the next search result"))
+        self.m_find.Enable(False)
+        self.m_find_next.Enable(False)
+        self.m_queue = tools_menu.Append(wx.ID_ANY, _("Conversion &Queue...\tCtrl+J"), _("Show queued conversions"))
         tools_menu.AppendSeparator()
         self.m_options = tools_menu.Append(wx.ID_ANY, _("&Settings...\tF4"), _("Open application settings"))
         
@@ -265,15 +596,28 @@ class MainFrame(wx.Frame):
         self.Bind(wx.EVT_MENU, self.on_close_pdf, self.m_close)
         self.Bind(wx.EVT_MENU, self.on_exit, self.m_exit)
         self.Bind(wx.EVT_MENU, self.on_convert_options, self.m_convert)
+        self.Bind(wx.EVT_MENU, self.on_add_to_queue, self.m_add_queue)
+        self.Bind(wx.EVT_MENU, self.on_find, self.m_find)
+        self.Bind(wx.EVT_MENU, self.on_find_next, self.m_find_next)
+        self.Bind(wx.EVT_MENU, self.on_show_queue, self.m_queue)
         self.Bind(wx.EVT_MENU, self.on_options, self.m_options)
         self.Bind(wx.EVT_MENU, self.on_about, self.m_about)
+        self.Bind(wx.EVT_CLOSE, self.on_close_window)
 
+        # --- Search Box ---
+        self.search_ctrl = wx.SearchCtrl(self, style=wx.TE_PROCESS_ENTER)
+        self.search_ctrl.SetDescriptiveText(_("Search in document"))
+        self.search_ctrl.Enable(False)
+        self.search_ctrl.Bind(wx.EVT_TEXT_ENTER, self.on_search)
+        
         # --- Preview Area (Accessible Text Box) ---
         self.preview_text = wx.TextCtrl(self, style=wx.TE_MULTILINE | wx.TE_READONLY | wx.TE_RICH2)
         self.preview_text.SetBackgroundColour(COLOR_PANEL)
         self.preview_text.SetForegroundColour(COLOR_FG)
         self.preview_text.SetFont(wx.Font(11, wx.FONTFAMILY_MODERN, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
         self.preview_text.SetValue(_("Welcome. Press Ctrl+O to open a PDF file."))
+        # One loader for the control; each opened document is handed to its load()
+        self.preview = PreviewLoader(self.preview_text)
         
         # --- Status Bar ---
         self.status_bar = self.CreateStatusBar()
@@ -282,6 +626,7 @@ class MainFrame(wx.Frame):
         self.status_bar.SetStatusText(_("Ready - Please select a PDF file."))
 
         # Layout
+        self.main_sizer.Add(self.search_ctrl, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, 10)
         self.main_sizer.Add(self.preview_text, 1, wx.EXPAND | wx.ALL, 10)
         
         self.SetSizer(self.main_sizer)
@@ -289,19 +634,100 @@ class MainFrame(wx.Frame):
     def on_exit(self, event):
         self.Close()
 
+    def on_close_window(self, event):
+        self.stop_preview()
+        self.stop_indexing()
+        # Running conversions are saved as queued and continue next time
+        self.queue.stop()
+        event.Skip()
+
+    def stop_preview(self):
+        self.preview.stop()
+
+    def open_search_index(self):
+        try:
+            return SearchIndex()
+        except Exception:
+            # SQLite without FTS5 or an unwritable app data folder; search is off
+            return None
+
+    def start_indexing(self, path, page_count):
+        self.stop_indexing()
+        if self.search_index is None:
+            return
+        # Filled by the preview thread, which extracts the missing pages when idle
+        self.indexer = DocumentIndexer(self.search_index, path, page_count)
+
+    def stop_indexing(self):
+        self.indexer = None
+        self.search_query = ""
+        self.search_hits = []
+
+    def on_find(self, event):
+        self.search_ctrl.SetFocus()
+        self.search_ctrl.SelectAll()
+
+    def on_search(self, event):
+        query = self.search_ctrl.GetValue().strip()
+        if not query or not self.indexer or not self.preview:
+            return
+        if query == self.search_query and self.search_hits:
+            self.on_find_next(None)
+            return
+        
+        hits = self.search_index.search(query, fingerprint=self.indexer.fingerprint, limit=SEARCH_LIMIT)
+        # Walk through the results in document order
+        self.search_hits = sorted(hits, key=lambda hit: hit['page'])
+        self.search_query = query
+        self.search_pos = 0
+        self.m_find_next.Enable(bool(self.search_hits))
+        if not self.search_hits:
+            message = _("No results for \"{}\".").format(query)
+            if not self.indexer.complete:
+                message += " " + _("The document is still being indexed.")
+            self.status_bar.SetStatusText(message)
+            return
+        self.show_search_hit()
+
+    def on_find_next(self, event):
+        if self.search_hits:
+            self.search_pos = (self.search_pos + 1) % len(self.search_hits)
+            self.show_search_hit()
+
+    def show_search_hit(self):
+        hit = self.search_hits[self.search_pos]
+        self.preview.jump_to(hit['page'], self.search_query)
+        self.status_bar.SetStatusText(_("Result {} of {}, page {}: {}").format(
+            self.search_pos + 1, len(self.search_hits), hit['page'] + 1, hit['snippet']))
+        self.preview_text.SetFocus()
+
     def on_about(self, event):
         dlg = AboutDialog(self)
         dlg.ShowModal()
         dlg.Destroy()
 
     def on_options(self, event):
-        dlg = SettingsDialog(self)
+        dlg = SettingsDialog(self, self.cache)
         if dlg.ShowModal() == wx.ID_OK:
             lang = dlg.get_selected_language()
             if lang != config.get_language():
                 config.set_language(lang)
                 wx.MessageBox(_("Please restart the application to apply language changes."), 
                               _("Restart Required"), wx.ICON_INFORMATION)
+            
+            workers, chunk_size = dlg.get_performance()
+            config.set_performance(workers, chunk_size)
+            config.set_queue_workers(dlg.get_queue_workers())
+            self.queue.set_workers(dlg.get_queue_workers())
+            
+            cache_enabled, cache_size = dlg.get_cache_settings()
+            config.set_cache(cache_enabled, cache_size)
+            if dlg.get_text_cache_disk() != config.get_text_cache_disk():
+                config.set_text_cache_disk(dlg.get_text_cache_disk())
+                reset_text_cache()
+            self.cache = ConversionCache() if cache_enabled else None
+            self.logic = ConverterLogic(cache=self.cache)
+            self.logic.search_index = self.search_index
         dlg.Destroy()
 
     def on_select_file(self, event):
@@ -319,6 +745,8 @@ class MainFrame(wx.Frame):
 
     def on_close_pdf(self, event):
         # Close viewer
+        self.stop_preview()
+        self.stop_indexing()
         if self.viewer:
             self.viewer.close()
             self.viewer = None
@@ -334,20 +762,29 @@ class MainFrame(wx.Frame):
     def update_menu_state(self, has_file):
         self.m_close.Enable(has_file)
         self.m_convert.Enable(has_file)
+        has_search = has_file and self.search_index is not None
+        self.m_find.Enable(has_search)
+        self.m_find_next.Enable(has_search and bool(self.search_hits))
+        self.search_ctrl.Enable(has_search)
 
     def load_preview(self, path):
         self.status_bar.SetStatusText("Loading text preview...")
-        self.preview_text.SetValue("Loading document... Please wait.")
+        self.preview_text.SetValue(LOADING_TEXT)
         self.Update()
         
         try:
+            self.stop_preview()
             if self.viewer:
                 self.viewer.close()
             
             self.viewer = PDFViewer(path)
-            text = self.viewer.get_text()
             
-            self.preview_text.SetValue(text)
+            # The preview thread indexes the whole document for search in the background
+            self.start_indexing(path, self.viewer.page_count)
+            
+            self.viewer.indexer = self.indexer
+            # Page text streams in from the viewer's render thread
+            self.preview.load(self.viewer)
             self.status_bar.SetStatusText("Preview loaded.")
             
         except Exception as e:
@@ -362,15 +799,66 @@ class MainFrame(wx.Frame):
         default_dir = os.path.dirname(self.selected_file)
         dlg = ConvertOptionsDialog(self, default_dir)
         
-        if dlg.ShowModal() == wx.ID_OK:
+        result = dlg.ShowModal()
+        if result in (wx.ID_OK, wx.ID_ADD):
             settings = dlg.get_settings()
+            error = dlg.validate(settings)
             dlg.Destroy()
-            self.start_conversion(settings)
+            if error:
+                wx.MessageBox(error, _("Error"), wx.ICON_ERROR)
+                return
+            if result == wx.ID_ADD:
+                self.enqueue([self.selected_file], settings)
+            else:
+                self.start_conversion(settings)
         else:
             dlg.Destroy()
 
+    def on_add_to_queue(self, event):
+        with wx.FileDialog(self, _("Add PDF files to the queue"), wildcard="PDF files (*.pdf)|*.pdf",
+                           style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST | wx.FD_MULTIPLE) as dlg:
+            if dlg.ShowModal() == wx.ID_CANCEL:
+                return
+            paths = dlg.GetPaths()
+        
+        dlg = ConvertOptionsDialog(self, os.path.dirname(paths[0]))
+        if dlg.ShowModal() in (wx.ID_OK, wx.ID_ADD):
+            settings = dlg.get_settings()
+            error = dlg.validate(settings)
+            if error:
+                wx.MessageBox(error, _("Error"), wx.ICON_ERROR)
+            else:
+                self.enqueue(paths, settings)
+        dlg.Destroy()
+
+    def enqueue(self, paths, settings):
+        options = {key: settings[key] for key in ("pages_per_file", "docx_workers", "page_ranges", "txt_backend",
+                                                  "raster_sizes", "raster_format")}
+        for path in paths:
+            self.queue.add(path, settings['formats'], settings['path'], options)
+        self.on_show_queue(None)
+
+    def on_show_queue(self, event):
+        if self.queue_frame is None:
+            self.queue_frame = QueueFrame(self, self.queue)
+        self.queue_frame.refresh()
+        self.queue_frame.Show()
+        self.queue_frame.Raise()
+
+    def on_queue_change(self, item):
+        # Called from the queue's scheduler thread
+        wx.CallAfter(self._queue_changed, item)
+
+    def _queue_changed(self, item):
+        if self.queue_frame:
+            self.queue_frame.update_item(item)
+        counts = self.queue.counts()
+        if counts[QUEUED] or counts[RUNNING]:
+            self.status_bar.SetStatusText(_("Queue: {} running, {} waiting").format(
+                counts[RUNNING], counts[QUEUED]))
+
     def start_conversion(self, settings):
-        fmt = settings['format']
+        formats = settings['formats']
         output_dir = settings['path']
         
         # Hide Main Window
@@ -380,30 +868,33 @@ class MainFrame(wx.Frame):
         self.progress_dialog = ConversionProgressDialog(self)
         self.progress_dialog.Show()
         self.progress_dialog.append_log(f"{_('Starting conversion of ')} {os.path.basename(self.selected_file)}...")
-        self.progress_dialog.append_log(f"{_('Target format: ')} {fmt.upper()}")
+        self.progress_dialog.append_log(f"{_('Target format: ')} {', '.join(formats).upper()}")
         self.progress_dialog.append_log(f"{_('Output folder: ')} {output_dir}")
         
         # Start Thread
-        thread = threading.Thread(target=self.run_conversion_thread, args=(fmt, output_dir))
+        thread = threading.Thread(target=self.run_conversion_thread, args=(formats, output_dir, settings))
         thread.start()
 
-    def run_conversion_thread(self, fmt, output_dir):
+    def run_conversion_thread(self, formats, output_dir, settings):
         try:
             base_name = os.path.basename(self.selected_file)
-            name_no_ext = os.path.splitext(base_name)[0]
-            output_path = os.path.join(output_dir, f"{name_no_ext}.{fmt}")
+            output_paths = {fmt: output_path_for(self.selected_file, fmt, output_dir) for fmt in formats}
             
             if self.progress_dialog:
                 self.progress_dialog.append_log(_("Processing file..."))
             
-            if fmt == "txt":
-                self.logic.convert_to_txt(self.selected_file, output_path)
-            elif fmt == "html":
-                self.logic.convert_to_html(self.selected_file, output_path)
-            elif fmt == "docx":
-                self.logic.convert_to_docx(self.selected_file, output_path)
+            self.logic.new_metrics(base_name, on_update=self.progress_dialog.update_stats)
+            self.logic.cancel_event = self.progress_dialog.cancel_event
+            self.logic.convert_formats(self.selected_file, output_paths,
+                                       progress_callback=self.progress_dialog.update_progress,
+                                       **settings)
+                
+            if self.logic.last_from_cache and self.progress_dialog:
+                self.progress_dialog.append_log(_("Unchanged file, result taken from cache."))
                 
-            wx.CallAfter(self.on_conversion_complete, output_path)
+            wx.CallAfter(self.on_conversion_complete, "\n".join(output_paths.values()))
+        except ConversionCancelled:
+            wx.CallAfter(self.on_conversion_cancelled)
         except Exception as e:
             wx.CallAfter(self.on_conversion_error, str(e))
 
@@ -418,6 +909,16 @@ class MainFrame(wx.Frame):
         self.status_bar.SetStatusText("Ready")
         self.preview_text.SetFocus()
 
+    def on_conversion_cancelled(self):
+        if self.progress_dialog:
+            self.progress_dialog.Destroy()
+            self.progress_dialog = None
+            
+        wx.MessageBox(_("Conversion cancelled. Large documents continue from the last finished part when converted again."),
+                      _("Cancelled"), wx.ICON_INFORMATION)
+        self.Show()
+        self.status_bar.SetStatusText(_("Cancelled"))
+
     def on_conversion_error(self, err_msg):
         if self.progress_dialog:
             self.progress_dialog.Destroy()
@@ -0,0 +1,327 @@
+"""Hot folder: converts PDFs as they are dropped into a folder.
+
+New and changed files are reported by inotify on Linux. Elsewhere, or
+with poll=True (network shares, where inotify sees no remote writes), the
+folder's own mtime is checked every tick and the folder is listed only
+when it changed. Either way the folder is not rescanned on every tick.
+A file is converted once it has kept the same size and mtime for the
+settle time, so files still being written are left alone. Conversions
+run in a process pool that is fed only a few files ahead of its workers.
+Converted files are moved to the done folder. Files that fail are moved
+to the failed folder next to a .error.txt note.
+"""
+import ctypes
+import os
+import select
+import shutil
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from . import config
+from .cache import ConversionCache
+from .converter import ConverterLogic, output_path_for
+
+TICK = 0.25          # Seconds between checks while files are waiting or converting
+RESCAN_INTERVAL = 30 # Seconds between full listings when polling, for filesystems with coarse mtimes
+MAX_ATTEMPTS = 2     # Tries per file when a worker process dies under it
+READ_SIZE = 64 * 1024
+
+# inotify(7)
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT = struct.Struct("iIII") # wd, mask, cookie, len; the name follows
+
+class InotifyWatcher:
+    """Reports the names of files created, written or moved into folder."""
+    name = "inotify"
+
+    def __init__(self, folder):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify needs Linux")
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno), folder)
+
+    def changes(self, timeout):
+        """Returns the names that changed within timeout, or None if the folder must be listed."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; only a listing tells what is there now
+                return None
+            if name and not mask & IN_ISDIR:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Asks for a listing only when the folder's mtime moved, or every RESCAN_INTERVAL."""
+    name = "polling"
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.mtime = None
+        self.next_rescan = 0.0
+
+    def changes(self, timeout):
+        time.sleep(timeout)
+        mtime = os.stat(self.folder).st_mtime_ns
+        now = time.monotonic()
+        if mtime == self.mtime and now < self.next_rescan:
+            return set()
+        self.mtime = mtime
+        self.next_rescan = now + RESCAN_INTERVAL
+        return None
+
+    def close(self):
+        pass
+
+def make_watcher(folder, poll=False):
+    if not poll:
+        try:
+            return InotifyWatcher(folder)
+        except (OSError, AttributeError):
+            pass # No inotify here, e.g. Windows or an exhausted watch limit
+    return PollingWatcher(folder)
+
+def _file_state(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def _move(path, folder):
+    """Moves path into folder, adding -2, -3... to the name if it is taken there.
+
+    folder may be on another volume, in which case the file is copied and removed.
+    """
+    stem, ext = os.path.splitext(os.path.basename(path))
+    target = os.path.join(folder, stem + ext)
+    n = 2
+    while os.path.exists(target):
+        target = os.path.join(folder, f"{stem}-{n}{ext}")
+        n += 1
+    shutil.move(path, target)
+    return target
+
+def _convert(pdf_path, formats, output_dir, options, cache_enabled):
+    """Converts one file to every format. Runs in a worker process; returns the pages converted."""
+    logic = ConverterLogic(workers=1, cache=ConversionCache() if cache_enabled else None)
+    logic.new_metrics(os.path.basename(pdf_path))
+    output_paths = {fmt: output_path_for(pdf_path, fmt, output_dir) for fmt in formats}
+    for path in output_paths.values():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    logic.convert_formats(pdf_path, output_paths, **options)
+    return logic.metrics.snapshot()["pages"]
+
+class HotFolder:
+    def __init__(self, folder, formats, output_dir=None, done_dir=None, failed_dir=None,
+                 workers=None, settle=None, poll=False, options=None, on_result=None):
+        self.folder = os.path.abspath(folder)
+        self.formats = formats
+        self.output_dir = output_dir or os.path.join(self.folder, "converted")
+        self.done_dir = done_dir or os.path.join(self.folder, "done")
+        self.failed_dir = failed_dir or os.path.join(self.folder, "failed")
+        self.workers = workers or config.get_watch_workers()
+        self.settle = config.get_watch_settle_seconds() if settle is None else settle
+        self.poll_interval = config.get_watch_poll_interval()
+        self.poll = poll
+        self.options = options or {}
+        self.on_result = on_result
+        self.cache_enabled = config.get_cache_enabled()
+        self.watcher = None
+        self.pool = None
+        self.pending = {}   # name -> [(size, mtime) last seen, time it last changed]
+        self.ready = {}     # name -> state, in the order files settled
+        self.running = {}   # future -> (name, state when submitted, start time, attempt, pool)
+        self.attempts = {}  # name -> conversions started
+        self.ignored = {}   # name -> state of a file that couldn't be moved away
+        self.counts = dict.fromkeys(("succeeded", "failed"), 0)
+        self.pages = 0
+        self.started = None
+
+    def start(self):
+        for path in (self.output_dir, self.done_dir, self.failed_dir):
+            os.makedirs(path, exist_ok=True)
+        # Watch before listing, so nothing dropped in between is missed
+        self.watcher = make_watcher(self.folder, self.poll)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.started = time.monotonic()
+        self.add(self.scan(), rescan=True)
+
+    def stop(self):
+        if self.pool:
+            self.pool.shutdown(cancel_futures=True)
+        if self.watcher:
+            self.watcher.close()
+
+    def run(self):
+        """Watches until interrupted, then returns a summary.
+
+        Files converting when interrupted stay in the folder and are picked up on the next start.
+        """
+        self.start()
+        try:
+            while True:
+                self.step()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+        return self.summary()
+
+    def step(self):
+        if self.running:
+            # Wake up as soon as a conversion finishes, not on the next tick
+            wait(self.running, timeout=TICK, return_when=FIRST_COMPLETED)
+            timeout = 0
+        else:
+            timeout = TICK if self.pending or self.ready else self.poll_interval
+        names = self.watcher.changes(timeout)
+        if names is None:
+            self.add(self.scan(), rescan=True)
+        else:
+            self.add(names)
+        self.check_pending()
+        self.submit()
+        self.collect()
+
+    def scan(self):
+        with os.scandir(self.folder) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+
+    def add(self, names, rescan=False):
+        now = time.monotonic()
+        busy = {name for name, *_ in self.running.values()}
+        for name in names:
+            if not name.lower().endswith(".pdf") or name in busy or name in self.ready:
+                continue
+            if rescan:
+                # A listing says nothing about whether the file changed
+                self.pending.setdefault(name, [None, now])
+            else:
+                self.pending[name] = [self.pending.get(name, [None])[0], now]
+
+    def check_pending(self):
+        """Moves files that kept their size and mtime for the settle time to the ready queue."""
+        now = time.monotonic()
+        for name, entry in list(self.pending.items()):
+            if now - entry[1] < self.settle:
+                continue
+            try:
+                state = _file_state(os.path.join(self.folder, name))
+            except OSError:
+                del self.pending[name] # Gone again, e.g. renamed
+                continue
+            if state != entry[0] or state[0] == 0:
+                entry[:] = [state, now]
+            elif self.ignored.get(name) == state:
+                del self.pending[name]
+            else:
+                del self.pending[name]
+                self.ignored.pop(name, None)
+                self.ready[name] = state
+
+    def submit(self):
+        # A few files ahead of the workers keep them busy; the rest wait here, not in the pool
+        while self.ready and len(self.running) < self.workers * 2:
+            name = next(iter(self.ready))
+            state = self.ready.pop(name)
+            attempt = self.attempts.get(name, 0) + 1
+            self.attempts[name] = attempt
+            future = self.pool.submit(_convert, os.path.join(self.folder, name), self.formats,
+                                      self.output_dir, self.options, self.cache_enabled)
+            self.running[future] = (name, state, time.monotonic(), attempt, self.pool)
+
+    def collect(self):
+        if not self.running:
+            return
+        finished, _ = wait(self.running, timeout=0)
+        for future in finished:
+            name, state, t0, attempt, pool = self.running.pop(future)
+            path = os.path.join(self.folder, name)
+            result = {"input": path, "seconds": round(time.monotonic() - t0, 3)}
+            try:
+                result["pages"] = future.result()
+                result["status"] = "ok"
+            except BrokenProcessPool:
+                # A worker died, e.g. out of memory; the pool is unusable from here on
+                self.restart_pool(pool)
+                if attempt < MAX_ATTEMPTS:
+                    self.ready[name] = state
+                    continue
+                result.update(status="failed", error="The conversion process stopped unexpectedly")
+            except Exception as e:
+                result.update(status="failed", error=str(e))
+            try:
+                if _file_state(path) != state:
+                    # Rewritten while converting; convert the new version instead
+                    self.attempts.pop(name, None)
+                    self.add([name])
+                    continue
+            except OSError:
+                pass
+            self.attempts.pop(name, None)
+            self.finish(path, state, result)
+
+    def finish(self, path, state, result):
+        ok = result["status"] == "ok"
+        try:
+            result["moved_to"] = _move(path, self.done_dir if ok else self.failed_dir)
+            if not ok:
+                with open(os.path.splitext(result["moved_to"])[0] + ".error.txt", 'w', encoding='utf-8') as f:
+                    f.write(result["error"] + "\n")
+        except OSError as e:
+            # Left in place; skipped until it changes so it isn't converted again and again
+            self.ignored[os.path.basename(path)] = state
+            result["move_error"] = str(e)
+        self.counts["succeeded" if ok else "failed"] += 1
+        self.pages += result.get("pages", 0)
+        if self.on_result:
+            self.on_result(result)
+
+    def restart_pool(self, broken):
+        # Every future of the broken pool fails; only the first one replaces it
+        if broken is self.pool:
+            self.pool.shutdown(wait=False)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def summary(self):
+        seconds = time.monotonic() - self.started if self.started else 0.0
+        files = self.counts["succeeded"] + self.counts["failed"]
+        return {
+            "folder": self.folder,
+            "watcher": self.watcher.name if self.watcher else None,
+            "files": files,
+            "succeeded": self.counts["succeeded"],
+            "failed": self.counts["failed"],
+            "pages": self.pages,
+            "seconds": round(seconds, 3),
+            "files_per_min": round(files / seconds * 60, 1) if seconds else 0.0,
+        }
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from modules.backends import fitz
+from modules.cache import ConversionCache
+from modules.converter import ConverterLogic, output_path_for
+
+class CacheHitOutputDirTest(unittest.TestCase):
+    """A cache hit restores folder outputs into an output dir that doesn't exist yet."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmp, "doc.pdf")
+        doc = fitz.open()
+        for i in range(3):
+            page = doc.new_page(width=200, height=200)
+            page.insert_text((20, 40), f"Page {i + 1}")
+            pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+            pix.clear_with(40 * i)
+            page.insert_image(fitz.Rect(20, 60, 60, 100), pixmap=pix)
+        doc.save(self.pdf_path)
+        doc.close()
+        self.cache = ConversionCache(cache_dir=os.path.join(self.tmp, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def convert_twice(self, fmt, **options):
+        results = []
+        for name in ("first", "second"):
+            logic = ConverterLogic(workers=1, cache=self.cache)
+            output_path = output_path_for(self.pdf_path, fmt, os.path.join(self.tmp, name))
+            outputs = logic.convert(fmt, self.pdf_path, output_path, **options)
+            self.assertTrue(all(os.path.isfile(path) for path in outputs))
+            results.append((outputs, logic.last_from_cache))
+        self.assertFalse(results[0][1])
+        self.assertTrue(results[1][1])
+        self.assertEqual([os.path.basename(p) for p in results[0][0]],
+                         [os.path.basename(p) for p in results[1][0]])
+
+    def test_images(self):
+        self.convert_twice("images")
+
+    def test_page_images(self):
+        self.convert_twice("pages", raster_sizes="full=72dpi,thumb=40", raster_format="png")
+
+    def test_incomplete_entry_is_a_miss(self):
+        self.convert_twice("images")
+        for root, _, files in os.walk(self.cache.cache_dir):
+            for name in files:
+                if name != "meta.json":
+                    os.remove(os.path.join(root, name))
+        logic = ConverterLogic(workers=1, cache=self.cache)
+        output_path = output_path_for(self.pdf_path, "images", os.path.join(self.tmp, "third"))
+        outputs = logic.convert("images", self.pdf_path, output_path)
+        self.assertFalse(logic.last_from_cache)
+        self.assertTrue(all(os.path.isfile(path) for path in outputs))
+
+    def test_store_keeps_existing_entry(self):
+        key = "k" * 64
+        first = os.path.join(self.tmp, "a.txt")
+        second = os.path.join(self.tmp, "b.txt")
+        for path, text in ((first, "first"), (second, "second")):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        self.cache.store(key, [first])
+        self.cache.store(key, [second])
+        outputs = self.cache.fetch(key, self.tmp)
+        self.assertEqual([os.path.basename(p) for p in outputs], ["a.txt"])
+        self.assertEqual([name for name in os.listdir(self.cache.cache_dir) if name.startswith(".tmp-")], [])
+
+    def test_unusable_cache_is_a_miss(self):
+        def fail(*args):
+            raise PermissionError("cache is read-only")
+        self.cache.fetch = fail
+        self.cache.store = fail
+        logic = ConverterLogic(workers=1, cache=self.cache)
+        output_path = output_path_for(self.pdf_path, "txt", os.path.join(self.tmp, "out"))
+        os.makedirs(os.path.dirname(output_path))
+        with self.assertLogs("modules.converter", "WARNING"):
+            outputs = logic.convert("txt", self.pdf_path, output_path)
+        self.assertFalse(logic.last_from_cache)
+        self.assertEqual(outputs, [output_path])
+        self.assertTrue(os.path.isfile(output_path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from modules.backends import fitz
+from modules.cli import EXIT_FAILED, EXIT_OK, EXIT_PARTIAL, collect_inputs, main
+
+def write_pdf(path, pages=2):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page(width=200, height=200).insert_text((20, 40), f"Page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.out = os.path.join(self.tmp, "out")
+        self.good = os.path.join(self.tmp, "good.pdf")
+        self.bad = os.path.join(self.tmp, "bad.pdf")
+        write_pdf(self.good)
+        with open(self.bad, 'wb') as f:
+            f.write(b"not a pdf")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def run_cli(self, *argv):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            code = main(list(argv))
+        return code, json.loads(stdout.getvalue())
+
+    def convert(self, *inputs, formats="txt"):
+        return self.run_cli("convert", *inputs, "-f", formats, "-o", self.out, "-j", "1",
+                            "--no-cache", "--txt-backend", "pymupdf")
+
+    def test_all_succeed(self):
+        code, summary = self.convert(self.good, formats="txt,html,docx")
+        self.assertEqual(code, EXIT_OK)
+        self.assertEqual((summary["files"], summary["failed"]), (1, 0))
+        # TXT and HTML come from one pass and are reported together
+        self.assertEqual(sorted(r["format"] for r in summary["results"]), ["docx", "txt,html"])
+        for result in summary["results"]:
+            self.assertEqual(result["status"], "ok")
+            self.assertEqual(result["pages"], 2)
+            self.assertTrue(all(os.path.isfile(path) for path in result["output"]))
+
+    def test_some_fail(self):
+        code, summary = self.convert(self.good, self.bad)
+        self.assertEqual(code, EXIT_PARTIAL)
+        self.assertEqual((summary["succeeded"], summary["failed"]), (1, 1))
+        failed = [r for r in summary["results"] if r["status"] == "failed"]
+        self.assertEqual(failed[0]["input"], self.bad)
+        self.assertTrue(failed[0]["error"])
+
+    def test_all_fail(self):
+        code, summary = self.convert(self.bad)
+        self.assertEqual(code, EXIT_FAILED)
+        self.assertEqual(summary["failed"], 1)
+
+    def test_nothing_to_convert(self):
+        code, summary = self.convert(os.path.join(self.tmp, "missing-*.pdf"))
+        self.assertEqual(code, EXIT_FAILED)
+        self.assertEqual(summary["files"], 0)
+
+    def test_unknown_format(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit) as raised:
+            main(["convert", self.good, "-f", "txt,pptx"])
+        self.assertEqual(raised.exception.code, 2)
+
+    def test_collect_inputs(self):
+        sub = os.path.join(self.tmp, "sub")
+        os.makedirs(sub)
+        nested = os.path.join(sub, "nested.pdf")
+        write_pdf(nested, 1)
+        with open(os.path.join(self.tmp, "notes.txt"), 'w') as f:
+            f.write("not a pdf")
+        self.assertEqual(collect_inputs([self.tmp]), [self.bad, self.good])
+        self.assertEqual(collect_inputs([self.tmp], recursive=True), [self.bad, self.good, nested])
+        self.assertEqual(collect_inputs([os.path.join(self.tmp, "g*.pdf"), self.good]), [self.good])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import configparser
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+from modules import config
+from modules.config import Settings
+
+def read_ini(path):
+    parser = configparser.ConfigParser()
+    parser.read(path, encoding='utf-8')
+    return parser
+
+class SettingsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "config.ini")
+        self.settings = Settings(self.path)
+
+    def tearDown(self):
+        self.settings.flush()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_sets_are_saved_once_quiet(self):
+        with mock.patch.object(config, "SAVE_DELAY", 0.1):
+            self.settings.set('Performance', 'workers', 2)
+            self.settings.set('Performance', 'chunk_size', 25)
+            self.assertFalse(os.path.exists(self.path))
+            self.assertEqual(self.settings.get_int('Performance', 'workers'), 2)
+            time.sleep(0.5)
+        saved = read_ini(self.path)
+        self.assertEqual(saved['Performance']['workers'], "2")
+        self.assertEqual(saved['Performance']['chunk_size'], "25")
+        self.assertEqual([name for name in os.listdir(self.tmp) if name.endswith(".tmp")], [])
+
+    def test_flush_writes_now(self):
+        self.settings.set('General', 'language', 'vi')
+        self.settings.flush()
+        self.assertEqual(read_ini(self.path)['General']['language'], "vi")
+
+    def test_outside_edit_is_reloaded(self):
+        with mock.patch.object(config, "RELOAD_CHECK_INTERVAL", 0):
+            self.assertEqual(self.settings.get('General', 'language'), "en")
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write("[General]\nlanguage = fr\n")
+            self.assertEqual(self.settings.get('General', 'language'), "fr")
+
+    def test_unsaved_change_wins_over_outside_edit(self):
+        with mock.patch.object(config, "RELOAD_CHECK_INTERVAL", 0), \
+                mock.patch.object(config, "SAVE_DELAY", 60):
+            self.settings.set('General', 'language', 'vi')
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write("[General]\nlanguage = fr\n")
+            self.assertEqual(self.settings.get('General', 'language'), "vi")
+            self.settings.flush()
+        self.assertEqual(read_ini(self.path)['General']['language'], "vi")
+
+    def test_bad_number_falls_back(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("[Performance]\nworkers = many\n")
+        self.assertEqual(self.settings.get_int('Performance', 'workers', 3), 3)
+
+if __name__ == "__main__":
+    unittest.main()
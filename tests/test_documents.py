@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+from modules.backends import fitz
+from modules.documents import DocumentManager
+
+def write_pdf(path, pages):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page(width=200, height=200).insert_text((20, 40), f"Page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+class DocumentManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmp, "doc.pdf")
+        write_pdf(self.pdf_path, 3)
+        self.documents = DocumentManager()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_shared_reuses_open_mapping(self):
+        doc = self.documents.open(self.pdf_path)
+        try:
+            mapping = next(iter(self.documents._mappings.values()))
+            with self.documents.shared(self.pdf_path) as shared:
+                self.assertEqual(shared.page_count, 3)
+                self.assertIs(shared, mapping.shared)
+        finally:
+            self.documents.close(doc)
+
+    def test_shared_sees_rewritten_file(self):
+        doc = self.documents.open(self.pdf_path)
+        try:
+            new_path = os.path.join(self.tmp, "new.pdf")
+            write_pdf(new_path, 5)
+            os.replace(new_path, self.pdf_path)
+            with self.documents.shared(self.pdf_path) as shared:
+                self.assertEqual(shared.page_count, 5)
+            self.assertEqual(doc.page_count, 3)
+        finally:
+            self.documents.close(doc)
+
+    def test_mapping_closed_with_last_document(self):
+        first = self.documents.open(self.pdf_path)
+        second = self.documents.open(self.pdf_path)
+        mapping = next(iter(self.documents._mappings.values()))
+        self.documents.close(first)
+        self.assertFalse(mapping.mmap.closed)
+        self.assertEqual(second.load_page(2).get_text().strip(), "Page 3")
+        self.documents.close(second)
+        self.assertTrue(mapping.mmap.closed)
+        self.assertEqual(self.documents._mappings, {})
+
+    def test_converter_holds_mapping_until_closed(self):
+        cv = self.documents.open_converter(self.pdf_path)
+        mappings = list(self.documents._mappings.values())
+        self.assertEqual(len(cv.fitz_doc), 3)
+        self.documents.close(cv)
+        self.assertTrue(all(mapping.mmap.closed for mapping in mappings))
+        self.assertEqual(self.documents._mappings, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Inches
+from modules.backends import fitz
+from modules.docx_merge import DOCPR_TAG, append_document, merge_docx
+
+class DocxMergeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.image_path = os.path.join(self.tmp, "image.png")
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+        pix.clear_with(120)
+        pix.save(self.image_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def part(self, name, text, width=None, image=False, style=None):
+        doc = Document()
+        if style:
+            doc.styles.add_style(style, WD_STYLE_TYPE.PARAGRAPH)
+        doc.add_paragraph(text, style=style)
+        if image:
+            doc.add_picture(self.image_path, width=Inches(1))
+        if width:
+            doc.sections[-1].page_width = width
+        path = os.path.join(self.tmp, name)
+        doc.save(path)
+        return path
+
+    def test_merge_keeps_order_and_sections(self):
+        paths = [self.part("a.docx", "First", width=Inches(8)),
+                 self.part("b.docx", "Second", width=Inches(9)),
+                 self.part("c.docx", "Third", width=Inches(10))]
+        output = os.path.join(self.tmp, "merged.docx")
+        merge_docx(paths, output)
+        merged = Document(output)
+        self.assertEqual([p.text for p in merged.paragraphs if p.text], ["First", "Second", "Third"])
+        self.assertEqual([section.page_width for section in merged.sections],
+                         [Inches(8), Inches(9), Inches(10)])
+
+    def test_images_are_relinked_once(self):
+        target = Document(self.part("a.docx", "First", image=True))
+        for name in ("b.docx", "c.docx"):
+            append_document(target, Document(self.part(name, name, image=True)))
+        output = os.path.join(self.tmp, "merged.docx")
+        target.save(output)
+
+        merged = Document(output)
+        images = [rel for rel in merged.part.rels.values() if rel.reltype.endswith("/image")]
+        self.assertEqual(len(images), 1)
+        blips = merged.element.body.xpath(".//a:blip/@r:embed")
+        self.assertEqual(len(blips), 3)
+        self.assertTrue(all(rid in merged.part.rels for rid in blips))
+        ids = [doc_pr.get("id") for doc_pr in merged.element.body.iter(DOCPR_TAG)]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_missing_styles_are_copied(self):
+        target = Document(self.part("a.docx", "First"))
+        append_document(target, Document(self.part("b.docx", "Styled", style="Shard Heading")))
+        self.assertIn("Shard Heading", [style.name for style in target.styles])
+        self.assertEqual(target.paragraphs[-1].style.name, "Shard Heading")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from modules.backends import fitz
+from modules.cache import fast_fingerprint
+from modules.converter import ConverterLogic, ConversionCancelled
+from modules.jobs import ConversionJob
+from modules.search_index import SearchIndex, DocumentIndexer
+from modules.text_cache import TextCache
+
+PAGES = 10
+CHUNK_PAGES = 4
+
+class ResumeJobTest(unittest.TestCase):
+    """A TXT job stopped in the middle of a chunk continues from its checkpoint."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.tmp, "doc.pdf")
+        doc = fitz.open()
+        for i in range(PAGES):
+            doc.new_page(width=200, height=200).insert_text((20, 40), f"Page {i + 1}")
+        doc.save(self.pdf_path)
+        doc.close()
+        self.output_path = os.path.join(self.tmp, "doc.txt")
+        self.jobs_dir = os.path.join(self.tmp, "jobs")
+        os.makedirs(self.jobs_dir)
+        self.index = SearchIndex(os.path.join(self.tmp, "index.db"))
+        self.extracted = []
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def make_job(self):
+        logic = ConverterLogic(workers=1)
+        logic.text_cache = TextCache(disk=False)
+        logic.search_index = self.index
+        iter_pages = logic.iter_pages
+        def counting_iter_pages(pdf_path, mode, total, start=0, **kwargs):
+            for page in iter_pages(pdf_path, mode, total, start, **kwargs):
+                self.extracted.append(start)
+                start += 1
+                yield page
+        logic.iter_pages = counting_iter_pages
+        job = ConversionJob(logic, "txt", self.pdf_path, self.output_path, PAGES,
+                            chunk_pages=CHUNK_PAGES, jobs_dir=self.jobs_dir, txt_backend="pymupdf")
+        return logic, job
+
+    def test_resume_after_stop_mid_chunk(self):
+        logic, job = self.make_job()
+        logic.cancel_event = threading.Event()
+        def progress(current, total):
+            if current == CHUNK_PAGES + 2:
+                logic.cancel_event.set()
+        with self.assertRaises(ConversionCancelled):
+            job.run(progress)
+        self.assertFalse(os.path.exists(self.output_path))
+        with open(job.manifest_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)["done"], [True, False, False])
+        self.assertTrue(os.path.exists(job.chunk_path(0)))
+        self.assertFalse(os.path.exists(job.chunk_path(1)))
+
+        self.extracted = []
+        logic, job = self.make_job()
+        self.assertEqual(job.run(), [self.output_path])
+        # Only the unfinished chunks are extracted again
+        self.assertEqual(self.extracted, list(range(CHUNK_PAGES, PAGES)))
+        self.assertFalse(os.path.exists(job.job_dir))
+
+        with open(self.output_path, 'r', encoding='utf-8') as f:
+            pages = f.read().split("\f")
+        self.assertEqual([page.strip() for page in pages[:-1]], [f"Page {i + 1}" for i in range(PAGES)])
+        self.assertEqual(pages[-1], "")
+        self.assertTrue(DocumentIndexer(self.index, self.pdf_path, PAGES).complete)
+
+    def test_text_cache_is_used(self):
+        logic, job = self.make_job()
+        logic.text_cache.put(fast_fingerprint(self.pdf_path), "pymupdf", 0, "cached\n", PAGES)
+        job.run()
+        self.assertEqual(self.extracted, list(range(1, PAGES)))
+        with open(self.output_path, 'r', encoding='utf-8') as f:
+            self.assertTrue(f.read().startswith("cached\n\f"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from modules import raster
+from modules.backends import fitz
+
+def write_pdf(path, pages, width=200):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page(width=width, height=300).insert_text((20, 40), f"Page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+class ParseSizesTest(unittest.TestCase):
+    def test_sizes(self):
+        self.assertEqual(raster.parse_sizes("full=150dpi, thumb=160px,small=80"),
+                         [("full", 150, None), ("thumb", None, 160), ("small", None, 80)])
+
+    def test_invalid(self):
+        for text in ("", "full", "=150dpi", "full=big", "full=0dpi", "thumb=-5"):
+            with self.assertRaises(ValueError):
+                raster.parse_sizes(text)
+
+class RasterizeFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.sizes = raster.parse_sizes("full=144dpi,thumb=50")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_pages_in_every_size_with_manifest_and_strip(self):
+        pdfs = [os.path.join(self.tmp, name) for name in ("long.pdf", "short.pdf")]
+        write_pdf(pdfs[0], 5)
+        write_pdf(pdfs[1], 1)
+        bad = os.path.join(self.tmp, "bad.pdf")
+        with open(bad, 'wb') as f:
+            f.write(b"not a pdf")
+        outputs = {path: os.path.join(self.tmp, os.path.basename(path)[:-4], "manifest.json")
+                   for path in pdfs + [bad]}
+
+        results = raster.rasterize_files(pdfs + [bad], outputs, self.sizes, "png", workers=2,
+                                         strip_pages=3, chunk_pages=2)
+        self.assertEqual([r["status"] for r in results], ["ok", "ok", "failed"])
+        self.assertEqual([r["pages"] for r in results[:2]], [5, 1])
+
+        with open(outputs[pdfs[0]], 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.assertEqual([entry["page"] for entry in manifest["pages"]], [1, 2, 3, 4, 5])
+        self.assertEqual(manifest["sizes"], {"full": "144dpi", "thumb": 50})
+        output_dir = os.path.dirname(outputs[pdfs[0]])
+        full = fitz.Pixmap(os.path.join(output_dir, manifest["pages"][0]["files"]["full"]))
+        thumb = fitz.Pixmap(os.path.join(output_dir, manifest["pages"][0]["files"]["thumb"]))
+        self.assertEqual((full.width, full.height), (400, 600))
+        self.assertEqual(thumb.width, 50)
+        strip = fitz.Pixmap(os.path.join(output_dir, manifest["strip"]))
+        self.assertEqual(strip.width, 3 * 50 + 2 * raster.STRIP_GAP)
+        # The manifest, both sizes of every page and the strip
+        self.assertEqual(results[0]["files"], 1 + 5 * 2 + 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from modules.search_index import SearchIndex, DocumentIndexer, make_query
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.index = SearchIndex(os.path.join(self.tmp, "search.db"))
+        self.pdf_path = os.path.join(self.tmp, "doc.pdf")
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def index_pages(self, fingerprint, texts, path=None):
+        indexer = DocumentIndexer(self.index, path or self.pdf_path, len(texts), fingerprint)
+        for page, text in enumerate(texts):
+            indexer.add(page, text)
+        indexer.flush()
+        return indexer
+
+    def test_make_query(self):
+        self.assertEqual(make_query('annual "report'), '"annual" """report"*')
+        self.assertIsNone(make_query("   "))
+
+    def test_search_every_word_and_prefix(self):
+        self.index_pages("v1", ["The annual report", "Quarterly numbers", "Annual budget"])
+        hits = self.index.search("annual rep")
+        self.assertEqual([(hit["path"], hit["page"]) for hit in hits], [(self.pdf_path, 0)])
+        self.assertIn("[annual]", hits[0]["snippet"].lower())
+        self.assertEqual(sorted(hit["page"] for hit in self.index.search("annual")), [0, 2])
+        self.assertEqual(self.index.search("?!"), [])
+
+    def test_indexed_pages_are_skipped(self):
+        indexer = self.index_pages("v1", ["one", "two"])
+        self.assertTrue(indexer.complete)
+        again = DocumentIndexer(self.index, self.pdf_path, 3, "v1")
+        self.assertEqual(again.missing(), [2])
+
+    def test_new_version_replaces_old(self):
+        self.index_pages("v1", ["old text"])
+        self.index_pages("v2", ["new text"])
+        self.assertEqual(self.index.search("old"), [])
+        self.assertEqual(len(self.index.search("new")), 1)
+        count = self.index._db.execute("SELECT count(*) FROM documents").fetchone()[0]
+        self.assertEqual(count, 1)
+
+    def test_moved_file_keeps_its_pages(self):
+        self.index_pages("v1", ["moved text"])
+        moved = os.path.join(self.tmp, "moved.pdf")
+        indexer = DocumentIndexer(self.index, moved, 1, "v1")
+        self.assertTrue(indexer.complete)
+        self.assertEqual([hit["path"] for hit in self.index.search("moved")], [moved])
+
+    def test_search_one_document(self):
+        self.index_pages("v1", ["shared word"])
+        self.index_pages("v2", ["shared word"], os.path.join(self.tmp, "other.pdf"))
+        self.assertEqual(len(self.index.search("shared")), 2)
+        self.assertEqual(len(self.index.search("shared", fingerprint="v2")), 1)
+        self.index.remove("v2")
+        self.assertEqual(len(self.index.search("shared")), 1)
+
+if __name__ == "__main__":
+    unittest.main()
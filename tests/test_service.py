@@ -0,0 +1,118 @@
+import asyncio
+import json
+import unittest
+from modules.backends import fitz
+from modules.service import HOST, ConversionService, HTTPError, content_disposition, parse_options, safe_name
+
+def make_pdf(pages=2):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page(width=200, height=200).insert_text((20, 40), f"Page {i + 1}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+class HelpersTest(unittest.TestCase):
+    def test_safe_name(self):
+        self.assertEqual(safe_name("../../etc/passwd"), "passwd")
+        self.assertEqual(safe_name("C:\\Users\\me\\report.pdf"), "report.pdf")
+        self.assertEqual(safe_name('a"b\r\nc.pdf'), "abc.pdf")
+        self.assertEqual(safe_name(".."), "")
+
+    def test_content_disposition(self):
+        header = content_disposition("báo cáo.txt")
+        self.assertTrue(header.startswith('attachment; filename="b_o c_o.txt"'))
+        self.assertIn("filename*=UTF-8''b%C3%A1o%20c%C3%A1o.txt", header)
+
+    def test_parse_options(self):
+        fmt, name, options = parse_options("format=HTML&name=x/y.pdf&pages_per_file=10")
+        self.assertEqual((fmt, name, options), ("html", "y.pdf", {"pages_per_file": 10}))
+        self.assertEqual(parse_options("")[:2], ("txt", "document.pdf"))
+        for query in ("format=pptx", "colour=red", "pages_per_file=many"):
+            with self.assertRaises(HTTPError) as raised:
+                parse_options(query)
+            self.assertEqual(raised.exception.status, 400)
+
+class ServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = ConversionService(port=0, workers=1, max_queue=0, max_upload_mb=1)
+        self.service.cache_enabled = False
+        await self.service.start()
+
+    async def asyncTearDown(self):
+        self.service.server.close()
+        await self.service.server.wait_closed()
+        self.service.pool.shutdown(cancel_futures=True)
+
+    async def request(self, method, path, body=b"", headers=None, chunked=False):
+        reader, writer = await asyncio.open_connection(HOST, self.service.port)
+        head = [f"{method} {path} HTTP/1.1", f"Host: {HOST}"]
+        headers = dict(headers or {})
+        if chunked:
+            headers["Transfer-Encoding"] = "chunked"
+        elif method == "POST":
+            headers.setdefault("Content-Length", str(len(body)))
+        head += [f"{key}: {value}" for key, value in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if chunked:
+            for start in range(0, len(body), 1000):
+                part = body[start:start + 1000]
+                writer.write(b"%x\r\n%s\r\n" % (len(part), part))
+            writer.write(b"0\r\n\r\n")
+        else:
+            writer.write(body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        response_headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+        return status, response_headers, payload
+
+    async def test_convert_upload(self):
+        status, headers, payload = await self.request(
+            "POST", "/convert?format=txt&txt_backend=pymupdf&name=report.pdf", make_pdf())
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["x-pages"], "2")
+        self.assertIn('filename="report.txt"', headers["content-disposition"])
+        self.assertEqual(int(headers["content-length"]), len(payload))
+        self.assertIn("Page 2", payload.decode("utf-8"))
+        metrics = self.service.metrics()
+        self.assertEqual((metrics["completed"], metrics["pages"]), (1, 2))
+
+    async def test_chunked_upload(self):
+        status, _, payload = await self.request("POST", "/convert?txt_backend=pymupdf", make_pdf(), chunked=True)
+        self.assertEqual(status, 200)
+        self.assertIn("Page 1", payload.decode("utf-8"))
+
+    async def test_not_a_pdf(self):
+        status, _, payload = await self.request("POST", "/convert?txt_backend=pymupdf", b"not a pdf")
+        self.assertIn(status, (400, 500))
+        self.assertIn("error", json.loads(payload))
+        self.assertEqual(self.service.counts["failed"], 1)
+
+    async def test_upload_too_large(self):
+        status, _, _ = await self.request("POST", "/convert", headers={"Content-Length": str(2 * 1024 * 1024)})
+        self.assertEqual(status, 413)
+
+    async def test_full_queue_is_rejected(self):
+        # Every worker busy and no room to wait
+        self.service.running = self.service.workers
+        status, headers, payload = await self.request("POST", "/convert", make_pdf())
+        self.assertEqual(status, 503)
+        self.assertEqual(headers["retry-after"], "5")
+        self.assertEqual(self.service.counts["rejected"], 1)
+
+    async def test_health_and_unknown_paths(self):
+        status, _, payload = await self.request("GET", "/health")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(payload)["workers"], 1)
+        self.assertEqual((await self.request("GET", "/nowhere"))[0], 404)
+        self.assertEqual((await self.request("GET", "/convert"))[0], 405)
+
+if __name__ == "__main__":
+    unittest.main()
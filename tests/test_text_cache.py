@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from modules.backends import fitz
+from modules.converter import ConverterLogic
+from modules.text_cache import TextCache
+
+class TextCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_pages_by_backend(self):
+        cache = TextCache(max_bytes=1000, disk=False)
+        cache.put("doc", "pymupdf", 0, "one", 2)
+        self.assertEqual(cache.get("doc", "pymupdf", 0, 2), "one")
+        self.assertIsNone(cache.get("doc", "pdfminer", 0, 2))
+        self.assertIsNone(cache.get("doc", "pymupdf", 1, 2))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_budget(self):
+        cache = TextCache(max_bytes=10, disk=False)
+        cache.put("big", "pymupdf", 0, "x" * 8, 3)
+        # A page that would take the document past the budget isn't kept
+        cache.put("big", "pymupdf", 1, "x" * 8, 3)
+        self.assertIsNone(cache.get("big", "pymupdf", 1, 3))
+        # Another document pushes out the least recently used one
+        cache.put("other", "pymupdf", 0, "y" * 8, 1)
+        self.assertIsNone(cache.get("big", "pymupdf", 0, 3))
+        self.assertEqual(cache.get("other", "pymupdf", 0, 1), "y" * 8)
+        self.assertLessEqual(cache.size, 10)
+
+    def test_complete_document_survives_restart(self):
+        cache = TextCache(max_bytes=1000, disk=True, cache_dir=self.tmp)
+        cache.put("doc", "pymupdf", 0, "one", 2)
+        self.assertEqual(os.listdir(self.tmp), [])
+        cache.put("doc", "pymupdf", 1, "two", 2)
+        self.assertEqual(os.listdir(self.tmp), ["doc-pymupdf.json.gz"])
+
+        restarted = TextCache(max_bytes=1000, disk=True, cache_dir=self.tmp)
+        self.assertEqual(restarted.get("doc", "pymupdf", 1, 2), "two")
+        restarted.clear()
+        self.assertEqual(os.listdir(self.tmp), [])
+
+    def test_txt_export_reuses_extracted_text(self):
+        pdf_path = os.path.join(self.tmp, "doc.pdf")
+        doc = fitz.open()
+        for i in range(3):
+            doc.new_page(width=200, height=200).insert_text((20, 40), f"Page {i + 1}")
+        doc.save(pdf_path)
+        doc.close()
+        cache = TextCache(max_bytes=100000, disk=False)
+
+        outputs = []
+        for name in ("first.txt", "second.txt"):
+            logic = ConverterLogic(workers=1)
+            logic.text_cache = cache
+            output_path = os.path.join(self.tmp, name)
+            with mock.patch.object(logic, "iter_pages", wraps=logic.iter_pages) as iter_pages:
+                logic.convert_to_txt(pdf_path, output_path, backend="pymupdf")
+            with open(output_path, 'r', encoding='utf-8') as f:
+                outputs.append(f.read())
+            extractions = iter_pages.call_count
+        self.assertEqual(extractions, 0)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIn("Page 3", outputs[1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from modules.backends import fitz
+from modules.watch import HotFolder, _move
+
+def write_pdf(path, pages=2):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page(width=200, height=200).insert_text((20, 40), f"Page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+class HotFolderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.results = []
+        self.folder = HotFolder(self.tmp, ["txt"], workers=1, settle=0.2, poll=True,
+                                options={"txt_backend": "pymupdf"}, on_result=self.results.append)
+        self.folder.cache_enabled = False
+
+    def tearDown(self):
+        self.folder.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def step_until(self, done, timeout=30):
+        deadline = time.monotonic() + timeout
+        while not done():
+            self.assertLess(time.monotonic(), deadline, "hot folder did not finish in time")
+            self.folder.step()
+
+    def test_converted_and_failed_files_are_moved(self):
+        write_pdf(os.path.join(self.tmp, "good.pdf"))
+        with open(os.path.join(self.tmp, "bad.pdf"), 'wb') as f:
+            f.write(b"not a pdf")
+        self.folder.start()
+        self.step_until(lambda: len(self.results) == 2)
+
+        by_name = {os.path.basename(r["input"]): r for r in self.results}
+        self.assertEqual(by_name["good.pdf"]["status"], "ok")
+        self.assertEqual(by_name["good.pdf"]["pages"], 2)
+        self.assertEqual(by_name["bad.pdf"]["status"], "failed")
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp, "done", "good.pdf")))
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp, "converted", "good.txt")))
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp, "failed", "bad.pdf")))
+        with open(os.path.join(self.tmp, "failed", "bad.error.txt"), 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read().strip(), by_name["bad.pdf"]["error"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "good.pdf")))
+        summary = self.folder.summary()
+        self.assertEqual((summary["files"], summary["succeeded"], summary["failed"]), (2, 1, 1))
+
+    def test_file_still_being_written_waits(self):
+        path = os.path.join(self.tmp, "growing.pdf")
+        with open(path, 'wb') as f:
+            f.write(b"%PDF-1.7\n")
+        self.folder.add(["growing.pdf", "notes.txt"])
+        self.assertEqual(list(self.folder.pending), ["growing.pdf"])
+        for _ in range(3):
+            time.sleep(0.25)
+            with open(path, 'ab') as f:
+                f.write(b"% more\n")
+            self.folder.check_pending()
+            self.assertEqual(self.folder.ready, {})
+        # Unchanged for the settle time, checked twice: once to record, once to confirm
+        for _ in range(2):
+            time.sleep(0.25)
+            self.folder.check_pending()
+        self.assertEqual(list(self.folder.ready), ["growing.pdf"])
+
+    def test_empty_file_waits(self):
+        open(os.path.join(self.tmp, "empty.pdf"), 'wb').close()
+        self.folder.add(["empty.pdf"])
+        for _ in range(3):
+            time.sleep(0.25)
+            self.folder.check_pending()
+        self.assertEqual(self.folder.ready, {})
+
+    def test_move_keeps_existing_names(self):
+        target = os.path.join(self.tmp, "target")
+        os.makedirs(target)
+        for _ in range(2):
+            with open(os.path.join(self.tmp, "a.pdf"), 'wb') as f:
+                f.write(b"x")
+            _move(os.path.join(self.tmp, "a.pdf"), target)
+        self.assertEqual(sorted(os.listdir(target)), ["a-2.pdf", "a.pdf"])
+
+if __name__ == "__main__":
+    unittest.main()